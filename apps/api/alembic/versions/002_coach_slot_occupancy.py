@@ -0,0 +1,84 @@
+"""coach slot occupancy counters
+
+Revision ID: 002_slot_occupancy
+Revises: 001_multi_role
+Create Date: 2026-10-18
+
+Creates:
+  - coach_slot_occupancy: 小班时段按日期的已占名额计数
+Alters:
+  - bookings.slot_id: 预约占用的小班时段；已有的有效小班预约按教练、星期、时间回填
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "002_slot_occupancy"
+down_revision: Union[str, None] = "001_multi_role"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # 应用启动时 create_all 可能已建表，这里只补缺失部分
+    if not inspector.has_table("coach_slot_occupancy"):
+        op.create_table(
+            "coach_slot_occupancy",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("coach_id", sa.Integer(), sa.ForeignKey("coaches.id"), nullable=False),
+            sa.Column(
+                "slot_id", sa.Integer(), sa.ForeignKey("coach_available_slots.id"), nullable=False
+            ),
+            sa.Column("slot_date", sa.Date(), nullable=False),
+            sa.Column(
+                "booked_count", sa.Integer(), server_default=sa.text("0"), comment="已占名额"
+            ),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_unique_constraint(
+            "uq_coach_slot_occupancy_slot_date", "coach_slot_occupancy", ["slot_id", "slot_date"]
+        )
+        op.create_index(
+            "ix_coach_slot_occupancy_coach_date", "coach_slot_occupancy", ["coach_id", "slot_date"]
+        )
+
+    booking_columns = {c["name"] for c in inspector.get_columns("bookings")}
+    if "slot_id" not in booking_columns:
+        op.add_column(
+            "bookings",
+            sa.Column(
+                "slot_id",
+                sa.Integer(),
+                sa.ForeignKey("coach_available_slots.id"),
+                nullable=True,
+                comment="占用名额的小班时段",
+            ),
+        )
+
+    # 回填已有小班预约的 slot_id（与 find_group_slot 同口径：完整覆盖该时间、开始最早的时段），
+    # 名额计数初值与取消/改期时的释放均按 slot_id 统计
+    if op.get_bind().dialect.name == "sqlite":
+        day_of_week = "CAST(strftime('%w', bookings.booking_date) AS INTEGER)"
+    else:
+        day_of_week = "CAST(EXTRACT(DOW FROM bookings.booking_date) AS INTEGER)"
+    op.execute(
+        "UPDATE bookings SET slot_id = ("
+        "SELECT s.id FROM coach_available_slots s "
+        "WHERE s.coach_id = bookings.coach_id "
+        f"AND s.day_of_week = {day_of_week} "
+        "AND s.is_active AND s.max_students > 1 "
+        "AND s.start_time <= bookings.start_time AND s.end_time >= bookings.end_time "
+        "ORDER BY s.start_time LIMIT 1"
+        ") "
+        "WHERE bookings.slot_id IS NULL AND bookings.status IN ('pending', 'confirmed')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("bookings", "slot_id")
+    op.drop_table("coach_slot_occupancy")
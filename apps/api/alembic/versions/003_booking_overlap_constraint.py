@@ -0,0 +1,106 @@
+"""database-enforced booking non-overlap
+
+Revision ID: 003_booking_overlap
+Revises: 002_slot_occupancy
+Create Date: 2026-10-18
+
+Creates:
+  - PostgreSQL: ex_bookings_coach_no_overlap / ex_bookings_student_no_overlap
+    排他约束（btree_gist）
+  - SQLite: 等价的 BEFORE INSERT/UPDATE 触发器
+
+有效记录（pending/confirmed）中：同一教练时间重叠的预约必须属于同一小班时段
+（私教预约不与任何其他预约重叠）；同一学员的预约不允许时间重叠。
+升级前需先清理已存在的重叠数据，否则约束创建会失败。
+约束与触发器均已存在时跳过（由 create_all 建库后再 stamp/upgrade 的情况）。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003_booking_overlap"
+down_revision: Union[str, None] = "002_slot_occupancy"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COACH_CONSTRAINT = "ex_bookings_coach_no_overlap"
+STUDENT_CONSTRAINT = "ex_bookings_student_no_overlap"
+ACTIVE_STATUSES = "('pending', 'confirmed')"
+BOOKING_RANGE = "tsrange(booking_date + start_time, booking_date + end_time, '[)')"
+
+# 私教预约以 -id 作为时段键，与任何其他预约都不相等
+PG_CONSTRAINTS = {
+    COACH_CONSTRAINT: (
+        f"EXCLUDE USING gist (coach_id WITH =, {BOOKING_RANGE} WITH &&, "
+        "(COALESCE(slot_id, -id)) WITH <>) "
+        f"WHERE (status IN {ACTIVE_STATUSES})"
+    ),
+    STUDENT_CONSTRAINT: (
+        f"EXCLUDE USING gist (student_id WITH =, {BOOKING_RANGE} WITH &&) "
+        f"WHERE (status IN {ACTIVE_STATUSES})"
+    ),
+}
+
+SQLITE_MATCHES = {
+    COACH_CONSTRAINT: (
+        "b.coach_id = NEW.coach_id "
+        "AND (NEW.slot_id IS NULL OR b.slot_id IS NULL OR b.slot_id != NEW.slot_id)"
+    ),
+    STUDENT_CONSTRAINT: "b.student_id = NEW.student_id",
+}
+SQLITE_OVERLAP_CHECK = (
+    "SELECT RAISE(ABORT, '{constraint}') WHERE EXISTS ("
+    "SELECT 1 FROM bookings b WHERE {match} AND b.booking_date = NEW.booking_date "
+    f"AND b.status IN {ACTIVE_STATUSES} "
+    "AND b.start_time < NEW.end_time AND b.end_time > NEW.start_time{extra});"
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        existing = set(
+            bind.execute(
+                sa.text("SELECT conname FROM pg_constraint WHERE conrelid = 'bookings'::regclass")
+            ).scalars()
+        )
+        for constraint, definition in PG_CONSTRAINTS.items():
+            if constraint not in existing:
+                op.execute(f"ALTER TABLE bookings ADD CONSTRAINT {constraint} {definition}")
+    elif dialect == "sqlite":
+        for constraint, match in SQLITE_MATCHES.items():
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{constraint}_insert "
+                "BEFORE INSERT ON bookings "
+                f"WHEN NEW.status IN {ACTIVE_STATUSES} "
+                "BEGIN "
+                f"{SQLITE_OVERLAP_CHECK.format(constraint=constraint, match=match, extra='')} "
+                "END"
+            )
+            check = SQLITE_OVERLAP_CHECK.format(
+                constraint=constraint, match=match, extra=" AND b.id != NEW.id"
+            )
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{constraint}_update "
+                "BEFORE UPDATE OF "
+                "coach_id, student_id, slot_id, booking_date, start_time, end_time, status "
+                "ON bookings "
+                f"WHEN NEW.status IN {ACTIVE_STATUSES} "
+                f"BEGIN {check} END"
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for constraint in (STUDENT_CONSTRAINT, COACH_CONSTRAINT):
+            op.execute(f"ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {constraint}")
+    elif dialect == "sqlite":
+        for constraint in (STUDENT_CONSTRAINT, COACH_CONSTRAINT):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{constraint}_insert")
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{constraint}_update")
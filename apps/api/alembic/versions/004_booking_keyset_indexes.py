@@ -0,0 +1,39 @@
+"""booking keyset pagination indexes
+
+Revision ID: 004_booking_keyset
+Revises: 003_booking_overlap
+Create Date: 2026-10-18
+
+Creates:
+  - ix_bookings_student_date_start: 学员预约列表按 (日期, 开始时间, ID) 翻页
+  - ix_bookings_coach_date_start: 教练预约列表按 (日期, 开始时间, ID) 翻页
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004_booking_keyset"
+down_revision: Union[str, None] = "003_booking_overlap"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bookings_student_date_start",
+        "bookings",
+        ["student_id", "booking_date", "start_time", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_bookings_coach_date_start",
+        "bookings",
+        ["coach_id", "booking_date", "start_time", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_coach_date_start", table_name="bookings")
+    op.drop_index("ix_bookings_student_date_start", table_name="bookings")
@@ -0,0 +1,49 @@
+"""coach stats read model
+
+Revision ID: 005_coach_stats
+Revises: 004_booking_keyset
+Create Date: 2026-10-18
+
+Creates:
+  - coach_stats: 教练统计读模型（学员数、课程数、缺席/取消数、评分）
+
+升级后运行 python -m scripts.rebuild_coach_stats 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005_coach_stats"
+down_revision: Union[str, None] = "004_booking_keyset"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("coach_stats"):
+        return
+    op.create_table(
+        "coach_stats",
+        sa.Column("coach_id", sa.Integer(), sa.ForeignKey("coaches.id"), primary_key=True),
+        sa.Column(
+            "total_students",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            comment="已完成课程的去重学员数",
+        ),
+        sa.Column(
+            "total_lessons", sa.Integer(), server_default=sa.text("0"), comment="已完成课程数"
+        ),
+        sa.Column("no_show_count", sa.Integer(), server_default=sa.text("0"), comment="缺席数"),
+        sa.Column("cancelled_count", sa.Integer(), server_default=sa.text("0"), comment="取消数"),
+        sa.Column("rating_sum", sa.Integer(), server_default=sa.text("0"), comment="评分总和"),
+        sa.Column("review_count", sa.Integer(), server_default=sa.text("0"), comment="评价数"),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("coach_stats")
@@ -0,0 +1,65 @@
+"""coach income ledger and monthly rollups
+
+Revision ID: 006_coach_income
+Revises: 005_coach_stats
+Create Date: 2026-10-18
+
+Creates:
+  - coach_income_entries: 教练收入流水（预约完成时写入，固化当时的课时费与提成比例）
+  - coach_income_monthly: 教练月度收入汇总
+
+升级后运行 python -m scripts.rebuild_coach_income 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006_coach_income"
+down_revision: Union[str, None] = "005_coach_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("coach_income_entries"):
+        op.create_table(
+            "coach_income_entries",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("coach_id", sa.Integer(), sa.ForeignKey("coaches.id"), nullable=False),
+            sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id"), nullable=False),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+            sa.Column("booking_date", sa.Date(), nullable=False, comment="上课日期"),
+            sa.Column("income_month", sa.String(7), nullable=False, comment="归属月份 YYYY-MM"),
+            sa.Column("hourly_rate", sa.Numeric(10, 2), nullable=False, comment="完成时的课时费"),
+            sa.Column(
+                "commission_rate", sa.Numeric(5, 2), nullable=False, comment="完成时的提成比例"
+            ),
+            sa.Column("amount", sa.Numeric(10, 2), nullable=False, comment="收入金额"),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.UniqueConstraint("booking_id", name="uq_coach_income_entries_booking_id"),
+        )
+        op.create_index(
+            "ix_coach_income_entries_coach_month",
+            "coach_income_entries",
+            ["coach_id", "income_month", "booking_date"],
+        )
+
+    if not inspector.has_table("coach_income_monthly"):
+        op.create_table(
+            "coach_income_monthly",
+            sa.Column("coach_id", sa.Integer(), sa.ForeignKey("coaches.id"), primary_key=True),
+            sa.Column("month", sa.String(7), primary_key=True, comment="YYYY-MM"),
+            sa.Column("lessons", sa.Integer(), server_default=sa.text("0"), comment="已完成课程数"),
+            sa.Column("income", sa.Numeric(12, 2), server_default=sa.text("0"), comment="收入合计"),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("coach_income_monthly")
+    op.drop_index("ix_coach_income_entries_coach_month", table_name="coach_income_entries")
+    op.drop_table("coach_income_entries")
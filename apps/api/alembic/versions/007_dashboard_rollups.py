@@ -0,0 +1,59 @@
+"""dashboard daily and monthly rollups
+
+Revision ID: 007_dashboard_rollups
+Revises: 006_coach_income
+Create Date: 2026-10-18
+
+Creates:
+  - dashboard_monthly_stats: 看板月汇总（新开课时账户数）
+  - bookings: 新增 (booking_date, status) 索引，供看板按上课日期实时统计预约数
+  - transactions: 新增 (type, created_at) 索引，供看板按月实时统计购买营收
+
+升级后运行 python -m scripts.rebuild_dashboard_metrics 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007_dashboard_rollups"
+down_revision: Union[str, None] = "006_coach_income"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("dashboard_monthly_stats"):
+        op.create_table(
+            "dashboard_monthly_stats",
+            sa.Column("month", sa.String(7), primary_key=True, comment="YYYY-MM"),
+            sa.Column(
+                "new_memberships",
+                sa.Integer(),
+                server_default=sa.text("0"),
+                comment="新开课时账户数",
+            ),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+    op.create_index(
+        "ix_bookings_date_status",
+        "bookings",
+        ["booking_date", "status"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_transactions_type_created",
+        "transactions",
+        ["type", "created_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_type_created", table_name="transactions")
+    op.drop_index("ix_bookings_date_status", table_name="bookings")
+    op.drop_table("dashboard_monthly_stats")
@@ -0,0 +1,38 @@
+"""lifecycle sweep indexes
+
+Revision ID: 008_lifecycle_sweep
+Revises: 007_dashboard_rollups
+Create Date: 2026-10-18
+
+Alters:
+  - bookings: 新增 (status, booking_date, id) 索引，供已确认预约自动完成的 keyset 扫描
+  - student_memberships: 新增 (status, expire_date, id) 索引，供过期课时卡扫描
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008_lifecycle_sweep"
+down_revision: Union[str, None] = "007_dashboard_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bookings_status_date",
+        "bookings",
+        ["status", "booking_date", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_student_memberships_status_expire",
+        "student_memberships",
+        ["status", "expire_date", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_student_memberships_status_expire", table_name="student_memberships")
+    op.drop_index("ix_bookings_status_date", table_name="bookings")
@@ -0,0 +1,46 @@
+"""energy rule period counters
+
+Revision ID: 009_energy_rule_counters
+Revises: 008_lifecycle_sweep
+Create Date: 2026-10-18
+
+Creates:
+  - energy_rule_counters: 按 (学员, 规则, 周期, 周期起始日) 累计的能量获取量，
+    供规则日/周/月上限判定与今日/本周获取统计点查
+
+升级后运行 python -m scripts.rebuild_energy_counters 回填当前周期的计数。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009_energy_rule_counters"
+down_revision: Union[str, None] = "008_lifecycle_sweep"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("energy_rule_counters"):
+        return
+    op.create_table(
+        "energy_rule_counters",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), primary_key=True),
+        sa.Column("rule_id", sa.Integer(), sa.ForeignKey("energy_rules.id"), primary_key=True),
+        sa.Column("period", sa.String(10), primary_key=True, comment="day/week/month"),
+        sa.Column("bucket_start", sa.Date(), primary_key=True, comment="周期起始日"),
+        sa.Column("amount", sa.Integer(), server_default=sa.text("0"), comment="周期内累计获取"),
+    )
+    op.create_index(
+        "ix_energy_rule_counters_student_period",
+        "energy_rule_counters",
+        ["student_id", "period", "bucket_start"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_energy_rule_counters_student_period", table_name="energy_rule_counters")
+    op.drop_table("energy_rule_counters")
@@ -0,0 +1,36 @@
+"""cache versions for process-local caches
+
+Revision ID: 010_cache_versions
+Revises: 009_energy_rule_counters
+Create Date: 2026-10-18
+
+Creates:
+  - cache_versions: 进程内缓存的版本号（如 energy_rules），数据变更时递增，
+    各 API 进程轮询后重载本地缓存
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010_cache_versions"
+down_revision: Union[str, None] = "009_energy_rule_counters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("cache_versions"):
+        return
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), primary_key=True, comment="缓存名"),
+        sa.Column("version", sa.Integer(), server_default=sa.text("0"), comment="版本号"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
@@ -0,0 +1,42 @@
+"""energy daily per-student rollup
+
+Revision ID: 011_energy_daily_stats
+Revises: 010_cache_versions
+Create Date: 2026-10-18
+
+Creates:
+  - energy_daily_stats: 学员能量日汇总（获取/消费/退还），周/月统计与排行榜读取
+    至多 31 行/学员而不扫描 energy_transactions
+
+升级后运行 python -m scripts.rebuild_energy_daily_stats 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "011_energy_daily_stats"
+down_revision: Union[str, None] = "010_cache_versions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("energy_daily_stats"):
+        return
+    op.create_table(
+        "energy_daily_stats",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), primary_key=True),
+        sa.Column("stat_date", sa.Date(), primary_key=True, comment="UTC 日期"),
+        sa.Column("earned", sa.Integer(), server_default=sa.text("0"), comment="当日获取"),
+        sa.Column("spent", sa.Integer(), server_default=sa.text("0"), comment="当日消费"),
+        sa.Column("refunded", sa.Integer(), server_default=sa.text("0"), comment="当日退还"),
+    )
+    op.create_index("ix_energy_daily_stats_date", "energy_daily_stats", ["stat_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_energy_daily_stats_date", table_name="energy_daily_stats")
+    op.drop_table("energy_daily_stats")
@@ -0,0 +1,65 @@
+"""energy transaction ledger archive
+
+Revision ID: 012_energy_ledger_archive
+Revises: 011_energy_daily_stats
+Create Date: 2026-10-18
+
+Creates:
+  - energy_transactions_archive: 超出热数据窗口的能量交易记录（保留原ID）
+  - energy_archive_counts: 按学员、类型的归档记录数，分页总数无需统计归档表
+
+升级后按需运行 python -m scripts.archive_energy_ledger 迁移冷数据（建议每月执行）。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "012_energy_ledger_archive"
+down_revision: Union[str, None] = "011_energy_daily_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("energy_transactions_archive"):
+        op.create_table(
+            "energy_transactions_archive",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("account_id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("type", sa.String(20), nullable=False),
+            sa.Column("source_type", sa.String(30)),
+            sa.Column("amount", sa.Integer(), nullable=False),
+            sa.Column("balance_after", sa.Integer(), nullable=False),
+            sa.Column("rule_id", sa.Integer()),
+            sa.Column("reference_type", sa.String(50)),
+            sa.Column("reference_id", sa.Integer()),
+            sa.Column("description", sa.String(200)),
+            sa.Column("operator_id", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index(
+            "ix_energy_transactions_archive_student_created",
+            "energy_transactions_archive",
+            ["student_id", "created_at"],
+        )
+    if not inspector.has_table("energy_archive_counts"):
+        op.create_table(
+            "energy_archive_counts",
+            sa.Column("student_id", sa.Integer(), primary_key=True),
+            sa.Column("type", sa.String(20), primary_key=True),
+            sa.Column("count", sa.Integer(), server_default=sa.text("0"), comment="归档记录数"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("energy_archive_counts")
+    op.drop_index(
+        "ix_energy_transactions_archive_student_created",
+        table_name="energy_transactions_archive",
+    )
+    op.drop_table("energy_transactions_archive")
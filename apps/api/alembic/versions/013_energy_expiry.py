@@ -0,0 +1,54 @@
+"""energy expiry job
+
+Revision ID: 013_energy_expiry
+Revises: 012_energy_ledger_archive
+Create Date: 2026-10-18
+
+Alters:
+  - energy_daily_stats: 新增 expired（当日过期量）
+Creates:
+  - job_checkpoints: 分批后台任务的进度检查点
+
+升级后运行 python -m scripts.rebuild_energy_daily_stats 回填 expired（历史上无过期记录时可跳过）。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "013_energy_expiry"
+down_revision: Union[str, None] = "012_energy_ledger_archive"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("energy_daily_stats")}
+    if "expired" not in columns:
+        op.add_column(
+            "energy_daily_stats",
+            sa.Column(
+                "expired",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+                comment="当日过期",
+            ),
+        )
+    if not inspector.has_table("job_checkpoints"):
+        op.create_table(
+            "job_checkpoints",
+            sa.Column("name", sa.String(50), primary_key=True, comment="任务名"),
+            sa.Column("run_key", sa.String(50), nullable=False, comment="本轮标识"),
+            sa.Column("last_id", sa.Integer(), server_default=sa.text("0"), comment="已处理主键"),
+            sa.Column("completed", sa.Boolean(), server_default=sa.false(), comment="本轮已完成"),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
+    op.drop_column("energy_daily_stats", "expired")
@@ -0,0 +1,51 @@
+"""training session counters
+
+Revision ID: 014_training_stats
+Revises: 013_energy_expiry
+Create Date: 2026-10-18
+
+Creates:
+  - training_daily_stats: 学员训练日计数，周/月训练排行榜至多读取 31 行/学员
+  - training_stats: 学员累计训练次数，全部时间训练排行榜不再聚合 training_sessions
+
+升级后运行 python -m scripts.rebuild_training_stats 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "014_training_stats"
+down_revision: Union[str, None] = "013_energy_expiry"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("training_daily_stats"):
+        op.create_table(
+            "training_daily_stats",
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), primary_key=True),
+            sa.Column("stat_date", sa.Date(), primary_key=True, comment="UTC 日期"),
+            sa.Column(
+                "sessions", sa.Integer(), server_default=sa.text("0"), comment="当日训练次数"
+            ),
+        )
+        op.create_index("ix_training_daily_stats_date", "training_daily_stats", ["stat_date"])
+    if not inspector.has_table("training_stats"):
+        op.create_table(
+            "training_stats",
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), primary_key=True),
+            sa.Column(
+                "total_sessions", sa.Integer(), server_default=sa.text("0"), comment="累计训练次数"
+            ),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("training_stats")
+    op.drop_index("ix_training_daily_stats_date", table_name="training_daily_stats")
+    op.drop_table("training_daily_stats")
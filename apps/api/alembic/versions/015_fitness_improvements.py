@@ -0,0 +1,70 @@
+"""fitness improvement leaderboard
+
+Revision ID: 015_fitness_improvements
+Revises: 014_training_stats
+Create Date: 2026-10-18
+
+Creates:
+  - fitness_improvements: 学员最近两次体测的逐项进步幅度，进步榜按
+    (metric_name, improvement) 索引读取
+  - ix_fitness_tests_student_date: 按学员取最近两次体测
+  - ix_fitness_metrics_test: 按体测读取指标
+
+升级后运行 python -m scripts.rebuild_fitness_improvements 回填历史数据。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "015_fitness_improvements"
+down_revision: Union[str, None] = "014_training_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_fitness_tests_student_date",
+        "fitness_tests",
+        ["student_id", "test_date", "id"],
+        if_not_exists=True,
+    )
+    op.create_index("ix_fitness_metrics_test", "fitness_metrics", ["test_id"], if_not_exists=True)
+    if sa.inspect(op.get_bind()).has_table("fitness_improvements"):
+        return
+    op.create_table(
+        "fitness_improvements",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), primary_key=True),
+        sa.Column("metric_name", sa.String(50), primary_key=True, comment="具体指标名称"),
+        sa.Column("metric_type", sa.String(20), nullable=False, comment="五维类型"),
+        sa.Column(
+            "previous_test_id", sa.Integer(), sa.ForeignKey("fitness_tests.id"), nullable=False
+        ),
+        sa.Column(
+            "latest_test_id", sa.Integer(), sa.ForeignKey("fitness_tests.id"), nullable=False
+        ),
+        sa.Column("previous_value", sa.Numeric(10, 2), nullable=False, comment="上次原始值"),
+        sa.Column("latest_value", sa.Numeric(10, 2), nullable=False, comment="本次原始值"),
+        sa.Column(
+            "improvement",
+            sa.Numeric(10, 2),
+            nullable=False,
+            comment="进步幅度（两次均有得分时按得分，否则按原始值，越小越好的指标取反）",
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_fitness_improvements_rank",
+        "fitness_improvements",
+        ["metric_name", "improvement", "student_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fitness_improvements_rank", table_name="fitness_improvements")
+    op.drop_table("fitness_improvements")
+    op.drop_index("ix_fitness_metrics_test", table_name="fitness_metrics")
+    op.drop_index("ix_fitness_tests_student_date", table_name="fitness_tests")
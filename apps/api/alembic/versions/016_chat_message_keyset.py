@@ -0,0 +1,31 @@
+"""chat message keyset pagination index
+
+Revision ID: 016_chat_message_keyset
+Revises: 015_fitness_improvements
+Create Date: 2026-10-18
+
+Creates:
+  - ix_messages_conversation_id_id: 会话消息按 (conversation_id, id) 游标翻页与按已读位置标记已读
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "016_chat_message_keyset"
+down_revision: Union[str, None] = "015_fitness_improvements"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_conversation_id_id",
+        "messages",
+        ["conversation_id", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id_id", table_name="messages")
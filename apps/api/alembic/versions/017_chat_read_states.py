@@ -0,0 +1,65 @@
+"""chat read watermarks and unread counters
+
+Revision ID: 017_chat_read_states
+Revises: 016_chat_message_keyset
+Create Date: 2026-10-18
+
+Creates:
+  - conversation_read_states: 会话参与者的已读水位与未读计数，未读角标与标记已读均为单行读写
+
+Drops:
+  - message_read_status: 逐条消息已读记录（从未写入，由已读水位取代）
+
+升级后运行 python -m scripts.rebuild_chat_read_states 按 messages.status 回填。
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "017_chat_read_states"
+down_revision: Union[str, None] = "016_chat_message_keyset"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("conversation_read_states"):
+        op.create_table(
+            "conversation_read_states",
+            sa.Column(
+                "conversation_id",
+                sa.Integer(),
+                sa.ForeignKey("conversations.id"),
+                primary_key=True,
+            ),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column(
+                "last_read_message_id",
+                sa.Integer(),
+                server_default=sa.text("0"),
+                comment="已读水位（消息ID）",
+            ),
+            sa.Column(
+                "unread_count", sa.Integer(), server_default=sa.text("0"), comment="未读消息数"
+            ),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+    if inspector.has_table("message_read_status"):
+        op.drop_table("message_read_status")
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("message_read_status"):
+        op.create_table(
+            "message_read_status",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("message_id", sa.Integer(), sa.ForeignKey("messages.id"), index=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), index=True),
+            sa.Column("read_at", sa.DateTime(), nullable=True),
+        )
+    op.drop_table("conversation_read_states")
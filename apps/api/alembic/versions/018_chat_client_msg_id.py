@@ -0,0 +1,46 @@
+"""chat message idempotency key
+
+Revision ID: 018_chat_client_msg_id
+Revises: 017_chat_read_states
+Create Date: 2026-10-18
+
+Alters:
+  - messages.client_msg_id: 客户端生成的幂等ID（WebSocket 发送消息）
+
+Creates:
+  - uq_messages_sender_client_msg: (sender_id, client_msg_id) 唯一，重发的帧不会重复落库
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "018_chat_client_msg_id"
+down_revision: Union[str, None] = "017_chat_read_states"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("messages")}
+    if "client_msg_id" not in columns:
+        op.add_column(
+            "messages",
+            sa.Column(
+                "client_msg_id", sa.String(64), nullable=True, comment="客户端生成的幂等ID"
+            ),
+        )
+    op.create_index(
+        "uq_messages_sender_client_msg",
+        "messages",
+        ["sender_id", "client_msg_id"],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_messages_sender_client_msg", table_name="messages")
+    op.drop_column("messages", "client_msg_id")
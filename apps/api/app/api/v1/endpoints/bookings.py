@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import fetch_user_from_token, get_current_user
+from app.models.booking import Booking
 from app.models.user import Coach, ParentStudentRelation, Student, User
 from app.schemas.booking import (
     BookingCancelRequest,
@@ -18,6 +19,9 @@ from app.schemas.booking import (
     BookingListResponse,
     BookingRescheduleRequest,
     BookingResponse,
+    BookingSeriesCreate,
+    BookingSeriesResponse,
+    BookingSeriesSkipped,
 )
 from app.services.booking_service import BookingService
 
@@ -108,6 +112,30 @@ async def _ensure_booking_access(current_user: User, booking, db: AsyncSession)
         raise HTTPException(status_code=403, detail="无权访问该预约")
 
 
+def booking_to_response(booking: Booking) -> BookingResponse:
+    """预约转换为响应（需已预加载 student/coach/schedule.course）"""
+    return BookingResponse(
+        id=booking.id,
+        student_id=booking.student_id,
+        coach_id=booking.coach_id,
+        schedule_id=booking.schedule_id,
+        booking_date=booking.booking_date,
+        start_time=booking.start_time,
+        end_time=booking.end_time,
+        course_type=booking.course_type,
+        status=booking.status,
+        cancel_reason=booking.cancel_reason,
+        cancelled_at=booking.cancelled_at,
+        remark=booking.remark,
+        created_at=booking.created_at,
+        student_name=booking.student.name if booking.student else None,
+        coach_name=booking.coach.name if booking.coach else None,
+        course_name=(
+            booking.schedule.course.name if booking.schedule and booking.schedule.course else None
+        ),
+    )
+
+
 @router.get("", response_model=BookingListResponse)
 async def get_my_bookings(
     status: Optional[str] = Query(None, description="预约状态筛选"),
@@ -115,6 +143,9 @@ async def get_my_bookings(
     end_date: Optional[date] = Query(None, description="结束日期"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    pagination: str = Query("page", pattern="^(page|cursor)$", description="分页方式"),
+    cursor: Optional[str] = Query(None, description="游标分页的下一页游标"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数"),
     db: AsyncSession = Depends(get_db),
     current_user_data: dict[str, object] = Depends(get_current_user),
 ):
@@ -125,6 +156,26 @@ async def get_my_bookings(
     student_id = await get_student_id_for_user(current_user, db)
     service = BookingService(db)
 
+    if pagination == "cursor" or cursor:
+        try:
+            bookings, next_cursor, total = await service.get_student_bookings_by_cursor(
+                student_id=student_id,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                limit=page_size,
+                with_total=with_total,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return BookingListResponse(
+            items=[booking_to_response(b) for b in bookings],
+            total=total,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+
     bookings, total = await service.get_student_bookings(
         student_id=student_id,
         status=status,
@@ -134,34 +185,12 @@ async def get_my_bookings(
         page_size=page_size,
     )
 
-    # 转换为响应格式
-    items = []
-    for booking in bookings:
-        item = BookingResponse(
-            id=booking.id,
-            student_id=booking.student_id,
-            coach_id=booking.coach_id,
-            schedule_id=booking.schedule_id,
-            booking_date=booking.booking_date,
-            start_time=booking.start_time,
-            end_time=booking.end_time,
-            course_type=booking.course_type,
-            status=booking.status,
-            cancel_reason=booking.cancel_reason,
-            cancelled_at=booking.cancelled_at,
-            remark=booking.remark,
-            created_at=booking.created_at,
-            student_name=booking.student.name if booking.student else None,
-            coach_name=booking.coach.name if booking.coach else None,
-            course_name=(
-                booking.schedule.course.name
-                if booking.schedule and booking.schedule.course
-                else None
-            ),
-        )
-        items.append(item)
-
-    return BookingListResponse(items=items, total=total, page=page, page_size=page_size)
+    return BookingListResponse(
+        items=[booking_to_response(b) for b in bookings],
+        total=total,
+        page=page,
+        page_size=page_size,
+    )
 
 
 @router.post("", response_model=BookingResponse)
@@ -206,6 +235,40 @@ async def create_booking(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/series", response_model=BookingSeriesResponse)
+async def create_booking_series(
+    data: BookingSeriesCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user_data: dict[str, object] = Depends(get_current_user),
+):
+    """创建周期预约（同一时段按周重复，一次事务提交）"""
+    current_user = await fetch_user_from_token(db, current_user_data)
+
+    student_id = data.student_id
+    if not student_id:
+        student_id = await get_student_id_for_user(current_user, db)
+
+    if current_user.role != "admin":
+        permitted_student_ids = await get_permitted_student_ids_for_user(current_user, db)
+        if student_id not in permitted_student_ids:
+            raise HTTPException(status_code=403, detail="无权为该学员创建预约")
+
+    service = BookingService(db)
+
+    try:
+        bookings, skipped = await service.create_booking_series(data, student_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    bookings = await service.get_bookings_by_ids([booking.id for booking in bookings])
+    return BookingSeriesResponse(
+        created=[booking_to_response(booking) for booking in bookings],
+        skipped=[
+            BookingSeriesSkipped(booking_date=day, reason=reason) for day, reason in skipped
+        ],
+    )
+
+
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: int,
@@ -3,17 +3,19 @@
 """
 
 import asyncio
+import json
 import secrets
 from time import monotonic
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
-from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import decode_access_token, fetch_user_from_token, get_current_user
-from app.models.chat import Conversation, Message, MessageStatus
+from app.models.chat import Conversation, Message
 from app.models.user import User
 from app.schemas.chat import (
     ConversationCreate,
@@ -23,36 +25,203 @@ from app.schemas.chat import (
     MessageListResponse,
     MessageResponse,
     UserBrief,
+    WsMessageSend,
 )
+from app.services.chat_broker import ChatBroker, create_chat_broker
+from app.services.chat_connections import (
+    CLOSE_PING_TIMEOUT,
+    ChatConnection,
+    ConnectionRegistry,
+)
+from app.services.chat_read_state import ChatReadStateService
+from app.services.chat_writer import ChatMessageWriter, PendingMessage, WriteResult
 
 router = APIRouter()
 
 
 # WebSocket 杩炴帴绠＄悊
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: int):
+    """推送经 broker 分发到所有 worker，各自入队到本进程内该用户的所有连接"""
+
+    def __init__(
+        self,
+        broker: ChatBroker,
+        registry: Optional[ConnectionRegistry] = None,
+        writer: Optional[ChatMessageWriter] = None,
+    ):
+        self.registry = registry or ConnectionRegistry()
+        self.broker = broker
+        self.writer = writer or ChatMessageWriter()
+        self._subscribed = False
+        self._sending: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """订阅推送分发（首次接受连接时调用，每个进程一次）"""
+        if not self._subscribed:
+            await self.broker.start(self.deliver)
+            self._subscribed = True
+
+    async def stop(self) -> None:
+        await self.writer.stop()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        if self._subscribed:
+            await self.broker.stop()
+            self._subscribed = False
+        await self.registry.close_all()
+
+    async def use_broker(self, broker: ChatBroker) -> None:
+        """替换分发后端（已订阅时改为订阅新后端）"""
+        if self._subscribed:
+            await self.broker.stop()
+            self._subscribed = False
+            self.broker = broker
+            await self.start()
+        else:
+            self.broker = broker
+
+    async def connect(self, websocket: WebSocket, user_id: int) -> ChatConnection:
+        await self.start()
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        return await self.registry.register(websocket, user_id)
 
-    def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+    async def disconnect(self, connection: ChatConnection):
+        """移除连接并停止其写协程"""
+        await self.registry.evict(connection, 1000)
 
     async def send_personal_message(self, message: dict, user_id: int):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_json(message)
+        await self.broker.publish([user_id], message)
 
     async def broadcast_to_conversation(self, message: dict, user_ids: List[int]):
-        sockets = [self.active_connections.get(user_id) for user_id in user_ids]
-        send_tasks = [socket.send_json(message) for socket in sockets if socket is not None]
-        if send_tasks:
-            await asyncio.gather(*send_tasks, return_exceptions=True)
-
-
-manager = ConnectionManager()
+        await self.broker.publish(user_ids, message)
+
+    async def deliver(self, user_ids: List[int], message: dict) -> None:
+        """入队到本进程内的连接（由 broker 回调，不等待客户端 socket）"""
+        self.registry.deliver(user_ids, message)
+
+    async def receive(self, connection: ChatConnection, data: str) -> None:
+        """处理客户端帧：心跳 "ping"，发送消息 {"type": "send", "data": WsMessageSend}
+
+        消息交给写入协程攒批落库，本协程不等待落库即可读取下一帧；落库后回复
+        {"type": "ack", "data": {"client_msg_id", "message"}}，失败回复 {"type": "error"}，
+        客户端对未确认的消息以同一 client_msg_id 重发。
+        """
+        if data == "ping":
+            # 回复同样经发送队列，避免与写协程并发写 socket
+            connection.offer("pong")
+            return
+
+        client_msg_id = None
+        try:
+            frame = json.loads(data)
+            if frame.get("type") != "send":
+                raise ValueError(f"unsupported frame type: {frame.get('type')}")
+            client_msg_id = (frame.get("data") or {}).get("client_msg_id")
+            payload = WsMessageSend.model_validate(frame.get("data"))
+        except (ValueError, AttributeError):
+            _offer_error(connection, client_msg_id, "无效的消息帧")
+            return
+
+        recipient_id = connection.peers.get(payload.conversation_id)
+        if recipient_id is None:
+            recipient_id = await self._authorize(connection, payload.conversation_id)
+            if recipient_id is None:
+                _offer_error(connection, payload.client_msg_id, "Not found")
+                return
+        if payload.reply_to_id is not None and not await self._reply_target_exists(
+            payload.conversation_id, payload.reply_to_id
+        ):
+            _offer_error(connection, payload.client_msg_id, "回复的消息不存在")
+            return
+
+        # 按接收顺序入队，同一连接的消息按发送顺序落库
+        future = self.writer.submit(
+            PendingMessage(
+                conversation_id=payload.conversation_id,
+                sender_id=connection.user_id,
+                recipient_id=recipient_id,
+                client_msg_id=payload.client_msg_id,
+                content=payload.content,
+                type=payload.type,
+                reply_to_id=payload.reply_to_id,
+            )
+        )
+        task = asyncio.create_task(
+            self._complete_send(connection, payload.client_msg_id, recipient_id, future)
+        )
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _authorize(self, connection: ChatConnection, conversation_id: int) -> Optional[int]:
+        """校验会话成员并写入连接缓存，返回对方用户ID（非成员返回 None）"""
+        async with self.writer.session_factory() as db:
+            conversation = await db.scalar(
+                select(Conversation).where(
+                    Conversation.id == conversation_id,
+                    or_(
+                        Conversation.participant1_id == connection.user_id,
+                        Conversation.participant2_id == connection.user_id,
+                    ),
+                )
+            )
+            if conversation is None:
+                return None
+            if connection.sender is None:
+                user = await db.get(User, connection.user_id)
+                connection.sender = user_to_brief(user) if user else None
+        recipient_id = (
+            conversation.participant2_id
+            if conversation.participant1_id == connection.user_id
+            else conversation.participant1_id
+        )
+        connection.peers[conversation_id] = recipient_id
+        return recipient_id
+
+    async def _reply_target_exists(self, conversation_id: int, message_id: int) -> bool:
+        """回复的消息须属于同一会话（入队前校验，避免无效引用在批量写入时触发约束冲突）"""
+        async with self.writer.session_factory() as db:
+            found = await db.scalar(
+                select(Message.id).where(
+                    Message.id == message_id, Message.conversation_id == conversation_id
+                )
+            )
+        return found is not None
+
+    async def _complete_send(
+        self,
+        connection: ChatConnection,
+        client_msg_id: str,
+        recipient_id: int,
+        future: "asyncio.Future[WriteResult]",
+    ) -> None:
+        try:
+            message, created = await future
+        except Exception:
+            _offer_error(connection, client_msg_id, "发送失败，请重试")
+            return
+        data = MessageResponse(
+            id=message.id,
+            conversation_id=message.conversation_id,
+            sender_id=message.sender_id,
+            sender=connection.sender,
+            type=message.type,
+            content=message.content,
+            reply_to_id=message.reply_to_id,
+            status=message.status,
+            is_deleted=message.is_deleted,
+            created_at=message.created_at,
+        ).model_dump(mode="json")
+        connection.offer({"type": "ack", "data": {"client_msg_id": client_msg_id, "message": data}})
+        # 重发的帧只确认，不重复推送
+        if created:
+            await self.broker.publish([recipient_id], {"type": "new_message", "data": data})
+
+
+def _offer_error(connection: ChatConnection, client_msg_id: Optional[str], detail: str) -> None:
+    connection.offer({"type": "error", "data": {"client_msg_id": client_msg_id, "detail": detail}})
+
+
+manager = ConnectionManager(create_chat_broker())
 
 
 class WsTicketStore:
@@ -136,20 +305,7 @@ async def get_conversations(
         users_result = await db.execute(select(User).where(User.id.in_(other_user_ids)))
         users_map = {user.id: user for user in users_result.scalars().all()}
 
-    unread_counts = {}
-    if conversation_ids:
-        unread_result = await db.execute(
-            select(Message.conversation_id, func.count().label("count"))
-            .where(
-                Message.conversation_id.in_(conversation_ids),
-                Message.sender_id != current_user.id,
-                Message.status != MessageStatus.READ.value,
-            )
-            .group_by(Message.conversation_id)
-        )
-        unread_counts = {
-            conversation_id: unread_count for conversation_id, unread_count in unread_result.all()
-        }
+    read_states = await ChatReadStateService(db).get_many(conversation_ids)
 
     last_messages_map = {}
     if last_message_ids:
@@ -168,9 +324,12 @@ async def get_conversations(
             else conv.participant1_id
         )
         other_user = users_map.get(other_user_id)
-        unread_count = unread_counts.get(conv.id, 0)
+        states = read_states.get(conv.id, {})
+        my_state = states.get(current_user.id)
+        unread_count = my_state.unread_count if my_state else 0
+        watermarks = {user_id: state.last_read_message_id for user_id, state in states.items()}
 
-        # 鑾峰彇鏈€鍚庝竴鏉℃秷鎭?        last_message = None
+        last_message = None
         if conv.last_message_id:
             last_msg = last_messages_map.get(conv.last_message_id)
             if last_msg:
@@ -181,7 +340,7 @@ async def get_conversations(
                     type=last_msg.type,
                     content=last_msg.content,
                     reply_to_id=last_msg.reply_to_id,
-                    status=last_msg.status,
+                    status=ChatReadStateService.status_of(last_msg, conv, watermarks),
                     is_deleted=last_msg.is_deleted,
                     created_at=last_msg.created_at,
                 )
@@ -270,16 +429,20 @@ async def create_or_get_conversation(
 @router.get("/conversations/{conversation_id}/messages", response_model=MessageListResponse)
 async def get_messages(
     conversation_id: int,
-    skip: int = Query(0, ge=0),
+    before_id: Optional[int] = Query(None, description="早于该消息ID的消息（向上翻页）"),
+    after_id: Optional[int] = Query(None, description="晚于该消息ID的消息（断线后增量拉取）"),
+    skip: int = Query(0, ge=0, description="已废弃：偏移分页，请改用 before_id"),
     limit: int = Query(50, ge=1, le=100),
+    with_total: bool = Query(False, description="是否统计总数"),
     db: AsyncSession = Depends(get_db),
     current_user_data: dict = Depends(get_current_user),
 ):
-    """Fetch user model"""
+    """获取消息列表（按 (conversation_id, id) 游标分页，新消息在前；只读，不标记已读）"""
     current_user = await fetch_user_from_token(db, current_user_data)
 
-    """鑾峰彇娑堟伅鍒楄〃"""
-    # 楠岃瘉浼氳瘽鏉冮檺
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="before_id 与 after_id 不能同时指定")
+
     conv_query = select(Conversation).where(
         Conversation.id == conversation_id,
         or_(
@@ -287,51 +450,37 @@ async def get_messages(
             Conversation.participant2_id == current_user.id,
         ),
     )
-    conv_result = await db.execute(conv_query)
-    conversation = conv_result.scalar_one_or_none()
-
+    conversation = (await db.execute(conv_query)).scalar_one_or_none()
     if not conversation:
         raise HTTPException(status_code=404, detail="Not found")
 
-    # 鑾峰彇娑堟伅鎬绘暟
-    count_query = select(func.count()).where(
-        Message.conversation_id == conversation_id,
-        Message.is_deleted.is_(False),
-    )
-    total = await db.scalar(count_query) or 0
-
-    # 鑾峰彇娑堟伅鍒楄〃
-    query = (
-        select(Message)
-        .where(
-            Message.conversation_id == conversation_id,
-            Message.is_deleted.is_(False),
-        )
-        .order_by(Message.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-
-    result = await db.execute(query)
-    messages = result.scalars().all()
-
-    # 鏍囪娑堟伅涓哄凡璇?
-    await db.execute(
-        update(Message)
-        .where(
-            Message.conversation_id == conversation_id,
-            Message.sender_id != current_user.id,
-            Message.status != MessageStatus.READ.value,
-        )
-        .values(status=MessageStatus.READ.value)
-    )
-    await db.commit()
+    visible = and_(Message.conversation_id == conversation_id, Message.is_deleted.is_(False))
+    query = select(Message).where(visible)
+    if after_id is not None:
+        # 取紧接 after_id 之后的一页，返回前倒序为新消息在前
+        query = query.where(Message.id > after_id).order_by(Message.id.asc())
+    else:
+        if before_id is not None:
+            query = query.where(Message.id < before_id)
+        query = query.order_by(Message.id.desc()).offset(skip)
+
+    result = await db.execute(query.limit(limit + 1))
+    messages = list(result.scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if after_id is not None:
+        messages.reverse()
+
+    total = None
+    if with_total:
+        total = await db.scalar(select(func.count()).where(visible)) or 0
 
     sender_ids = {msg.sender_id for msg in messages}
     senders_map = {}
     if sender_ids:
         senders_result = await db.execute(select(User).where(User.id.in_(sender_ids)))
         senders_map = {sender.id: sender for sender in senders_result.scalars().all()}
+    watermarks = await ChatReadStateService(db).watermarks(conversation_id) if messages else {}
 
     items = []
     for msg in messages:
@@ -346,17 +495,43 @@ async def get_messages(
                 type=msg.type,
                 content=msg.content,
                 reply_to_id=msg.reply_to_id,
-                status=msg.status,
+                status=ChatReadStateService.status_of(msg, conversation, watermarks),
                 is_deleted=msg.is_deleted,
                 created_at=msg.created_at,
             )
         )
 
-    return MessageListResponse(
-        items=items,
-        total=total,
-        has_more=skip + limit < total,
+    return MessageListResponse(items=items, total=total, has_more=has_more)
+
+
+@router.put("/conversations/{conversation_id}/read")
+async def mark_conversation_read(
+    conversation_id: int,
+    up_to_id: Optional[int] = Query(None, description="已读到的消息ID，默认会话最后一条消息"),
+    db: AsyncSession = Depends(get_db),
+    current_user_data: dict = Depends(get_current_user),
+):
+    """将已读水位前移到 up_to_id（含），并向对方推送已读回执"""
+    current_user = await fetch_user_from_token(db, current_user_data)
+
+    conv_query = select(Conversation).where(
+        Conversation.id == conversation_id,
+        or_(
+            Conversation.participant1_id == current_user.id,
+            Conversation.participant2_id == current_user.id,
+        ),
+    )
+    conversation = (await db.execute(conv_query)).scalar_one_or_none()
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    read_up_to = await ChatReadStateService(db).mark_read(
+        conversation, current_user.id, up_to_id
     )
+    await db.commit()
+    await _push_read_receipt(conversation, current_user.id, read_up_to)
+
+    return {"message": "已标记为已读", "last_read_message_id": read_up_to}
 
 
 @router.post("/conversations/{conversation_id}/messages", response_model=MessageResponse)
@@ -398,6 +573,12 @@ async def send_message(
     # 鏇存柊浼氳瘽鏈€鍚庢秷鎭?
     conversation.last_message_id = message.id
     conversation.last_message_at = message.created_at
+    other_user_id = (
+        conversation.participant2_id
+        if conversation.participant1_id == current_user.id
+        else conversation.participant1_id
+    )
+    await ChatReadStateService(db).on_messages_sent(conversation_id, {other_user_id: 1})
     await db.commit()
     await db.refresh(message)
 
@@ -415,11 +596,6 @@ async def send_message(
     )
 
     # 閫氳繃 WebSocket 鎺ㄩ€佹秷鎭粰瀵规柟
-    other_user_id = (
-        conversation.participant2_id
-        if conversation.participant1_id == current_user.id
-        else conversation.participant1_id
-    )
     await manager.send_personal_message(
         {
             "type": "new_message",
@@ -457,15 +633,44 @@ async def mark_message_read(
         ),
     )
     conv_result = await db.execute(conv_query)
-    if not conv_result.scalar_one_or_none():
+    conversation = conv_result.scalar_one_or_none()
+    if not conversation:
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    message.status = MessageStatus.READ.value
+    # 已读水位前移到该消息
+    read_up_to = await ChatReadStateService(db).mark_read(
+        conversation, current_user.id, message.id
+    )
     await db.commit()
+    await _push_read_receipt(conversation, current_user.id, read_up_to)
 
     return {"message": "宸叉爣璁颁负宸茶"}
 
 
+async def _push_read_receipt(
+    conversation: Conversation, reader_id: int, last_read_message_id: Optional[int]
+) -> None:
+    """向会话另一方推送已读回执"""
+    if not last_read_message_id:
+        return
+    other_user_id = (
+        conversation.participant2_id
+        if conversation.participant1_id == reader_id
+        else conversation.participant1_id
+    )
+    await manager.send_personal_message(
+        {
+            "type": "read",
+            "data": {
+                "conversation_id": conversation.id,
+                "user_id": reader_id,
+                "last_read_message_id": last_read_message_id,
+            },
+        },
+        other_user_id,
+    )
+
+
 @router.post("/ws-ticket")
 async def create_websocket_ticket(
     db: AsyncSession = Depends(get_db),
@@ -505,12 +710,19 @@ async def websocket_endpoint(
         await websocket.close(code=4001)
         return
 
-    await manager.connect(websocket, user_id)
+    connection = await manager.connect(websocket, user_id)
 
     try:
-        while True:
-            data = await websocket.receive_text()
-            if data == "ping":
-                await websocket.send_text("pong")
+        while not connection.closed:
+            try:
+                data = await asyncio.wait_for(
+                    websocket.receive_text(), settings.CHAT_WS_PING_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                await manager.registry.evict(connection, CLOSE_PING_TIMEOUT)
+                break
+            await manager.receive(connection, data)
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        pass
+    finally:
+        await manager.disconnect(connection)
@@ -3,18 +3,22 @@
 """
 
 import json
-from datetime import date, timedelta
+from datetime import date, time, timedelta
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.endpoints.bookings import booking_to_response
 from app.core.database import get_db
 from app.core.security import fetch_user_from_token, get_current_user
-from app.models.booking import Booking, BookingStatus, CoachAvailableSlot, Review
+from app.models.booking import Booking, BookingStatus, CoachAvailableSlot
 from app.models.user import Coach, User
 from app.schemas.booking import (
+    BookingListResponse,
+    CoachAvailabilitySearchItem,
+    CoachAvailabilitySearchResponse,
     CoachAvailableSlotsResponse,
     CoachDetailResponse,
     CoachReplyRequest,
@@ -23,9 +27,17 @@ from app.schemas.booking import (
     CoachSlotUpdate,
     ReviewResponse,
 )
-from app.services.booking_service import BookingService, ReviewService
+from app.services.booking_service import (
+    BookingService,
+    ReviewService,
+    apply_booking_status_change,
+)
+from app.services.coach_income import CoachIncomeService, coach_rates, month_key
+from app.services.coach_stats import CoachStatsService
 
 router = APIRouter()
+
+MAX_AVAILABILITY_SEARCH_DAYS = 31
 
 
 async def _get_current_coach_profile(db: AsyncSession, user_id: int) -> Coach:
@@ -85,62 +97,12 @@ async def get_coaches(
     if not coaches:
         return []
 
-    coach_ids = [c.id for c in coaches]
-
-    # 一次性查询所有统计数据
-    # 学员数统计（去重）
-    students_subq = (
-        select(
-            Booking.coach_id, func.count(func.distinct(Booking.student_id)).label("student_count")
-        )
-        .where(Booking.coach_id.in_(coach_ids))
-        .group_by(Booking.coach_id)
-        .subquery()
-    )
-
-    # 课程数统计
-    lessons_subq = (
-        select(Booking.coach_id, func.count(Booking.id).label("lesson_count"))
-        .where(Booking.coach_id.in_(coach_ids), Booking.status == BookingStatus.COMPLETED.value)
-        .group_by(Booking.coach_id)
-        .subquery()
-    )
-
-    # 评分统计
-    reviews_subq = (
-        select(
-            Review.coach_id,
-            func.avg(Review.rating).label("avg_rating"),
-            func.count(Review.id).label("review_count"),
-        )
-        .where(Review.coach_id.in_(coach_ids))
-        .group_by(Review.coach_id)
-        .subquery()
-    )
-
-    # 合并统计数据
-    stats_query = (
-        select(
-            Coach.id,
-            func.coalesce(students_subq.c.student_count, 0).label("total_students"),
-            func.coalesce(lessons_subq.c.lesson_count, 0).label("total_lessons"),
-            func.coalesce(reviews_subq.c.avg_rating, 0.0).label("avg_rating"),
-            func.coalesce(reviews_subq.c.review_count, 0).label("review_count"),
-        )
-        .select_from(Coach)
-        .outerjoin(students_subq, Coach.id == students_subq.c.coach_id)
-        .outerjoin(lessons_subq, Coach.id == lessons_subq.c.coach_id)
-        .outerjoin(reviews_subq, Coach.id == reviews_subq.c.coach_id)
-        .where(Coach.id.in_(coach_ids))
-    )
-
-    stats_result = await db.execute(stats_query)
-    stats_dict = {row.id: row for row in stats_result}
+    stats_dict = await CoachStatsService(db).get_many(c.id for c in coaches)
 
     # 构建响应
     response = []
     for coach in coaches:
-        stats = stats_dict.get(coach.id)
+        stats = stats_dict[coach.id]
         response.append(
             CoachDetailResponse(
                 id=coach.id,
@@ -152,16 +114,67 @@ async def get_coaches(
                 certificates=parse_json_field(coach.certificates),
                 years_of_experience=coach.years_of_experience,
                 hourly_rate=float(coach.hourly_rate) if coach.hourly_rate else None,
-                total_students=int(stats.total_students) if stats else 0,
-                total_lessons=int(stats.total_lessons) if stats else 0,
-                avg_rating=round(float(stats.avg_rating), 1) if stats else 0.0,
-                review_count=int(stats.review_count) if stats else 0,
+                total_students=stats.total_students,
+                total_lessons=stats.total_lessons,
+                avg_rating=round(stats.avg_rating, 1),
+                review_count=stats.review_count,
             )
         )
 
     return response
 
 
+@router.get("/availability", response_model=CoachAvailabilitySearchResponse)
+async def search_available_coaches(
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期"),
+    start_time: Optional[time] = Query(None, description="时间窗口开始"),
+    end_time: Optional[time] = Query(None, description="时间窗口结束"),
+    specialty: Optional[str] = Query(None, description="专长筛选"),
+    course_type: Optional[str] = Query(None, description="课程类型: private/group"),
+    db: AsyncSession = Depends(get_db),
+):
+    """查询指定时间窗口内所有有空余名额的教练"""
+    if not start_date:
+        start_date = date.today()
+    if not end_date:
+        end_date = start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="结束日期不能早于开始日期")
+    if (end_date - start_date).days > MAX_AVAILABILITY_SEARCH_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"查询范围不能超过{MAX_AVAILABILITY_SEARCH_DAYS}天"
+        )
+    if start_time and end_time and end_time <= start_time:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+
+    service = BookingService(db)
+    results = await service.search_available_coaches(
+        start_date=start_date,
+        end_date=end_date,
+        start_time=start_time,
+        end_time=end_time,
+        specialty=specialty,
+        course_type=course_type,
+    )
+
+    return CoachAvailabilitySearchResponse(
+        start_date=start_date,
+        end_date=end_date,
+        items=[
+            CoachAvailabilitySearchItem(
+                coach_id=coach.id,
+                coach_name=coach.name,
+                avatar=coach.avatar,
+                specialty=parse_specialty(coach.specialty),
+                hourly_rate=float(coach.hourly_rate) if coach.hourly_rate else None,
+                slots=slots,
+            )
+            for coach, slots in results
+        ],
+    )
+
+
 @router.get("/{coach_id}", response_model=CoachDetailResponse)
 async def get_coach_detail(coach_id: int, db: AsyncSession = Depends(get_db)):
     """获取教练详情"""
@@ -169,27 +182,7 @@ async def get_coach_detail(coach_id: int, db: AsyncSession = Depends(get_db)):
     if not coach:
         raise HTTPException(status_code=404, detail="教练不存在")
 
-    # 获取统计信息
-    student_count = await db.execute(
-        select(func.count()).select_from(
-            select(Booking.student_id).where(Booking.coach_id == coach.id).distinct().subquery()
-        )
-    )
-    total_students = student_count.scalar() or 0
-
-    lesson_count = await db.execute(
-        select(func.count()).where(
-            Booking.coach_id == coach.id, Booking.status == BookingStatus.COMPLETED.value
-        )
-    )
-    total_lessons = lesson_count.scalar() or 0
-
-    rating_result = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id)).where(Review.coach_id == coach.id)
-    )
-    rating_row = rating_result.one()
-    avg_rating = float(rating_row[0]) if rating_row[0] else 0.0
-    review_count = rating_row[1] or 0
+    stats = await CoachStatsService(db).get(coach.id)
 
     return CoachDetailResponse(
         id=coach.id,
@@ -201,10 +194,10 @@ async def get_coach_detail(coach_id: int, db: AsyncSession = Depends(get_db)):
         certificates=parse_json_field(coach.certificates),
         years_of_experience=coach.years_of_experience,
         hourly_rate=float(coach.hourly_rate) if coach.hourly_rate else None,
-        total_students=total_students,
-        total_lessons=total_lessons,
-        avg_rating=round(avg_rating, 1),
-        review_count=review_count,
+        total_students=stats.total_students,
+        total_lessons=stats.total_lessons,
+        avg_rating=round(stats.avg_rating, 1),
+        review_count=stats.review_count,
     )
 
 
@@ -393,7 +386,11 @@ async def delete_my_slot(
         raise HTTPException(status_code=403, detail="无权操作该时段")
 
     service = BookingService(db)
-    if not await service.delete_coach_slot(slot_id):
+    try:
+        deleted = await service.delete_coach_slot(slot_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
         raise HTTPException(status_code=404, detail="时段不存在")
 
     return {"message": "删除成功"}
@@ -458,27 +455,7 @@ async def get_my_profile(
     # 获取用户信息
     user = await db.get(User, current_user["user_id"])
 
-    # 获取统计信息
-    student_count = await db.execute(
-        select(func.count()).select_from(
-            select(Booking.student_id).where(Booking.coach_id == coach.id).distinct().subquery()
-        )
-    )
-    total_students = student_count.scalar() or 0
-
-    lesson_count = await db.execute(
-        select(func.count()).where(
-            Booking.coach_id == coach.id, Booking.status == BookingStatus.COMPLETED.value
-        )
-    )
-    total_lessons = lesson_count.scalar() or 0
-
-    rating_result = await db.execute(
-        select(func.avg(Review.rating), func.count(Review.id)).where(Review.coach_id == coach.id)
-    )
-    rating_row = rating_result.one()
-    avg_rating = float(rating_row[0]) if rating_row[0] else 0.0
-    review_count = rating_row[1] or 0
+    stats = await CoachStatsService(db).get(coach.id)
 
     import json
 
@@ -497,10 +474,10 @@ async def get_my_profile(
         "hourly_rate": float(coach.hourly_rate) if coach.hourly_rate else None,
         "commission_rate": float(coach.commission_rate) if coach.commission_rate else None,
         "status": coach.status,
-        "total_students": total_students,
-        "total_lessons": total_lessons,
-        "avg_rating": round(avg_rating, 1),
-        "review_count": review_count,
+        "total_students": stats.total_students,
+        "total_lessons": stats.total_lessons,
+        "avg_rating": round(stats.avg_rating, 1),
+        "review_count": stats.review_count,
         "created_at": coach.created_at,
     }
 
@@ -564,59 +541,14 @@ async def get_income_summary(
     if not coach:
         raise HTTPException(status_code=404, detail="未找到教练信息")
 
-    today = date.today()
-    this_month_start = today.replace(day=1)
-    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-
-    # 本月完成课程数
-    this_month_lessons = await db.execute(
-        select(func.count()).where(
-            Booking.coach_id == coach.id,
-            Booking.status == BookingStatus.COMPLETED.value,
-            Booking.booking_date >= this_month_start,
-        )
-    )
-    this_month_count = this_month_lessons.scalar() or 0
-
-    # 上月完成课程数
-    last_month_lessons = await db.execute(
-        select(func.count()).where(
-            Booking.coach_id == coach.id,
-            Booking.status == BookingStatus.COMPLETED.value,
-            Booking.booking_date >= last_month_start,
-            Booking.booking_date < this_month_start,
-        )
-    )
-    last_month_count = last_month_lessons.scalar() or 0
-
-    # 总完成课程数
-    total_lessons = await db.execute(
-        select(func.count()).where(
-            Booking.coach_id == coach.id, Booking.status == BookingStatus.COMPLETED.value
-        )
-    )
-    total_count = total_lessons.scalar() or 0
-
-    # 计算收入 (课时费 * 课程数 * 提成比例)
-    from app.core.config import settings
-
-    hourly_rate = float(coach.hourly_rate) if coach.hourly_rate else 0
-    commission_rate = (
-        float(coach.commission_rate)
-        if coach.commission_rate
-        else settings.COACH_DEFAULT_COMMISSION_RATE
-    )
-
-    this_month_income = this_month_count * hourly_rate * commission_rate
-    last_month_income = last_month_count * hourly_rate * commission_rate
-    total_income = total_count * hourly_rate * commission_rate
+    # 读取月度汇总，历史收入按完成时的费率计算
+    summary = await CoachIncomeService(db).get_summary(coach.id)
+    hourly_rate, commission_rate = coach_rates(coach)
 
     return {
-        "this_month": {"lessons": this_month_count, "income": round(this_month_income, 2)},
-        "last_month": {"lessons": last_month_count, "income": round(last_month_income, 2)},
-        "total": {"lessons": total_count, "income": round(total_income, 2)},
-        "hourly_rate": hourly_rate,
-        "commission_rate": commission_rate,
+        **summary,
+        "hourly_rate": float(hourly_rate),
+        "commission_rate": float(commission_rate),
     }
 
 
@@ -637,60 +569,30 @@ async def get_income_details(
     if not coach:
         raise HTTPException(status_code=404, detail="未找到教练信息")
 
-    # 构建查询
-    query = select(Booking).where(
-        Booking.coach_id == coach.id, Booking.status == BookingStatus.COMPLETED.value
-    )
-
     if month:
         try:
             year, mon = month.split("-")
-            start_date = date(int(year), int(mon), 1)
-            if int(mon) == 12:
-                end_date = date(int(year) + 1, 1, 1)
-            else:
-                end_date = date(int(year), int(mon) + 1, 1)
-            query = query.where(Booking.booking_date >= start_date, Booking.booking_date < end_date)
+            month = month_key(date(int(year), int(mon), 1))
         except (ValueError, IndexError):
             # Invalid month format, skip date filtering
-            pass
-
-    # Use selectinload to eagerly load student data and avoid N+1 queries
-    from sqlalchemy.orm import selectinload
-
-    query = query.options(selectinload(Booking.student))
-    query = query.order_by(Booking.booking_date.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
-
-    bookings_result = await db.execute(query)
-    bookings = bookings_result.scalars().all()
-
-    from app.core.config import settings
-
-    hourly_rate = float(coach.hourly_rate) if coach.hourly_rate else 0
-    commission_rate = (
-        float(coach.commission_rate)
-        if coach.commission_rate
-        else settings.COACH_DEFAULT_COMMISSION_RATE
-    )
-
-    details = []
-    for booking in bookings:
-        income = hourly_rate * commission_rate
-
-        details.append(
-            {
-                "id": booking.id,
-                "booking_date": booking.booking_date.isoformat(),
-                "start_time": booking.start_time.strftime("%H:%M"),
-                "end_time": booking.end_time.strftime("%H:%M"),
-                "student_name": booking.student.name if booking.student else "未知学员",
-                "hourly_rate": hourly_rate,
-                "commission_rate": commission_rate,
-                "income": round(income, 2),
-                "completed_at": booking.updated_at.isoformat() if booking.updated_at else None,
-            }
-        )
+            month = None
+
+    entries = await CoachIncomeService(db).get_entries(coach.id, month, page, page_size)
+
+    details = [
+        {
+            "id": entry.booking_id,
+            "booking_date": entry.booking_date.isoformat(),
+            "start_time": entry.booking.start_time.strftime("%H:%M"),
+            "end_time": entry.booking.end_time.strftime("%H:%M"),
+            "student_name": entry.student.name if entry.student else "未知学员",
+            "hourly_rate": float(entry.hourly_rate),
+            "commission_rate": float(entry.commission_rate),
+            "income": float(entry.amount),
+            "completed_at": entry.created_at.isoformat() if entry.created_at else None,
+        }
+        for entry in entries
+    ]
 
     return {"items": details, "page": page, "page_size": page_size}
 
@@ -912,6 +814,44 @@ async def get_my_schedule(
     }
 
 
+@router.get("/me/bookings", response_model=BookingListResponse)
+async def get_my_coach_bookings(
+    status: Optional[str] = Query(None, description="预约状态筛选"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期"),
+    cursor: Optional[str] = Query(None, description="下一页游标"),
+    page_size: int = Query(20, ge=1, le=100),
+    with_total: bool = Query(False, description="是否统计总数"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """获取我的预约列表（游标分页）"""
+    if current_user["role"] != "coach":
+        raise HTTPException(status_code=403, detail="仅教练可访问")
+
+    coach = await _get_current_coach_profile(db, current_user["user_id"])
+    service = BookingService(db)
+    try:
+        bookings, next_cursor, total = await service.get_coach_bookings_by_cursor(
+            coach_id=coach.id,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            limit=page_size,
+            with_total=with_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BookingListResponse(
+        items=[booking_to_response(b) for b in bookings],
+        total=total,
+        page_size=page_size,
+        next_cursor=next_cursor,
+    )
+
+
 @router.put("/me/bookings/{booking_id}/confirm")
 async def confirm_booking(
     booking_id: int,
@@ -972,6 +912,7 @@ async def complete_booking(
     booking.status = BookingStatus.COMPLETED.value
     if notes:
         booking.notes = notes
+    await apply_booking_status_change(db, booking, BookingStatus.CONFIRMED.value)
     await db.commit()
 
     return {"message": "课程已完成"}
@@ -1003,6 +944,7 @@ async def mark_no_show(
         raise HTTPException(status_code=400, detail="只能标记已确认的预约为缺席")
 
     booking.status = BookingStatus.NO_SHOW.value
+    await apply_booking_status_change(db, booking, BookingStatus.CONFIRMED.value)
     await db.commit()
 
     return {"message": "已标记为缺席"}
@@ -3,20 +3,15 @@
 from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import case, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.models.booking import (
-    Booking,
-    BookingStatus,
-    StudentMembership,
-    Transaction,
-    TransactionType,
-)
+from app.models.booking import Booking, BookingStatus, StudentMembership
 from app.models.user import Coach, Student
+from app.services.dashboard_metrics import DashboardMetricsService, dashboard_snapshot_cache
 
 router = APIRouter()
 
@@ -31,9 +26,16 @@ async def get_dashboard_overview(
         raise HTTPException(status_code=403, detail="Admin only")
 
     today = date.today()
+    return await dashboard_snapshot_cache.get_or_load(
+        ("overview", today), lambda: _load_overview(db, today)
+    )
+
+
+async def _load_overview(db: AsyncSession, today: date) -> dict:
     this_month_start = today.replace(day=1)
     last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
 
+    # Point-in-time counts; range totals come from the indexed metrics queries.
     stats_query = select(
         select(func.count()).select_from(Student).scalar_subquery().label("student_count"),
         select(func.count())
@@ -42,63 +44,38 @@ async def get_dashboard_overview(
         .label("new_student_count"),
         select(func.count()).where(Coach.status == "active").scalar_subquery().label("coach_count"),
         select(func.count())
-        .where(Booking.booking_date == today)
-        .scalar_subquery()
-        .label("today_booking_count"),
-        select(func.count())
         .where(Booking.status == BookingStatus.PENDING.value)
         .scalar_subquery()
         .label("pending_count"),
         select(func.count())
-        .where(
-            Booking.status == BookingStatus.COMPLETED.value,
-            Booking.booking_date >= this_month_start,
-        )
-        .scalar_subquery()
-        .label("completed_count"),
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(
-            Transaction.type == TransactionType.PURCHASE.value,
-            Transaction.created_at >= this_month_start,
-        )
-        .scalar_subquery()
-        .label("income"),
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(
-            Transaction.type == TransactionType.PURCHASE.value,
-            Transaction.created_at >= last_month_start,
-            Transaction.created_at < this_month_start,
-        )
-        .scalar_subquery()
-        .label("last_income"),
-        select(func.count())
         .where(StudentMembership.status == "active")
         .scalar_subquery()
         .label("active_membership_count"),
     )
     stats = (await db.execute(stats_query)).one()
 
-    student_count = stats.student_count or 0
-    new_student_count = stats.new_student_count or 0
-    coach_count = stats.coach_count or 0
-    today_booking_count = stats.today_booking_count or 0
-    pending_count = stats.pending_count or 0
-    completed_count = stats.completed_count or 0
-    income = stats.income or 0
-    last_income = stats.last_income or 0
-    active_membership_count = stats.active_membership_count or 0
+    metrics = DashboardMetricsService(db)
+    daily = await metrics.get_daily(this_month_start, max(today, this_month_start))
+    this_month_key = this_month_start.strftime("%Y-%m")
+    last_month_key = last_month_start.strftime("%Y-%m")
+    monthly = await metrics.get_monthly([this_month_key, last_month_key])
+
+    today_booking_count = daily[today].bookings if today in daily else 0
+    completed_count = sum(row.completed_bookings for row in daily.values())
+    income = monthly[this_month_key].revenue if this_month_key in monthly else 0
+    last_income = monthly[last_month_key].revenue if last_month_key in monthly else 0
 
     return {
         "students": {
-            "total": student_count,
-            "new_this_month": new_student_count,
+            "total": stats.student_count or 0,
+            "new_this_month": stats.new_student_count or 0,
         },
         "coaches": {
-            "total": coach_count,
+            "total": stats.coach_count or 0,
         },
         "bookings": {
             "today": today_booking_count,
-            "pending": pending_count,
+            "pending": stats.pending_count or 0,
             "completed_this_month": completed_count,
         },
         "revenue": {
@@ -111,7 +88,7 @@ async def get_dashboard_overview(
             ),
         },
         "memberships": {
-            "active": active_membership_count,
+            "active": stats.active_membership_count or 0,
         },
     }
 
@@ -160,32 +137,27 @@ async def get_booking_stats(
         raise HTTPException(status_code=403, detail="Admin only")
 
     today = date.today()
-    start_date = today - timedelta(days=days - 1)
-
-    result = await db.execute(
-        select(
-            Booking.booking_date,
-            func.count().label("total"),
-            func.sum(case((Booking.status == BookingStatus.COMPLETED.value, 1), else_=0)).label(
-                "completed"
-            ),
-        )
-        .where(Booking.booking_date.between(start_date, today))
-        .group_by(Booking.booking_date)
+    return await dashboard_snapshot_cache.get_or_load(
+        ("booking-stats", today, days), lambda: _load_booking_stats(db, today, days)
     )
 
-    stats_dict = {
-        row.booking_date: {"total": row.total, "completed": row.completed or 0} for row in result
-    }
 
-    return [
-        {
-            "date": (start_date + timedelta(days=i)).isoformat(),
-            "total": stats_dict.get(start_date + timedelta(days=i), {}).get("total", 0),
-            "completed": stats_dict.get(start_date + timedelta(days=i), {}).get("completed", 0),
-        }
-        for i in range(days)
-    ]
+async def _load_booking_stats(db: AsyncSession, today: date, days: int) -> list:
+    start_date = today - timedelta(days=days - 1)
+    daily = await DashboardMetricsService(db).get_daily(start_date, today)
+
+    result = []
+    for i in range(days):
+        day = start_date + timedelta(days=i)
+        row = daily.get(day)
+        result.append(
+            {
+                "date": day.isoformat(),
+                "total": row.bookings if row else 0,
+                "completed": row.completed_bookings if row else 0,
+            }
+        )
+    return result
 
 
 @router.get("/revenue-stats")
@@ -209,37 +181,20 @@ async def get_revenue_stats(
     if not month_dates:
         return []
 
-    last_month = month_dates[-1]
-    if last_month.month == 12:
-        range_end = last_month.replace(year=last_month.year + 1, month=1)
-    else:
-        range_end = last_month.replace(month=last_month.month + 1)
-
-    year_expr = func.extract("year", Transaction.created_at)
-    month_expr = func.extract("month", Transaction.created_at)
-    revenue_result = await db.execute(
-        select(
-            year_expr.label("year"),
-            month_expr.label("month"),
-            func.sum(Transaction.amount).label("revenue"),
-        )
-        .where(
-            Transaction.type == TransactionType.PURCHASE.value,
-            Transaction.created_at >= month_dates[0],
-            Transaction.created_at < range_end,
-        )
-        .group_by(year_expr, month_expr)
+    return await dashboard_snapshot_cache.get_or_load(
+        ("revenue-stats", today, months), lambda: _load_revenue_stats(db, month_dates)
     )
 
-    revenue_map = {
-        (int(year), int(month)): float(revenue or 0)
-        for year, month, revenue in revenue_result.all()
-    }
+
+async def _load_revenue_stats(db: AsyncSession, month_dates: list) -> list:
+    keys = [month_date.strftime("%Y-%m") for month_date in month_dates]
+    monthly = await DashboardMetricsService(db).get_monthly(keys)
 
     return [
         {
-            "month": month_date.strftime("%Y-%m"),
-            "revenue": revenue_map.get((month_date.year, month_date.month), 0.0),
+            "month": key,
+            "revenue": float(monthly[key].revenue) if key in monthly else 0.0,
+            "new_memberships": monthly[key].new_memberships if key in monthly else 0,
         }
-        for month_date in month_dates
+        for key in keys
     ]
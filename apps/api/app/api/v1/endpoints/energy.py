@@ -9,17 +9,21 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_current_user, get_db
-from app.models import EnergyRule, Student
+from app.models import Student
 from app.models.energy import ENERGY_LEVELS
 from app.schemas.energy import (
     EnergyAccountResponse,
     EnergyAccountSummary,
+    EnergyBatchEarnItem,
+    EnergyBatchEarnRequest,
+    EnergyBatchEarnResponse,
     EnergyEarnRequest,
     EnergyEarnResponse,
     EnergyRuleResponse,
     EnergyTransactionList,
     EnergyTransactionResponse,
 )
+from app.services.energy_rules import energy_rule_registry
 from app.services.energy_service import EnergyService
 
 router = APIRouter()
@@ -94,10 +98,7 @@ async def get_energy_rules(
     db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)
 ):
     """获取积分规则列表"""
-    result = await db.execute(
-        select(EnergyRule).where(EnergyRule.is_active.is_(True)).order_by(EnergyRule.sort_order)
-    )
-    rules = result.scalars().all()
+    rules = await energy_rule_registry.list_active(db)
     return [EnergyRuleResponse.model_validate(r) for r in rules]
 
 
@@ -130,6 +131,37 @@ async def earn_energy(
     return EnergyEarnResponse(success=success, amount=amount, balance=balance, message=message)
 
 
+@router.post("/earn/batch", response_model=EnergyBatchEarnResponse)
+async def earn_energy_batch(
+    request: EnergyBatchEarnRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    批量获取能量积分（如整班签到）
+
+    按学员返回发放结果，已达上限的学员不影响其他学员
+    """
+    if current_user.get("role") not in ["admin", "coach"]:
+        raise HTTPException(status_code=403, detail="无权限执行此操作")
+
+    outcomes = await EnergyService.earn_batch(
+        db,
+        request.rule_code,
+        request.student_ids,
+        request.reference_type,
+        request.reference_id,
+        request.description,
+    )
+
+    await db.commit()
+
+    items = [EnergyBatchEarnItem(**outcome) for outcome in outcomes]
+    return EnergyBatchEarnResponse(
+        items=items, success_count=sum(1 for item in items if item.success)
+    )
+
+
 @router.get("/levels")
 async def get_energy_levels():
     """获取能量等级配置"""
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import get_current_user, get_db
 from app.models import Coach, FitnessMetric, FitnessTest, ParentStudentRelation, Student
 from app.schemas import FitnessTestCreate, FitnessTestResponse
+from app.services.fitness_progress import FitnessProgressService
 
 router = APIRouter()
 
@@ -90,7 +91,10 @@ async def create_fitness_test(
         db.add(metric)
 
     await db.flush()
-    await db.refresh(test)
+    await FitnessProgressService(db).on_test_created(test.student_id)
+    await db.commit()
+    # 异步会话不能延迟加载关系，序列化前显式加载指标
+    await db.refresh(test, ["metrics"])
 
     return FitnessTestResponse.model_validate(test)
 
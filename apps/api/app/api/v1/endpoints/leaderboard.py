@@ -2,23 +2,23 @@
 排行榜 API
 """
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import get_current_user, get_db
 from app.models import Student
-from app.models.energy import (
-    ENERGY_LEVELS,
-    EnergyAccount,
-    EnergyTransaction,
-    EnergyTransactionType,
-)
-from app.models.growth import FitnessTest, TrainingSession
+from app.models.energy import ENERGY_LEVELS, EnergyAccount
 from app.schemas.energy import LeaderboardEntry, LeaderboardResponse
+from app.services.fitness_progress import FitnessProgressService
+from app.services.leaderboard_index import (
+    LEADERBOARD_PERIODS,
+    leaderboard_index,
+    training_leaderboard_index,
+)
 
 router = APIRouter()
 
@@ -27,96 +27,64 @@ router = APIRouter()
 async def get_energy_leaderboard(
     period: str = Query("week", description="时间范围: week/month/all"),
     limit: int = Query(50, ge=1, le=100),
+    around: int = Query(0, ge=0, le=20, description="同时返回我前后各 N 名"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """获取能量排行榜"""
+    """获取能量排行榜（读取进程内排行索引）"""
     now = datetime.now(timezone.utc)
+    if period not in LEADERBOARD_PERIODS:
+        period = "all"
 
-    if period == "week":
-        start_time = now - timedelta(days=now.weekday())
-        start_time = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == "month":
-        start_time = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    else:
-        start_time = None
-
-    # 查询排行榜
-    if start_time:
-        # 按时间段统计
-        query = (
-            select(EnergyTransaction.student_id, func.sum(EnergyTransaction.amount).label("total"))
-            .where(
-                and_(
-                    EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                    EnergyTransaction.created_at >= start_time,
-                )
-            )
-            .group_by(EnergyTransaction.student_id)
-            .order_by(desc("total"))
-            .limit(limit)
-        )
-    else:
-        # 全部时间按累计获取排序
-        query = (
-            select(EnergyAccount.student_id, EnergyAccount.total_earned.label("total"))
-            .order_by(desc(EnergyAccount.total_earned))
-            .limit(limit)
-        )
+    board = await leaderboard_index.get(db, period)
+    top = board.top(limit)
 
-    result = await db.execute(query)
-    rows = result.all()
+    # 获取当前用户排名
+    my_rank = None
+    my_value = None
+    window: list[tuple[int, int, int]] = []
+    student_id = await _get_student_id(db, current_user)
+    if student_id:
+        my_rank = board.rank_of(student_id)
+        my_value = board.value_of(student_id)
+        if around:
+            window = board.around(student_id, around)
 
     # 批量获取学员信息和能量账户（避免 N+1 查询）
-    student_ids = [student_id for student_id, _ in rows]
+    student_ids = list({student_id for _, student_id, _ in top + window})
 
-    # 一次性获取所有学员
-    students_result = await db.execute(select(Student).where(Student.id.in_(student_ids)))
-    students_map = {s.id: s for s in students_result.scalars().all()}
-
-    # 一次性获取所有能量账户
-    accounts_result = await db.execute(
-        select(EnergyAccount).where(EnergyAccount.student_id.in_(student_ids))
-    )
-    accounts_map = {a.student_id: a for a in accounts_result.scalars().all()}
+    students_map = {}
+    accounts_map = {}
+    if student_ids:
+        students_result = await db.execute(select(Student).where(Student.id.in_(student_ids)))
+        students_map = {s.id: s for s in students_result.scalars().all()}
+        accounts_result = await db.execute(
+            select(EnergyAccount).where(EnergyAccount.student_id.in_(student_ids))
+        )
+        accounts_map = {a.student_id: a for a in accounts_result.scalars().all()}
 
-    # 构建排行榜条目
-    entries = []
-    for rank, (student_id, total) in enumerate(rows, 1):
-        student = students_map.get(student_id)
-        account = accounts_map.get(student_id)
+    def build_entry(rank: int, entry_student_id: int, value: int) -> LeaderboardEntry:
+        student = students_map.get(entry_student_id)
+        account = accounts_map.get(entry_student_id)
         level = account.level if account else 1
         level_info = ENERGY_LEVELS.get(level, ENERGY_LEVELS[1])
-
-        entries.append(
-            LeaderboardEntry(
-                rank=rank,
-                student_id=student_id,
-                student_name=student.name if student else "未知",
-                avatar=None,
-                value=int(total or 0),
-                level=level,
-                level_icon=level_info["icon"],
-            )
+        return LeaderboardEntry(
+            rank=rank,
+            student_id=entry_student_id,
+            student_name=student.name if student else "未知",
+            avatar=None,
+            value=value,
+            level=level,
+            level_icon=level_info["icon"],
         )
 
-    # 获取当前用户排名
-    my_rank = None
-    my_value = None
-    student_id = await _get_student_id(db, current_user)
-    if student_id:
-        for entry in entries:
-            if entry.student_id == student_id:
-                my_rank = entry.rank
-                my_value = entry.value
-                break
-
     return LeaderboardResponse(
         type="energy",
         period=period,
-        items=entries,
+        items=[build_entry(*row) for row in top],
         my_rank=my_rank,
         my_value=my_value,
+        around_me=[build_entry(*row) for row in window],
         updated_at=now,
     )
 
@@ -125,69 +93,52 @@ async def get_energy_leaderboard(
 async def get_training_leaderboard(
     period: str = Query("week", description="时间范围: week/month/all"),
     limit: int = Query(50, ge=1, le=100),
+    around: int = Query(0, ge=0, le=20, description="同时返回我前后各 N 名"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """获取训练排行榜（按训练次数）"""
+    """获取训练排行榜（按训练次数，读取进程内排行索引）"""
     now = datetime.now(timezone.utc)
+    if period not in LEADERBOARD_PERIODS:
+        period = "all"
 
-    if period == "week":
-        start_time = now - timedelta(days=now.weekday())
-        start_time = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == "month":
-        start_time = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    else:
-        start_time = datetime(2020, 1, 1)
-
-    # 查询训练次数排行
-    query = (
-        select(TrainingSession.student_id, func.count(TrainingSession.id).label("total"))
-        .where(TrainingSession.session_date >= start_time.date())
-        .group_by(TrainingSession.student_id)
-        .order_by(desc("total"))
-        .limit(limit)
-    )
+    board = await training_leaderboard_index.get(db, period)
+    top = board.top(limit)
 
-    result = await db.execute(query)
-    rows = result.all()
+    # 获取当前用户排名
+    my_rank = None
+    my_value = None
+    window: list[tuple[int, int, int]] = []
+    student_id = await _get_student_id(db, current_user)
+    if student_id:
+        my_rank = board.rank_of(student_id)
+        my_value = board.value_of(student_id)
+        if around:
+            window = board.around(student_id, around)
 
-    student_ids = [student_id for student_id, _ in rows]
+    student_ids = list({student_id for _, student_id, _ in top + window})
     students_map = {}
     if student_ids:
         students_result = await db.execute(select(Student).where(Student.id.in_(student_ids)))
         students_map = {student.id: student for student in students_result.scalars().all()}
 
-    entries = []
-    for rank, (student_id, total) in enumerate(rows, 1):
-        student = students_map.get(student_id)
-
-        entries.append(
-            LeaderboardEntry(
-                rank=rank,
-                student_id=student_id,
-                student_name=student.name if student else "未知",
-                avatar=None,
-                value=int(total or 0),
-            )
+    def build_entry(rank: int, entry_student_id: int, value: int) -> LeaderboardEntry:
+        student = students_map.get(entry_student_id)
+        return LeaderboardEntry(
+            rank=rank,
+            student_id=entry_student_id,
+            student_name=student.name if student else "未知",
+            avatar=None,
+            value=value,
         )
 
-    # 获取当前用户排名
-    my_rank = None
-    my_value = None
-    student_id = await _get_student_id(db, current_user)
-    if student_id:
-        for entry in entries:
-            if entry.student_id == student_id:
-                my_rank = entry.rank
-                my_value = entry.value
-                break
-
     return LeaderboardResponse(
         type="training",
         period=period,
-        items=entries,
+        items=[build_entry(*row) for row in top],
         my_rank=my_rank,
         my_value=my_value,
+        around_me=[build_entry(*row) for row in window],
         updated_at=now,
     )
 
@@ -199,42 +150,43 @@ async def get_fitness_leaderboard(
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """获取体测进步榜"""
+    """获取体测进步榜（最近两次体测的指标进步幅度）"""
     now = datetime.now(timezone.utc)
+    progress = FitnessProgressService(db)
+    top = await progress.top(metric, limit)
 
-    # 这里简化处理，实际应该计算进步幅度
-    # 暂时按最新体测成绩排序
-    query = (
-        select(FitnessTest.student_id, func.max(FitnessTest.id).label("latest_id"))
-        .group_by(FitnessTest.student_id)
-        .limit(limit)
-    )
-
-    result = await db.execute(query)
-    rows = result.all()
+    my_rank = None
+    my_value = None
+    student_id = await _get_student_id(db, current_user)
+    if student_id:
+        my_rank, my_value = await progress.rank_of(metric, student_id)
 
-    student_ids = [student_id for student_id, _ in rows]
+    student_ids = [student_id for _, student_id, _ in top]
     students_map = {}
     if student_ids:
         students_result = await db.execute(select(Student).where(Student.id.in_(student_ids)))
         students_map = {student.id: student for student in students_result.scalars().all()}
 
     entries = []
-    for rank, (student_id, _) in enumerate(rows, 1):
-        student = students_map.get(student_id)
-
+    for rank, entry_student_id, improvement in top:
+        student = students_map.get(entry_student_id)
         entries.append(
             LeaderboardEntry(
                 rank=rank,
-                student_id=student_id,
+                student_id=entry_student_id,
                 student_name=student.name if student else "未知",
                 avatar=None,
-                value=0,  # 实际应该是进步分数
+                value=improvement,
             )
         )
 
     return LeaderboardResponse(
-        type="fitness", period="all", items=entries, my_rank=None, my_value=None, updated_at=now
+        type="fitness",
+        period="all",
+        items=entries,
+        my_rank=my_rank,
+        my_value=my_value,
+        updated_at=now,
     )
 
 
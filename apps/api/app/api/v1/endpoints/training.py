@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import get_current_user, get_db
 from app.models import Coach, ParentStudentRelation, Student, TrainingSession
 from app.schemas import TrainingSessionCreate, TrainingSessionResponse
+from app.services.training_stats import TrainingStatsService
 
 router = APIRouter()
 
@@ -165,6 +166,8 @@ async def complete_training(
     )
     db.add(session)
     await db.flush()
+    await TrainingStatsService(db).on_session_completed(session)
+    await db.commit()
     await db.refresh(session)
 
     return TrainingSessionResponse.model_validate(session)
@@ -1,5 +1,7 @@
 from app.core.config import settings
-from app.core.database import AsyncSessionLocal, Base, engine, get_db
+from app.core.database import AsyncSessionLocal, Base, dialect_insert, engine, get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.periods import period_buckets, utc_now_naive
 from app.core.security import (
     create_access_token,
     decode_token,
@@ -14,9 +16,14 @@ __all__ = [
     "get_db",
     "engine",
     "AsyncSessionLocal",
+    "dialect_insert",
     "verify_password",
     "get_password_hash",
     "create_access_token",
     "decode_token",
     "get_current_user",
+    "encode_cursor",
+    "decode_cursor",
+    "period_buckets",
+    "utc_now_naive",
 ]
@@ -68,6 +68,43 @@ class Settings(BaseSettings):
     # Business rules
     COACH_DEFAULT_COMMISSION_RATE: float = 0.7  # 70%
     BOOKING_CANCEL_HOURS_BEFORE: int = 2
+    # 预约冲突控制：lock=锁定教练/学员行后查询冲突；constraint=由数据库不重叠约束兜底
+    BOOKING_CONFLICT_MODE: str = "lock"
+
+    # 运营看板快照缓存有效期（秒），0 表示不缓存
+    DASHBOARD_SNAPSHOT_TTL_SECONDS: int = 30
+
+    # 能量规则进程内缓存的版本轮询间隔（秒），0 表示每次读取都检查版本
+    ENERGY_RULE_CACHE_POLL_SECONDS: int = 30
+    # 能量账户写入：cas=按版本号更新并有限重试；
+    # serialized=SELECT ... FOR UPDATE 锁定账户行直到提交（跨 worker 生效）+ 条件原子 UPDATE
+    ENERGY_ACCOUNT_UPDATE_MODE: str = "cas"
+    # 能量排行榜进程内索引按汇总表重建的间隔（秒），本进程的获取在提交后即时计入
+    LEADERBOARD_INDEX_TTL_SECONDS: int = 60
+    # 能量交易记录热数据保留月数（含当月，至少 2），更早的月份由归档任务迁入归档表
+    ENERGY_LEDGER_HOT_MONTHS: int = 6
+    ENERGY_LEDGER_ARCHIVE_BATCH_SIZE: int = 1000
+    # 能量过期：获取满 N 个月仍未消费的能量过期，0 表示不过期
+    ENERGY_EXPIRY_MONTHS: int = 0
+    ENERGY_EXPIRY_BATCH_SIZE: int = 500
+
+    # 聊天推送跨 worker 分发：memory=进程内（单 worker）；postgres=PostgreSQL LISTEN/NOTIFY
+    CHAT_BROKER_BACKEND: str = "memory"
+    CHAT_BROKER_CHANNEL: str = "chat_events"
+    # 聊天 WebSocket：每个连接的发送队列长度与单次发送超时（超出即踢下线），心跳超时，单用户连接数
+    CHAT_WS_SEND_QUEUE_SIZE: int = 100
+    CHAT_WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    CHAT_WS_PING_TIMEOUT_SECONDS: float = 75.0
+    CHAT_WS_MAX_CONNECTIONS_PER_USER: int = 5
+    # 经 WebSocket 发送的消息由写入协程攒批落库：满 N 条或等待 M 毫秒即提交一次
+    CHAT_WS_WRITE_BATCH_SIZE: int = 100
+    CHAT_WS_WRITE_FLUSH_MS: int = 5
+
+    # 预约/课时卡生命周期扫描：已确认预约在下课后超过宽限期自动完成，过期课时卡置为过期
+    LIFECYCLE_SCHEDULER_ENABLED: bool = False  # 是否在 API 进程内启动定时扫描
+    LIFECYCLE_SWEEP_INTERVAL_SECONDS: int = 300
+    LIFECYCLE_SWEEP_BATCH_SIZE: int = 500
+    BOOKING_AUTO_COMPLETE_GRACE_HOURS: int = 24  # 宽限期内教练仍可手动标记缺席
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
@@ -2,6 +2,7 @@
 数据库连接模块
 """
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -26,6 +27,11 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def dialect_insert(db: AsyncSession):
+    """PostgreSQL 与 SQLite 的 INSERT ... ON CONFLICT 语法一致，按当前方言选择构造器"""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
 class Base(DeclarativeBase):
     """声明式基类"""
 
@@ -0,0 +1,35 @@
+"""
+游标分页工具
+
+游标是排序键取值的不透明编码（URL 安全 base64 的 JSON 数组），客户端原样回传即可，
+服务端据此生成 keyset 条件，翻页开销与页码深度无关。
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, Sequence
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键取值编码为游标"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """解码游标，返回长度为 size 的原始取值列表（日期时间仍为字符串）"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return values
@@ -0,0 +1,21 @@
+"""
+统计周期
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+
+
+def utc_now_naive() -> datetime:
+    """当前 UTC 时间（无时区，与库中 DateTime 列一致）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def period_buckets(now: datetime) -> Dict[str, date]:
+    """当前日、周（周一）、月周期桶的起始日"""
+    today = now.date()
+    return {
+        "day": today,
+        "week": today - timedelta(days=today.weekday()),
+        "month": today.replace(day=1),
+    }
@@ -9,9 +9,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.api.v1.endpoints.chat import manager as chat_manager
 from app.api.v1.router import api_router
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.services.booking_lifecycle import LifecycleScheduler
+from app.services.energy_rules import energy_rule_registry
 
 # 确保上传目录存在
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
@@ -29,8 +32,19 @@ async def lifespan(app: FastAPI):
     # 启动时创建数据库表
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # 预热能量规则注册表
+    async with AsyncSessionLocal() as session:
+        await energy_rule_registry.refresh(session)
+    # 预约/课时卡生命周期扫描（多实例部署时建议改用独立 worker：python -m scripts.lifecycle_worker）
+    scheduler = None
+    if settings.LIFECYCLE_SCHEDULER_ENABLED:
+        scheduler = LifecycleScheduler(AsyncSessionLocal)
+        scheduler.start()
     yield
     # 关闭时清理资源
+    if scheduler is not None:
+        await scheduler.stop()
+    await chat_manager.stop()
     await engine.dispose()
 
 
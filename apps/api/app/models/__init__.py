@@ -8,6 +8,10 @@ from app.models.booking import (
     CardType,
     CoachAvailableSlot,
     CoachFeedback,
+    CoachIncomeEntry,
+    CoachIncomeMonthly,
+    CoachSlotOccupancy,
+    CoachStats,
     MembershipCard,
     MembershipStatus,
     Review,
@@ -15,24 +19,39 @@ from app.models.booking import (
     Transaction,
     TransactionType,
 )
+from app.models.cache import CacheVersion
 from app.models.chat import (
     Conversation,
+    ConversationReadState,
     ConversationType,
     Message,
-    MessageReadStatus,
     MessageStatus,
     MessageType,
 )
 from app.models.course import Attendance, Course, CourseCategory, CourseType, Schedule, Venue
+from app.models.dashboard import DashboardMonthlyStats
 from app.models.energy import (
     ENERGY_LEVELS,
     EnergyAccount,
+    EnergyArchiveCount,
+    EnergyDailyStats,
     EnergyRule,
+    EnergyRuleCounter,
     EnergySourceType,
     EnergyTransaction,
+    EnergyTransactionArchive,
     EnergyTransactionType,
 )
-from app.models.growth import FitnessMetric, FitnessTest, MetricType, TrainingSession
+from app.models.growth import (
+    FitnessImprovement,
+    FitnessMetric,
+    FitnessTest,
+    MetricType,
+    TrainingDailyStats,
+    TrainingSession,
+    TrainingStats,
+)
+from app.models.job import JobCheckpoint
 from app.models.merchant import (
     Merchant,
     MerchantStatus,
@@ -87,34 +106,51 @@ __all__ = [
     # 成长档案域
     "FitnessTest",
     "FitnessMetric",
+    "FitnessImprovement",
     "TrainingSession",
+    "TrainingDailyStats",
+    "TrainingStats",
     "MetricType",
     # 约课系统域
     "MembershipCard",
     "StudentMembership",
     "CoachAvailableSlot",
+    "CoachSlotOccupancy",
     "Booking",
     "Transaction",
     "Review",
     "CoachFeedback",
+    "CoachStats",
+    "CoachIncomeEntry",
+    "CoachIncomeMonthly",
     "CardType",
     "MembershipStatus",
     "BookingStatus",
     "TransactionType",
+    # 运营看板域
+    "DashboardMonthlyStats",
+    # 缓存版本
+    "CacheVersion",
+    # 后台任务
+    "JobCheckpoint",
     # 通知域
     "Notification",
     "NotificationType",
     # 聊天域
     "Conversation",
     "Message",
-    "MessageReadStatus",
     "ConversationType",
     "MessageType",
     "MessageStatus",
+    "ConversationReadState",
     # 能量系统域
     "EnergyRule",
+    "EnergyRuleCounter",
+    "EnergyDailyStats",
     "EnergyAccount",
     "EnergyTransaction",
+    "EnergyTransactionArchive",
+    "EnergyArchiveCount",
     "EnergyTransactionType",
     "EnergySourceType",
     "ENERGY_LEVELS",
@@ -7,15 +7,19 @@ from enum import Enum
 from typing import TYPE_CHECKING, List, Optional
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
     Time,
+    UniqueConstraint,
+    event,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -94,6 +98,9 @@ class StudentMembership(Base):
     """学员课时账户表"""
 
     __tablename__ = "student_memberships"
+    __table_args__ = (
+        Index("ix_student_memberships_status_expire", "status", "expire_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"))
@@ -140,10 +147,37 @@ class CoachAvailableSlot(Base):
     coach: Mapped["Coach"] = relationship("Coach", back_populates="available_slots")
 
 
+class CoachSlotOccupancy(Base):
+    """教练时段占用计数表（按 时段+日期 记录已占名额，用于小班课容量控制）"""
+
+    __tablename__ = "coach_slot_occupancy"
+    __table_args__ = (
+        UniqueConstraint("slot_id", "slot_date", name="uq_coach_slot_occupancy_slot_date"),
+        Index("ix_coach_slot_occupancy_coach_date", "coach_id", "slot_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    coach_id: Mapped[int] = mapped_column(Integer, ForeignKey("coaches.id"))
+    slot_id: Mapped[int] = mapped_column(Integer, ForeignKey("coach_available_slots.id"))
+    slot_date: Mapped[date] = mapped_column(Date)
+    booked_count: Mapped[int] = mapped_column(Integer, default=0)  # 已占名额
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
 class Booking(Base):
     """预约记录表"""
 
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_student_date_start", "student_id", "booking_date", "start_time", "id"),
+        Index("ix_bookings_coach_date_start", "coach_id", "booking_date", "start_time", "id"),
+        Index("ix_bookings_status_date", "status", "booking_date", "id"),
+        Index("ix_bookings_date_status", "booking_date", "status"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"))
@@ -151,6 +185,9 @@ class Booking(Base):
     schedule_id: Mapped[Optional[int]] = mapped_column(
         Integer, ForeignKey("schedules.id")
     )  # 关联排课
+    slot_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("coach_available_slots.id")
+    )  # 占用名额的小班时段
     booking_date: Mapped[date] = mapped_column(Date)
     start_time: Mapped[time] = mapped_column(Time)
     end_time: Mapped[time] = mapped_column(Time)
@@ -190,10 +227,91 @@ class Booking(Base):
     )
 
 
+# ==================== 预约时段不重叠约束 ====================
+# 有效预约（pending/confirmed）由数据库强制保证：
+# - 教练：时间重叠的预约必须属于同一小班时段（同一 slot_id）。私教预约（slot_id 为空）
+#   不与该教练任何其他预约重叠，小班预约之间的容量由 coach_slot_occupancy 计数控制；
+# - 学员：同一学员的预约不允许时间重叠（跨教练）。
+
+BOOKING_COACH_OVERLAP_CONSTRAINT = "ex_bookings_coach_no_overlap"
+BOOKING_STUDENT_OVERLAP_CONSTRAINT = "ex_bookings_student_no_overlap"
+
+_ACTIVE_BOOKING_STATUSES_SQL = "('pending', 'confirmed')"
+_BOOKING_RANGE_SQL = "tsrange(booking_date + start_time, booking_date + end_time, '[)')"
+
+# PostgreSQL：btree_gist 排他约束；私教预约以 -id 作为时段键，与任何其他预约都不相等
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE bookings ADD CONSTRAINT {BOOKING_COACH_OVERLAP_CONSTRAINT} "
+        f"EXCLUDE USING gist (coach_id WITH =, {_BOOKING_RANGE_SQL} WITH &&, "
+        "(COALESCE(slot_id, -id)) WITH <>) "
+        f"WHERE (status IN {_ACTIVE_BOOKING_STATUSES_SQL})"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE bookings ADD CONSTRAINT {BOOKING_STUDENT_OVERLAP_CONSTRAINT} "
+        f"EXCLUDE USING gist (student_id WITH =, {_BOOKING_RANGE_SQL} WITH &&) "
+        f"WHERE (status IN {_ACTIVE_BOOKING_STATUSES_SQL})"
+    ).execute_if(dialect="postgresql"),
+)
+
+# SQLite（测试环境）：等价的 BEFORE INSERT/UPDATE 触发器
+def _sqlite_overlap_trigger(constraint: str, match: str, on_update: bool) -> DDL:
+    event_sql = (
+        "UPDATE OF coach_id, student_id, slot_id, booking_date, start_time, end_time, status"
+        if on_update
+        else "INSERT"
+    )
+    return DDL(
+        f"CREATE TRIGGER IF NOT EXISTS trg_{constraint}_{'update' if on_update else 'insert'} "
+        f"BEFORE {event_sql} ON bookings "
+        f"WHEN NEW.status IN {_ACTIVE_BOOKING_STATUSES_SQL} "
+        f"BEGIN SELECT RAISE(ABORT, '{constraint}') WHERE EXISTS ("
+        f"SELECT 1 FROM bookings b WHERE {match} AND b.booking_date = NEW.booking_date "
+        f"AND b.status IN {_ACTIVE_BOOKING_STATUSES_SQL} "
+        "AND b.start_time < NEW.end_time AND b.end_time > NEW.start_time"
+        f"{' AND b.id != NEW.id' if on_update else ''}); END"
+    ).execute_if(dialect="sqlite")
+
+
+_SQLITE_OVERLAP_MATCHES = {
+    BOOKING_COACH_OVERLAP_CONSTRAINT: (
+        "b.coach_id = NEW.coach_id "
+        "AND (NEW.slot_id IS NULL OR b.slot_id IS NULL OR b.slot_id != NEW.slot_id)"
+    ),
+    BOOKING_STUDENT_OVERLAP_CONSTRAINT: "b.student_id = NEW.student_id",
+}
+for constraint, match in _SQLITE_OVERLAP_MATCHES.items():
+    for on_update in (False, True):
+        event.listen(
+            Booking.__table__,
+            "after_create",
+            _sqlite_overlap_trigger(constraint, match, on_update),
+        )
+
+
+def is_booking_overlap_violation(
+    exc: Exception, constraint: str = BOOKING_COACH_OVERLAP_CONSTRAINT
+) -> bool:
+    """判断数据库异常是否由指定的预约时段不重叠约束（默认教练约束）触发"""
+    return constraint in str(getattr(exc, "orig", exc))
+
+
 class Transaction(Base):
     """消费记录表"""
 
     __tablename__ = "transactions"
+    __table_args__ = (Index("ix_transactions_type_created", "type", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"))
@@ -264,6 +382,73 @@ class CoachFeedback(Base):
     coach: Mapped["Coach"] = relationship("Coach", back_populates="feedbacks")
 
 
+class CoachStats(Base):
+    """教练统计读模型（由预约状态变更、评价事件增量维护，可重建）"""
+
+    __tablename__ = "coach_stats"
+
+    coach_id: Mapped[int] = mapped_column(Integer, ForeignKey("coaches.id"), primary_key=True)
+    total_students: Mapped[int] = mapped_column(Integer, default=0)  # 已完成课程的去重学员数
+    total_lessons: Mapped[int] = mapped_column(Integer, default=0)  # 已完成课程数
+    no_show_count: Mapped[int] = mapped_column(Integer, default=0)  # 缺席数
+    cancelled_count: Mapped[int] = mapped_column(Integer, default=0)  # 取消数
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)  # 评分总和
+    review_count: Mapped[int] = mapped_column(Integer, default=0)  # 评价数
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    @property
+    def avg_rating(self) -> float:
+        """平均评分"""
+        if not self.review_count:
+            return 0.0
+        return self.rating_sum / self.review_count
+
+
+class CoachIncomeEntry(Base):
+    """教练收入流水（预约完成时写入，记录当时生效的课时费与提成比例）"""
+
+    __tablename__ = "coach_income_entries"
+    __table_args__ = (
+        Index("ix_coach_income_entries_coach_month", "coach_id", "income_month", "booking_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    coach_id: Mapped[int] = mapped_column(Integer, ForeignKey("coaches.id"))
+    booking_id: Mapped[int] = mapped_column(Integer, ForeignKey("bookings.id"), unique=True)
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"))
+    booking_date: Mapped[date] = mapped_column(Date)  # 上课日期
+    income_month: Mapped[str] = mapped_column(String(7))  # 归属月份 YYYY-MM
+    hourly_rate: Mapped[float] = mapped_column(Numeric(10, 2))  # 完成时的课时费
+    commission_rate: Mapped[float] = mapped_column(Numeric(5, 2))  # 完成时的提成比例
+    amount: Mapped[float] = mapped_column(Numeric(10, 2))  # 收入金额
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+    booking: Mapped["Booking"] = relationship("Booking")
+    student: Mapped["Student"] = relationship("Student")
+
+
+class CoachIncomeMonthly(Base):
+    """教练月度收入汇总（随收入流水增量维护，可重建）"""
+
+    __tablename__ = "coach_income_monthly"
+
+    coach_id: Mapped[int] = mapped_column(Integer, ForeignKey("coaches.id"), primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)  # YYYY-MM
+    lessons: Mapped[int] = mapped_column(Integer, default=0)  # 已完成课程数
+    income: Mapped[float] = mapped_column(Numeric(12, 2), default=0)  # 收入合计
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
 # 需要在 user.py 和 course.py 中添加反向关系
 # 这里通过字符串引用来避免循环导入
 if TYPE_CHECKING:
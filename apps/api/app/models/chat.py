@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -70,6 +70,10 @@ class Message(Base):
     """消息表"""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+        Index("uq_messages_sender_client_msg", "sender_id", "client_msg_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     conversation_id: Mapped[int] = mapped_column(
@@ -82,6 +86,8 @@ class Message(Base):
         Integer, ForeignKey("messages.id"), nullable=True
     )
     status: Mapped[str] = mapped_column(String(20), default=MessageStatus.SENT.value)
+    # 客户端生成的幂等ID（WebSocket 发送），同一发送者内唯一，重发时返回已写入的消息
+    client_msg_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
@@ -93,16 +99,21 @@ class Message(Base):
     reply_to: Mapped[Optional["Message"]] = relationship("Message", remote_side=[id])
 
 
-class MessageReadStatus(Base):
-    """消息已读状态表"""
+class ConversationReadState(Base):
+    """会话参与者读取状态
 
-    __tablename__ = "message_read_status"
+    last_read_message_id 为已读水位（该ID及之前对方发来的消息均视为已读），unread_count 随
+    对方发送消息递增、在标记已读时按水位之后的对方消息数重置，未读角标与已读回执均为单行读写。
+    """
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    message_id: Mapped[int] = mapped_column(Integer, ForeignKey("messages.id"), index=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
-    read_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    __tablename__ = "conversation_read_states"
 
-    # 关系
-    message: Mapped["Message"] = relationship("Message")
-    user: Mapped["User"] = relationship("User")
+    conversation_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("conversations.id"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_read_message_id: Mapped[int] = mapped_column(Integer, default=0)
+    unread_count: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,24 @@
+"""
+运营看板汇总数据模型
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class DashboardMonthlyStats(Base):
+    """看板月汇总（由课时账户写入路径增量维护，可重建）"""
+
+    __tablename__ = "dashboard_monthly_stats"
+
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)  # YYYY-MM
+    new_memberships: Mapped[int] = mapped_column(Integer, default=0)  # 新开课时账户数
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -2,11 +2,11 @@
 能量支票系统数据模型
 """
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -129,6 +129,68 @@ class EnergyTransaction(Base):
     rule: Mapped[Optional["EnergyRule"]] = relationship("EnergyRule")
 
 
+class EnergyTransactionArchive(Base):
+    """能量交易记录归档表（超出热数据窗口的月份由归档任务从交易记录表迁入，保留原ID）"""
+
+    __tablename__ = "energy_transactions_archive"
+    __table_args__ = (
+        Index("ix_energy_transactions_archive_student_created", "student_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    account_id: Mapped[int] = mapped_column(Integer)
+    student_id: Mapped[int] = mapped_column(Integer)
+    type: Mapped[str] = mapped_column(String(20))
+    source_type: Mapped[Optional[str]] = mapped_column(String(30))
+    amount: Mapped[int] = mapped_column(Integer)
+    balance_after: Mapped[int] = mapped_column(Integer)
+    rule_id: Mapped[Optional[int]] = mapped_column(Integer)
+    reference_type: Mapped[Optional[str]] = mapped_column(String(50))
+    reference_id: Mapped[Optional[int]] = mapped_column(Integer)
+    description: Mapped[Optional[str]] = mapped_column(String(200))
+    operator_id: Mapped[Optional[int]] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class EnergyArchiveCount(Base):
+    """学员归档交易记录数（按类型，归档时累加），分页总数无需统计归档表"""
+
+    __tablename__ = "energy_archive_counts"
+
+    student_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class EnergyRuleCounter(Base):
+    """能量规则周期计数（按学员、规则、周期桶累计获取量，与获取记录同事务更新）"""
+
+    __tablename__ = "energy_rule_counters"
+    __table_args__ = (
+        Index("ix_energy_rule_counters_student_period", "student_id", "period", "bucket_start"),
+    )
+
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), primary_key=True)
+    rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("energy_rules.id"), primary_key=True)
+    period: Mapped[str] = mapped_column(String(10), primary_key=True)  # day/week/month
+    bucket_start: Mapped[date] = mapped_column(Date, primary_key=True)  # 周期起始日
+    amount: Mapped[int] = mapped_column(Integer, default=0)  # 周期内累计获取
+
+
+class EnergyDailyStats(Base):
+    """学员能量日汇总（按 UTC 日期，与交易记录同事务更新，可按流水重建）"""
+
+    __tablename__ = "energy_daily_stats"
+    __table_args__ = (Index("ix_energy_daily_stats_date", "stat_date"),)
+
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), primary_key=True)
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    earned: Mapped[int] = mapped_column(Integer, default=0)  # 当日获取
+    spent: Mapped[int] = mapped_column(Integer, default=0)  # 当日消费
+    refunded: Mapped[int] = mapped_column(Integer, default=0)  # 当日退还
+    expired: Mapped[int] = mapped_column(Integer, default=0)  # 当日过期
+
+
 # 能量等级配置
 ENERGY_LEVELS = {
     1: {"name": "新手", "min_points": 0, "icon": "🌱"},
@@ -6,7 +6,7 @@ from datetime import date, datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -29,6 +29,7 @@ class FitnessTest(Base):
     """体测记录表"""
 
     __tablename__ = "fitness_tests"
+    __table_args__ = (Index("ix_fitness_tests_student_date", "student_id", "test_date", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"))
@@ -51,6 +52,7 @@ class FitnessMetric(Base):
     """体测指标表"""
 
     __tablename__ = "fitness_metrics"
+    __table_args__ = (Index("ix_fitness_metrics_test", "test_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     test_id: Mapped[int] = mapped_column(Integer, ForeignKey("fitness_tests.id"))
@@ -67,6 +69,31 @@ class FitnessMetric(Base):
     test: Mapped["FitnessTest"] = relationship("FitnessTest", back_populates="metrics")
 
 
+class FitnessImprovement(Base):
+    """学员体测进步（最近两次体测同一指标的差值，每次新增体测时重算）
+
+    两次均有得分时按得分计算（得分越高越好，与指标方向无关），否则按原始值计算，
+    计时类等越小越好的指标取反，进步幅度始终越大越好。
+    """
+
+    __tablename__ = "fitness_improvements"
+    __table_args__ = (
+        Index("ix_fitness_improvements_rank", "metric_name", "improvement", "student_id"),
+    )
+
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), primary_key=True)
+    metric_name: Mapped[str] = mapped_column(String(50), primary_key=True)  # 具体指标名称
+    metric_type: Mapped[str] = mapped_column(String(20))  # 五维类型
+    previous_test_id: Mapped[int] = mapped_column(Integer, ForeignKey("fitness_tests.id"))
+    latest_test_id: Mapped[int] = mapped_column(Integer, ForeignKey("fitness_tests.id"))
+    previous_value: Mapped[float] = mapped_column(Numeric(10, 2))  # 上次原始值
+    latest_value: Mapped[float] = mapped_column(Numeric(10, 2))  # 本次原始值
+    improvement: Mapped[float] = mapped_column(Numeric(10, 2))  # 进步幅度
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
 class TrainingSession(Base):
     """AI训练记录表"""
 
@@ -86,3 +113,23 @@ class TrainingSession(Base):
 
     # 关系
     student: Mapped["Student"] = relationship("Student", back_populates="training_sessions")
+
+
+class TrainingDailyStats(Base):
+    """学员训练日计数（按 UTC 日期，与训练记录同事务更新，可按训练记录重建）"""
+
+    __tablename__ = "training_daily_stats"
+    __table_args__ = (Index("ix_training_daily_stats_date", "stat_date"),)
+
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), primary_key=True)
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, default=0)  # 当日训练次数
+
+
+class TrainingStats(Base):
+    """学员训练累计计数（与训练记录同事务更新，可按训练记录重建）"""
+
+    __tablename__ = "training_stats"
+
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("students.id"), primary_key=True)
+    total_sessions: Mapped[int] = mapped_column(Integer, default=0)  # 累计训练次数
@@ -0,0 +1,26 @@
+"""
+后台任务数据模型
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class JobCheckpoint(Base):
+    """分批后台任务的进度检查点（与每批写入同事务提交，中断后从 last_id 之后继续）"""
+
+    __tablename__ = "job_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)  # 任务名，如 energy_expiry
+    run_key: Mapped[str] = mapped_column(String(50))  # 本轮标识，如过期截止日
+    last_id: Mapped[int] = mapped_column(Integer, default=0)  # 已处理的最大主键
+    completed: Mapped[bool] = mapped_column(Boolean, default=False)  # 本轮是否已完成
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -17,7 +17,12 @@ from app.schemas.booking import (
     BookingListResponse,
     BookingRescheduleRequest,
     BookingResponse,
+    BookingSeriesCreate,
+    BookingSeriesResponse,
+    BookingSeriesSkipped,
     BookingUpdate,
+    CoachAvailabilitySearchItem,
+    CoachAvailabilitySearchResponse,
     CoachAvailableSlotsResponse,
     CoachAvailableTimeSlot,
     CoachDetailResponse,
@@ -75,6 +80,9 @@ from app.schemas.course import (
 from app.schemas.energy import (
     EnergyAccountResponse,
     EnergyAccountSummary,
+    EnergyBatchEarnItem,
+    EnergyBatchEarnRequest,
+    EnergyBatchEarnResponse,
     EnergyEarnRequest,
     EnergyEarnResponse,
     EnergyRuleBase,
@@ -244,6 +252,9 @@ __all__ = [
     "BookingCreate",
     "BookingUpdate",
     "BookingResponse",
+    "BookingSeriesCreate",
+    "BookingSeriesResponse",
+    "BookingSeriesSkipped",
     "BookingListResponse",
     "BookingCancelRequest",
     "BookingRescheduleRequest",
@@ -260,6 +271,8 @@ __all__ = [
     "CoachDetailResponse",
     "CoachAvailableTimeSlot",
     "CoachAvailableSlotsResponse",
+    "CoachAvailabilitySearchItem",
+    "CoachAvailabilitySearchResponse",
     "DashboardOverview",
     "AttendanceStats",
     "RevenueStats",
@@ -296,6 +309,9 @@ __all__ = [
     "EnergyTransactionList",
     "EnergyEarnRequest",
     "EnergyEarnResponse",
+    "EnergyBatchEarnRequest",
+    "EnergyBatchEarnItem",
+    "EnergyBatchEarnResponse",
     "EnergySpendRequest",
     "EnergySpendResponse",
     "LeaderboardEntry",
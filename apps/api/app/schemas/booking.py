@@ -175,6 +175,30 @@ class BookingRescheduleRequest(BaseModel):
     new_end_time: time
 
 
+class BookingSeriesCreate(BaseModel):
+    """创建周期预约（按周重复）"""
+
+    coach_id: int
+    student_id: Optional[int] = None  # 如果不传，使用当前用户关联的学员
+    start_date: date
+    end_date: Optional[date] = Field(None, description="结束日期（含），与 occurrences 至少填一个")
+    occurrences: Optional[int] = Field(None, ge=1, le=52, description="预约次数上限")
+    weekdays: Optional[List[int]] = Field(None, description="每周上课日，0=周日；默认取开始日期")
+    interval_weeks: int = Field(1, ge=1, le=4, description="间隔周数")
+    start_time: time
+    end_time: time
+    course_type: str = "private"
+    remark: Optional[str] = None
+    all_or_nothing: bool = Field(True, description="任一时段不可约时整体失败；否则跳过该时段")
+
+
+class BookingSeriesSkipped(BaseModel):
+    """周期预约中未创建的时段"""
+
+    booking_date: date
+    reason: str
+
+
 class BookingResponse(BaseModel):
     """预约响应"""
 
@@ -203,9 +227,17 @@ class BookingListResponse(BaseModel):
     """预约列表响应"""
 
     items: List[BookingResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # 游标分页默认不统计总数
+    page: Optional[int] = None  # 游标分页时为空
     page_size: int
+    next_cursor: Optional[str] = None  # 游标分页的下一页游标，为空表示没有更多
+
+
+class BookingSeriesResponse(BaseModel):
+    """周期预约结果"""
+
+    created: List[BookingResponse]
+    skipped: List[BookingSeriesSkipped]
 
 
 # ==================== 消费记录相关 ====================
@@ -364,6 +396,25 @@ class CoachAvailableSlotsResponse(BaseModel):
     slots: List[CoachAvailableTimeSlot]
 
 
+class CoachAvailabilitySearchItem(BaseModel):
+    """空闲教练及其可约时间"""
+
+    coach_id: int
+    coach_name: str
+    avatar: Optional[str] = None
+    specialty: Optional[List[str]] = None
+    hourly_rate: Optional[float] = None
+    slots: List[CoachAvailableTimeSlot]
+
+
+class CoachAvailabilitySearchResponse(BaseModel):
+    """多教练空闲查询响应"""
+
+    start_date: date
+    end_date: date
+    items: List[CoachAvailabilitySearchItem]
+
+
 # ==================== 数据看板相关 ====================
 
 
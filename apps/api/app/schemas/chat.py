@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class UserBrief(BaseModel):
@@ -32,6 +32,13 @@ class MessageCreate(MessageBase):
     reply_to_id: Optional[int] = None
 
 
+class WsMessageSend(MessageCreate):
+    """WebSocket 发送消息帧 {"type": "send", "data": {...}}"""
+
+    conversation_id: int
+    client_msg_id: str = Field(..., min_length=1, max_length=64, description="客户端幂等ID")
+
+
 class MessageResponse(MessageBase):
     """消息响应"""
 
@@ -51,7 +58,7 @@ class MessageListResponse(BaseModel):
     """消息列表响应"""
 
     items: List[MessageResponse]
-    total: int
+    total: Optional[int] = None  # 仅 with_total=true 时统计
     has_more: bool
 
 
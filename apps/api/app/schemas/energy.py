@@ -3,9 +3,9 @@
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 # ============ 能量规则 ============
 
@@ -135,6 +135,33 @@ class EnergyEarnResponse(BaseModel):
     message: str = ""
 
 
+class EnergyBatchEarnRequest(BaseModel):
+    """批量发放能量请求（如整班签到）"""
+
+    rule_code: str
+    student_ids: List[int] = Field(..., min_length=1, max_length=200)
+    reference_type: Optional[str] = None
+    reference_id: Optional[int] = None
+    description: Optional[str] = None
+
+
+class EnergyBatchEarnItem(BaseModel):
+    """批量发放能量的单个学员结果"""
+
+    student_id: int
+    success: bool
+    amount: int = 0
+    balance: int = 0
+    message: str = ""
+
+
+class EnergyBatchEarnResponse(BaseModel):
+    """批量发放能量响应"""
+
+    items: List[EnergyBatchEarnItem]
+    success_count: int
+
+
 # ============ 能量消费请求 ============
 
 
@@ -167,7 +194,7 @@ class LeaderboardEntry(BaseModel):
     student_id: int
     student_name: str
     avatar: Optional[str] = None
-    value: int  # 能量值/训练次数/进步分数
+    value: Union[int, float]  # 能量值/训练次数/进步幅度
     level: Optional[int] = None
     level_icon: Optional[str] = None
 
@@ -179,5 +206,6 @@ class LeaderboardResponse(BaseModel):
     period: str  # week/month/all
     items: List[LeaderboardEntry]
     my_rank: Optional[int] = None
-    my_value: Optional[int] = None
+    my_value: Optional[Union[int, float]] = None
+    around_me: List[LeaderboardEntry] = []  # 我及前后名次（请求 around 参数时返回）
     updated_at: datetime
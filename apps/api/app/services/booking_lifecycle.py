@@ -0,0 +1,213 @@
+"""
+预约与课时卡生命周期扫描
+
+- 已确认预约在下课后超过宽限期（BOOKING_AUTO_COMPLETE_GRACE_HOURS）自动置为已完成，
+  宽限期内教练仍可手动标记缺席；
+- 到期的有效课时卡置为过期，并从学员剩余课时中扣除卡内余量。
+
+按 (状态, 日期, id) 索引做 keyset 分批，每批一次集合 UPDATE 并单独提交，锁持有时间
+与批大小相关而与积压量无关。完成预约后在同一事务内按本批增量同步看板汇总、教练统计与
+收入流水（收入按当前费率记账，即完成时生效的费率），不重算教练的历史数据。
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, TypedDict
+
+from sqlalchemy import and_, case, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus, MembershipStatus, StudentMembership
+from app.models.user import Student
+from app.services.coach_income import CoachIncomeService
+from app.services.coach_stats import CoachStatsService
+
+logger = logging.getLogger(__name__)
+
+
+class SweepReport(TypedDict):
+    """单类扫描的运行指标"""
+
+    batches: int  # 执行的批次数
+    updated: int  # 状态被更新的行数
+    elapsed_ms: float  # 耗时（毫秒）
+
+
+class BookingLifecycleService:
+    """预约与课时卡生命周期扫描服务"""
+
+    def __init__(self, db: AsyncSession, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.LIFECYCLE_SWEEP_BATCH_SIZE
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, SweepReport]:
+        """执行一轮完整扫描"""
+        now = now or datetime.now()
+        reports = {
+            "bookings": await self.complete_past_bookings(now),
+            "memberships": await self.expire_memberships(now.date()),
+        }
+        logger.info("lifecycle sweep finished: %s", reports)
+        return reports
+
+    async def complete_past_bookings(self, now: Optional[datetime] = None) -> SweepReport:
+        """将下课超过宽限期的已确认预约置为已完成"""
+        now = now or datetime.now()
+        cutoff = now - timedelta(hours=settings.BOOKING_AUTO_COMPLETE_GRACE_HOURS)
+        past = or_(
+            Booking.booking_date < cutoff.date(),
+            and_(Booking.booking_date == cutoff.date(), Booking.end_time <= cutoff.time()),
+        )
+        started = perf_counter()
+        batches = updated = 0
+        last_key = None
+
+        while True:
+            query = select(Booking.booking_date, Booking.id).where(
+                Booking.status == BookingStatus.CONFIRMED.value,
+                Booking.booking_date <= cutoff.date(),
+                past,
+            )
+            if last_key is not None:
+                query = query.where(tuple_(Booking.booking_date, Booking.id) > tuple_(*last_key))
+            rows = (
+                await self.db.execute(
+                    query.order_by(Booking.booking_date, Booking.id).limit(self.batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            last_key = tuple(rows[-1])
+            batches += 1
+
+            # 状态条件防止覆盖扫描期间被手动处理的预约
+            result = await self.db.execute(
+                update(Booking)
+                .where(
+                    Booking.id.in_([booking_id for _, booking_id in rows]),
+                    Booking.status == BookingStatus.CONFIRMED.value,
+                )
+                .values(
+                    status=BookingStatus.COMPLETED.value,
+                    updated_at=datetime.now(timezone.utc),
+                )
+                .returning(
+                    Booking.id, Booking.coach_id, Booking.student_id, Booking.booking_date
+                )
+                .execution_options(synchronize_session=False)
+            )
+            completed = result.all()
+            updated += len(completed)
+            if completed:
+                await CoachStatsService(self.db).on_bookings_completed(completed)
+                await CoachIncomeService(self.db).record_many(completed)
+            await self.db.commit()
+
+        return _report(batches, updated, started)
+
+    async def expire_memberships(self, today: Optional[date] = None) -> SweepReport:
+        """将过期的有效课时卡置为过期，并扣减学员剩余课时"""
+        today = today or date.today()
+        started = perf_counter()
+        batches = updated = 0
+        last_key = None
+
+        while True:
+            query = select(StudentMembership.expire_date, StudentMembership.id).where(
+                StudentMembership.status == MembershipStatus.ACTIVE.value,
+                StudentMembership.expire_date < today,
+            )
+            if last_key is not None:
+                query = query.where(
+                    tuple_(StudentMembership.expire_date, StudentMembership.id)
+                    > tuple_(*last_key)
+                )
+            rows = (
+                await self.db.execute(
+                    query.order_by(StudentMembership.expire_date, StudentMembership.id).limit(
+                        self.batch_size
+                    )
+                )
+            ).all()
+            if not rows:
+                break
+            last_key = tuple(rows[-1])
+            batches += 1
+
+            result = await self.db.execute(
+                update(StudentMembership)
+                .where(
+                    StudentMembership.id.in_([membership_id for _, membership_id in rows]),
+                    StudentMembership.status == MembershipStatus.ACTIVE.value,
+                )
+                .values(status=MembershipStatus.EXPIRED.value)
+                .returning(StudentMembership.student_id, StudentMembership.remaining_times)
+                .execution_options(synchronize_session=False)
+            )
+            expired = result.all()
+            updated += len(expired)
+
+            forfeited: Counter = Counter()
+            for student_id, remaining_times in expired:
+                forfeited[student_id] += remaining_times or 0
+            await self._forfeit_remaining_lessons(forfeited)
+            await self.db.commit()
+
+        return _report(batches, updated, started)
+
+    async def _forfeit_remaining_lessons(self, forfeited: Counter) -> None:
+        """从学员剩余课时中扣除过期卡的余量"""
+        for student_id, times in forfeited.items():
+            if not times:
+                continue
+            remaining = Student.remaining_lessons
+            await self.db.execute(
+                update(Student)
+                .where(Student.id == student_id)
+                .values(remaining_lessons=case((remaining > times, remaining - times), else_=0))
+                .execution_options(synchronize_session=False)
+            )
+
+
+def _report(batches: int, updated: int, started: float) -> SweepReport:
+    return SweepReport(
+        batches=batches,
+        updated=updated,
+        elapsed_ms=round((perf_counter() - started) * 1000, 1),
+    )
+
+
+class LifecycleScheduler:
+    """API 进程内的定时扫描（LIFECYCLE_SCHEDULER_ENABLED 开启时随应用启动）"""
+
+    def __init__(self, session_factory: Callable[[], Any], interval_seconds: Optional[int] = None):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds or settings.LIFECYCLE_SWEEP_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    await BookingLifecycleService(session).run_once()
+            except Exception:
+                logger.exception("lifecycle sweep failed")
+            await asyncio.sleep(self.interval_seconds)
@@ -2,24 +2,31 @@
 约课系统服务层
 """
 
+from contextlib import asynccontextmanager
 from datetime import date, datetime, time, timedelta, timezone
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, delete, func, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.booking import (
+    BOOKING_STUDENT_OVERLAP_CONSTRAINT,
     Booking,
     BookingStatus,
     CoachAvailableSlot,
     CoachFeedback,
+    CoachSlotOccupancy,
     MembershipCard,
     MembershipStatus,
     Review,
     StudentMembership,
     Transaction,
     TransactionType,
+    is_booking_overlap_violation,
 )
 from app.models.course import Schedule
 from app.models.user import Coach, Student
@@ -27,6 +34,7 @@ from app.schemas.booking import (
     BookingCancelRequest,
     BookingCreate,
     BookingRescheduleRequest,
+    BookingSeriesCreate,
     CoachAvailableTimeSlot,
     CoachFeedbackCreate,
     CoachSlotCreate,
@@ -36,6 +44,22 @@ from app.schemas.booking import (
     MembershipRechargeRequest,
     ReviewCreate,
 )
+from app.services.coach_availability import (
+    CoachAvailabilityIndex,
+    expand_weekly_dates,
+    to_sunday_first_weekday,
+)
+from app.services.coach_income import CoachIncomeService
+from app.services.coach_stats import CoachStatsService
+from app.services.dashboard_metrics import DashboardMetricsService
+
+MAX_SERIES_OCCURRENCES = 52
+
+
+async def apply_booking_status_change(db: AsyncSession, booking: Booking, old_status: str) -> None:
+    """预约状态变更后同步各读模型（教练统计、收入流水）"""
+    await CoachStatsService(db).on_booking_status_change(booking, old_status)
+    await CoachIncomeService(db).on_booking_status_change(booking, old_status)
 
 
 class BookingService:
@@ -96,18 +120,156 @@ class BookingService:
         result = await self.db.execute(query)
         return result.scalar() is not None
 
+    # ==================== 小班时段名额 ====================
+
+    async def find_group_slot(
+        self, coach_id: int, booking_date: date, start_time: time, end_time: time
+    ) -> Optional[CoachAvailableSlot]:
+        """查找完整覆盖该时间段的小班时段（max_students > 1）"""
+        result = await self.db.execute(
+            select(CoachAvailableSlot)
+            .where(
+                CoachAvailableSlot.coach_id == coach_id,
+                CoachAvailableSlot.day_of_week == to_sunday_first_weekday(booking_date),
+                CoachAvailableSlot.is_active.is_(True),
+                CoachAvailableSlot.max_students > 1,
+                CoachAvailableSlot.start_time <= start_time,
+                CoachAvailableSlot.end_time >= end_time,
+            )
+            .order_by(CoachAvailableSlot.start_time)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def _ensure_slot_occupancy(self, slot: CoachAvailableSlot, slot_date: date) -> None:
+        """确保计数行存在；首次创建时以占用该时段的有效预约数作为初值
+
+        早于名额计数上线、尚未记录 slot_id 的小班预约先归属到该时段，
+        使初值与取消/改期时按 slot_id 释放名额的口径一致。
+        """
+        existing = await self.db.execute(
+            select(CoachSlotOccupancy.id).where(
+                CoachSlotOccupancy.slot_id == slot.id,
+                CoachSlotOccupancy.slot_date == slot_date,
+            )
+        )
+        if existing.scalar_one_or_none() is not None:
+            return
+
+        active_statuses = [BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value]
+        await self.db.execute(
+            update(Booking)
+            .where(
+                Booking.coach_id == slot.coach_id,
+                Booking.booking_date == slot_date,
+                Booking.slot_id.is_(None),
+                Booking.status.in_(active_statuses),
+                Booking.start_time >= slot.start_time,
+                Booking.end_time <= slot.end_time,
+            )
+            .values(slot_id=slot.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        booked = await self.db.execute(
+            select(func.count(Booking.id)).where(
+                Booking.slot_id == slot.id,
+                Booking.booking_date == slot_date,
+                Booking.status.in_(active_statuses),
+            )
+        )
+        try:
+            async with self.db.begin_nested():
+                self.db.add(
+                    CoachSlotOccupancy(
+                        coach_id=slot.coach_id,
+                        slot_id=slot.id,
+                        slot_date=slot_date,
+                        booked_count=booked.scalar() or 0,
+                    )
+                )
+        except IntegrityError:
+            # 并发请求已创建计数行
+            pass
+
+    async def claim_slot_seat(self, slot: CoachAvailableSlot, slot_date: date) -> bool:
+        """占用一个名额，名额已满时返回 False
+
+        计数比较与自增在同一条条件 UPDATE 中完成，无需扫描预约行。
+        """
+        await self._ensure_slot_occupancy(slot, slot_date)
+        result = await self.db.execute(
+            update(CoachSlotOccupancy)
+            .where(
+                CoachSlotOccupancy.slot_id == slot.id,
+                CoachSlotOccupancy.slot_date == slot_date,
+                CoachSlotOccupancy.booked_count < slot.max_students,
+            )
+            .values(booked_count=CoachSlotOccupancy.booked_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def release_slot_seat(self, slot_id: int, slot_date: date) -> None:
+        """释放一个名额"""
+        await self.db.execute(
+            update(CoachSlotOccupancy)
+            .where(
+                CoachSlotOccupancy.slot_id == slot_id,
+                CoachSlotOccupancy.slot_date == slot_date,
+                CoachSlotOccupancy.booked_count > 0,
+            )
+            .values(booked_count=CoachSlotOccupancy.booked_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_slot_occupancy(
+        self, slot_ids: List[int], start_date: date, end_date: date
+    ) -> dict[Tuple[int, date], int]:
+        """批量获取时段在日期范围内的已占名额"""
+        if not slot_ids:
+            return {}
+        result = await self.db.execute(
+            select(
+                CoachSlotOccupancy.slot_id,
+                CoachSlotOccupancy.slot_date,
+                CoachSlotOccupancy.booked_count,
+            ).where(
+                CoachSlotOccupancy.slot_id.in_(slot_ids),
+                CoachSlotOccupancy.slot_date >= start_date,
+                CoachSlotOccupancy.slot_date <= end_date,
+            )
+        )
+        return {(slot_id, slot_date): count for slot_id, slot_date, count in result.all()}
+
     # ==================== 预约管理 ====================
 
     async def create_booking(
         self, data: BookingCreate, student_id: int, auto_deduct: bool = True
     ) -> Booking:
-        """创建预约"""
-        await self.db.execute(select(Coach.id).where(Coach.id == data.coach_id).with_for_update())
-        await self.db.execute(select(Student.id).where(Student.id == student_id).with_for_update())
+        """创建预约
+
+        lock 模式下先锁定教练、学员行再查询冲突；constraint 模式不加行锁，
+        教练（含与小班预约的重叠）与学员时段冲突由数据库不重叠约束在写入时拒绝。
+        """
+        constraint_mode = self._uses_overlap_constraint()
+        if not constraint_mode:
+            await self.db.execute(
+                select(Coach.id).where(Coach.id == data.coach_id).with_for_update()
+            )
+            await self.db.execute(
+                select(Student.id).where(Student.id == student_id).with_for_update()
+            )
 
-        # 检查教练时段冲突
-        if await self.check_booking_conflict(
+        # 小班时段按名额计数，其余时段检查教练时段冲突
+        group_slot = await self.find_group_slot(
             data.coach_id, data.booking_date, data.start_time, data.end_time
+        )
+        if (
+            group_slot is None
+            and not constraint_mode
+            and await self.check_booking_conflict(
+                data.coach_id, data.booking_date, data.start_time, data.end_time
+            )
         ):
             raise ValueError("该时段教练已被预约")
 
@@ -124,11 +286,17 @@ class BookingService:
         if membership.remaining_times <= 0:
             raise ValueError("课时余额不足")
 
+        if group_slot is not None and not await self.claim_slot_seat(
+            group_slot, data.booking_date
+        ):
+            raise ValueError("该时段名额已满")
+
         # 创建预约
         booking = Booking(
             student_id=student_id,
             coach_id=data.coach_id,
             schedule_id=data.schedule_id,
+            slot_id=group_slot.id if group_slot else None,
             booking_date=data.booking_date,
             start_time=data.start_time,
             end_time=data.end_time,
@@ -137,8 +305,8 @@ class BookingService:
             membership_id=membership.id,
             remark=data.remark,
         )
-        self.db.add(booking)
-        await self.db.flush()
+        async with self._checking_overlap("该时段教练已被预约", "该时段您已有其他预约"):
+            self.db.add(booking)
 
         # 自动扣除课时
         if auto_deduct:
@@ -148,6 +316,215 @@ class BookingService:
         await self.db.refresh(booking)
         return booking
 
+    async def create_booking_series(
+        self, data: BookingSeriesCreate, student_id: int
+    ) -> Tuple[List[Booking], List[Tuple[date, str]]]:
+        """按每周重复规则批量创建预约
+
+        教练、学员冲突各用一次日期范围查询加载后在内存中判定；课时按卡批量扣除，
+        预约与消费记录各一次批量写入。all_or_nothing 为真时任一时段不可约即整体失败，
+        否则跳过不可约时段并返回 (日期, 原因) 列表。
+        """
+        dates = expand_weekly_dates(
+            data.start_date, data.end_date, data.occurrences, data.weekdays, data.interval_weeks
+        )
+        if not dates:
+            raise ValueError("周期规则未生成任何预约日期")
+        if len(dates) > MAX_SERIES_OCCURRENCES:
+            raise ValueError(f"单次最多预约{MAX_SERIES_OCCURRENCES}节课")
+
+        if not self._uses_overlap_constraint():
+            await self.db.execute(
+                select(Coach.id).where(Coach.id == data.coach_id).with_for_update()
+            )
+            await self.db.execute(
+                select(Student.id).where(Student.id == student_id).with_for_update()
+            )
+
+        first_date, last_date = dates[0], dates[-1]
+        active_statuses = [BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value]
+
+        # 教练、学员在整个日期范围内的有效预约各查询一次
+        coach_rows = await self.db.execute(
+            select(Booking.coach_id, Booking.booking_date, Booking.start_time, Booking.end_time)
+            .where(
+                Booking.coach_id == data.coach_id,
+                Booking.booking_date >= first_date,
+                Booking.booking_date <= last_date,
+                Booking.status.in_(active_statuses),
+            )
+        )
+        coach_index = CoachAvailabilityIndex.build(coach_rows.all())
+        student_rows = await self.db.execute(
+            select(Booking.student_id, Booking.booking_date, Booking.start_time, Booking.end_time)
+            .where(
+                Booking.student_id == student_id,
+                Booking.booking_date >= first_date,
+                Booking.booking_date <= last_date,
+                Booking.status.in_(active_statuses),
+            )
+        )
+        student_index = CoachAvailabilityIndex.build(student_rows.all())
+
+        # 覆盖该时间的小班时段（按星期）及其名额计数
+        slot_result = await self.db.execute(
+            select(CoachAvailableSlot).where(
+                CoachAvailableSlot.coach_id == data.coach_id,
+                CoachAvailableSlot.is_active.is_(True),
+                CoachAvailableSlot.max_students > 1,
+                CoachAvailableSlot.start_time <= data.start_time,
+                CoachAvailableSlot.end_time >= data.end_time,
+            )
+            .order_by(CoachAvailableSlot.start_time)
+        )
+        group_slots: dict[int, CoachAvailableSlot] = {}
+        for slot in slot_result.scalars().all():
+            group_slots.setdefault(slot.day_of_week, slot)
+        occupancy = await self.get_slot_occupancy(
+            [slot.id for slot in group_slots.values()], first_date, last_date
+        )
+
+        accepted: List[Tuple[date, Optional[CoachAvailableSlot]]] = []
+        skipped: List[Tuple[date, str]] = []
+        for day in dates:
+            group_slot = group_slots.get(to_sunday_first_weekday(day))
+            if not student_index.is_free(student_id, day, data.start_time, data.end_time):
+                skipped.append((day, "该时段您已有其他预约"))
+            elif group_slot is not None:
+                booked = occupancy.get((group_slot.id, day))
+                if booked is None:
+                    booked = coach_index.count_overlaps(
+                        data.coach_id, day, group_slot.start_time, group_slot.end_time
+                    )
+                if booked >= group_slot.max_students:
+                    skipped.append((day, "该时段名额已满"))
+                else:
+                    accepted.append((day, group_slot))
+            elif not coach_index.is_free(data.coach_id, day, data.start_time, data.end_time):
+                skipped.append((day, "该时段教练已被预约"))
+            else:
+                accepted.append((day, None))
+
+        if skipped and data.all_or_nothing:
+            day, reason = skipped[0]
+            raise ValueError(f"{day.isoformat()} {reason}")
+
+        # 按到期先后在多张课时卡之间分配课时
+        membership_result = await self.db.execute(
+            select(StudentMembership)
+            .where(
+                StudentMembership.student_id == student_id,
+                StudentMembership.status == MembershipStatus.ACTIVE.value,
+                StudentMembership.remaining_times > 0,
+                or_(
+                    StudentMembership.expire_date.is_(None),
+                    StudentMembership.expire_date >= date.today(),
+                ),
+            )
+            .order_by(StudentMembership.expire_date.asc().nullslast(), StudentMembership.id)
+            .with_for_update()
+        )
+        memberships = list(membership_result.scalars().all())
+        if not memberships:
+            raise ValueError("您没有可用的课时卡")
+
+        allocations: List[Tuple[date, Optional[CoachAvailableSlot], StudentMembership]] = []
+        card_iter = iter(memberships)
+        card = next(card_iter)
+        balance = card.remaining_times
+        for day, group_slot in accepted:
+            while card is not None and balance <= 0:
+                card = next(card_iter, None)
+                balance = card.remaining_times if card is not None else 0
+            if card is None:
+                if data.all_or_nothing:
+                    raise ValueError("课时余额不足")
+                skipped.append((day, "课时余额不足"))
+                continue
+            allocations.append((day, group_slot, card))
+            balance -= 1
+
+        # 小班名额逐个原子占用（并发下可能刚被占满）
+        seated: List[Tuple[date, Optional[CoachAvailableSlot], StudentMembership]] = []
+        for day, group_slot, card in allocations:
+            if group_slot is not None and not await self.claim_slot_seat(group_slot, day):
+                if data.all_or_nothing:
+                    raise ValueError(f"{day.isoformat()} 该时段名额已满")
+                skipped.append((day, "该时段名额已满"))
+                continue
+            seated.append((day, group_slot, card))
+
+        bookings = [
+            Booking(
+                student_id=student_id,
+                coach_id=data.coach_id,
+                slot_id=group_slot.id if group_slot else None,
+                booking_date=day,
+                start_time=data.start_time,
+                end_time=data.end_time,
+                course_type=data.course_type,
+                status=BookingStatus.CONFIRMED.value,
+                membership_id=card.id,
+                remark=data.remark,
+            )
+            for day, group_slot, card in seated
+        ]
+        if not bookings:
+            await self.db.rollback()
+            return [], sorted(skipped)
+
+        async with self._checking_overlap("该时段教练已被预约", "该时段您已有其他预约"):
+            self.db.add_all(bookings)
+
+        self.db.add_all(
+            [
+                Transaction(
+                    student_id=student_id,
+                    type=TransactionType.CONSUME.value,
+                    times_change=-1,
+                    membership_id=booking.membership_id,
+                    booking_id=booking.id,
+                    description="周期预约扣费",
+                )
+                for booking in bookings
+            ]
+        )
+        for card in memberships:
+            used = sum(1 for booking in bookings if booking.membership_id == card.id)
+            if used:
+                card.remaining_times -= used
+                if card.remaining_times <= 0:
+                    card.status = MembershipStatus.EXHAUSTED.value
+
+        student = await self.db.get(Student, student_id)
+        if student:
+            student.remaining_lessons = max(0, student.remaining_lessons - len(bookings))
+
+        await self.db.commit()
+        return bookings, sorted(skipped)
+
+    @staticmethod
+    def _uses_overlap_constraint() -> bool:
+        return settings.BOOKING_CONFLICT_MODE == "constraint"
+
+    @asynccontextmanager
+    async def _checking_overlap(
+        self, coach_message: str, student_message: str
+    ) -> AsyncIterator[None]:
+        """在 SAVEPOINT 内写入预约，将时段不重叠约束冲突转换为业务错误
+
+        冲突时只回滚本次写入，不影响会话中此前的变更。
+        """
+        try:
+            async with self.db.begin_nested():
+                yield
+        except IntegrityError as exc:
+            if is_booking_overlap_violation(exc):
+                raise ValueError(coach_message) from exc
+            if is_booking_overlap_violation(exc, BOOKING_STUDENT_OVERLAP_CONSTRAINT):
+                raise ValueError(student_message) from exc
+            raise
+
     async def _get_active_membership_for_update(
         self, student_id: int
     ) -> Optional[StudentMembership]:
@@ -180,18 +557,21 @@ class BookingService:
             raise ValueError("该预约状态不可取消")
 
         # 检查取消时限
-        from app.core.config import settings
-
         booking_datetime = datetime.combine(booking.booking_date, booking.start_time)
         cancel_deadline = booking_datetime - timedelta(hours=settings.BOOKING_CANCEL_HOURS_BEFORE)
         if datetime.now() > cancel_deadline:
             raise ValueError(f"距离上课不足{settings.BOOKING_CANCEL_HOURS_BEFORE}小时，无法取消")
 
         # 更新预约状态
+        old_status = booking.status
         booking.status = BookingStatus.CANCELLED.value
         booking.cancel_reason = data.cancel_reason
         booking.cancelled_at = datetime.now(timezone.utc)
         booking.cancelled_by = user_id
+        await apply_booking_status_change(self.db, booking, old_status)
+
+        if booking.slot_id:
+            await self.release_slot_seat(booking.slot_id, booking.booking_date)
 
         # 退还课时
         if booking.membership_id:
@@ -211,12 +591,19 @@ class BookingService:
             raise ValueError("该预约状态不可改期")
 
         # 检查新时段冲突
-        if await self.check_booking_conflict(
-            booking.coach_id,
-            data.new_date,
-            data.new_start_time,
-            data.new_end_time,
-            exclude_booking_id=booking_id,
+        new_slot = await self.find_group_slot(
+            booking.coach_id, data.new_date, data.new_start_time, data.new_end_time
+        )
+        if (
+            new_slot is None
+            and not self._uses_overlap_constraint()
+            and await self.check_booking_conflict(
+                booking.coach_id,
+                data.new_date,
+                data.new_start_time,
+                data.new_end_time,
+                exclude_booking_id=booking_id,
+            )
         ):
             raise ValueError("新时段教练已被预约")
 
@@ -229,11 +616,21 @@ class BookingService:
         ):
             raise ValueError("新时段您已有其他预约")
 
+        # 同一小班时段内调整时间不变更名额，否则先占新名额再释放旧名额
+        new_slot_id = new_slot.id if new_slot else None
+        if (new_slot_id, data.new_date) != (booking.slot_id, booking.booking_date):
+            if new_slot is not None and not await self.claim_slot_seat(new_slot, data.new_date):
+                raise ValueError("新时段名额已满")
+            if booking.slot_id:
+                await self.release_slot_seat(booking.slot_id, booking.booking_date)
+
         # 更新预约时间
-        booking.booking_date = data.new_date
-        booking.start_time = data.new_start_time
-        booking.end_time = data.new_end_time
-        booking.updated_at = datetime.now(timezone.utc)
+        async with self._checking_overlap("新时段教练已被预约", "新时段您已有其他预约"):
+            booking.slot_id = new_slot_id
+            booking.booking_date = data.new_date
+            booking.start_time = data.new_start_time
+            booking.end_time = data.new_end_time
+            booking.updated_at = datetime.now(timezone.utc)
 
         await self.db.commit()
         await self.db.refresh(booking)
@@ -245,8 +642,10 @@ class BookingService:
         if not booking:
             raise ValueError("预约不存在")
 
+        old_status = booking.status
         booking.status = BookingStatus.COMPLETED.value
         booking.updated_at = datetime.now(timezone.utc)
+        await apply_booking_status_change(self.db, booking, old_status)
 
         await self.db.commit()
         await self.db.refresh(booking)
@@ -258,8 +657,10 @@ class BookingService:
         if not booking:
             raise ValueError("预约不存在")
 
+        old_status = booking.status
         booking.status = BookingStatus.NO_SHOW.value
         booking.updated_at = datetime.now(timezone.utc)
+        await apply_booking_status_change(self.db, booking, old_status)
 
         await self.db.commit()
         await self.db.refresh(booking)
@@ -278,6 +679,23 @@ class BookingService:
         )
         return result.scalar_one_or_none()
 
+    async def get_bookings_by_ids(self, booking_ids: List[int]) -> List[Booking]:
+        """批量获取预约详情（按传入顺序）"""
+        if not booking_ids:
+            return []
+        result = await self.db.execute(
+            select(Booking)
+            .options(
+                selectinload(Booking.student),
+                selectinload(Booking.coach),
+                selectinload(Booking.schedule).selectinload(Schedule.course),
+            )
+            .where(Booking.id.in_(booking_ids))
+            .execution_options(populate_existing=True)
+        )
+        by_id = {booking.id: booking for booking in result.scalars().all()}
+        return [by_id[booking_id] for booking_id in booking_ids if booking_id in by_id]
+
     async def get_student_bookings(
         self,
         student_id: int,
@@ -354,6 +772,108 @@ class BookingService:
         result = await self.db.execute(query)
         return result.scalars().all(), total
 
+    async def get_student_bookings_by_cursor(
+        self,
+        student_id: int,
+        status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        with_total: bool = False,
+    ) -> Tuple[List[Booking], Optional[str], Optional[int]]:
+        """按游标获取学员预约列表，返回 (预约, 下一页游标, 总数)"""
+        return await self._get_bookings_by_cursor(
+            Booking.student_id == student_id,
+            status,
+            start_date,
+            end_date,
+            cursor,
+            limit,
+            with_total,
+        )
+
+    async def get_coach_bookings_by_cursor(
+        self,
+        coach_id: int,
+        status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        with_total: bool = False,
+    ) -> Tuple[List[Booking], Optional[str], Optional[int]]:
+        """按游标获取教练预约列表，返回 (预约, 下一页游标, 总数)"""
+        return await self._get_bookings_by_cursor(
+            Booking.coach_id == coach_id,
+            status,
+            start_date,
+            end_date,
+            cursor,
+            limit,
+            with_total,
+        )
+
+    async def _get_bookings_by_cursor(
+        self,
+        owner_clause,
+        status: Optional[str],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        cursor: Optional[str],
+        limit: int,
+        with_total: bool,
+    ) -> Tuple[List[Booking], Optional[str], Optional[int]]:
+        """按 (booking_date, start_time, id) 倒序的 keyset 分页
+
+        多取一条判断是否还有下一页；总数仅在 with_total 为真时统计，
+        无限滚动场景无需为每页支付一次全量 count。
+        """
+        filters = [owner_clause]
+        if status:
+            filters.append(Booking.status == status)
+        if start_date:
+            filters.append(Booking.booking_date >= start_date)
+        if end_date:
+            filters.append(Booking.booking_date <= end_date)
+
+        total = None
+        if with_total:
+            total = await self.db.scalar(select(func.count(Booking.id)).where(*filters))
+
+        query = select(Booking).where(*filters)
+        if cursor:
+            last_date, last_start, last_id = decode_cursor(cursor, 3)
+            try:
+                after = (
+                    date.fromisoformat(last_date),
+                    time.fromisoformat(last_start),
+                    int(last_id),
+                )
+            except (TypeError, ValueError):
+                raise ValueError("无效的分页游标")
+            query = query.where(
+                tuple_(Booking.booking_date, Booking.start_time, Booking.id) < tuple_(*after)
+            )
+
+        query = (
+            query.options(
+                selectinload(Booking.student),
+                selectinload(Booking.coach),
+                selectinload(Booking.schedule).selectinload(Schedule.course),
+            )
+            .order_by(Booking.booking_date.desc(), Booking.start_time.desc(), Booking.id.desc())
+            .limit(limit + 1)
+        )
+        bookings = list((await self.db.execute(query)).scalars().all())
+
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            last = bookings[-1]
+            next_cursor = encode_cursor([last.booking_date, last.start_time, last.id])
+        return bookings, next_cursor, total
+
     # ==================== 课时管理 ====================
 
     async def get_active_membership(self, student_id: int) -> Optional[StudentMembership]:
@@ -485,6 +1005,7 @@ class BookingService:
             )
             self.db.add(membership)
             await self.db.flush()
+            await DashboardMetricsService(self.db).on_membership_created(membership)
 
         # 创建充值记录
         transaction = Transaction(
@@ -559,12 +1080,30 @@ class BookingService:
         return slot
 
     async def delete_coach_slot(self, slot_id: int) -> bool:
-        """删除教练可约时段"""
+        """删除教练可约时段
+
+        预约与名额计数通过外键引用时段：仍有有效预约时拒绝删除；只有历史预约时停用时段
+        （保留历史预约的引用）；没有任何预约时删除名额计数行后删除时段。
+        """
         slot = await self.db.get(CoachAvailableSlot, slot_id)
         if not slot:
             return False
 
-        await self.db.delete(slot)
+        statuses = (
+            await self.db.execute(
+                select(Booking.status).where(Booking.slot_id == slot_id).distinct()
+            )
+        ).scalars().all()
+        if {BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value} & set(statuses):
+            raise ValueError("该时段仍有未完成的预约，无法删除")
+
+        if statuses:
+            slot.is_active = False
+        else:
+            await self.db.execute(
+                delete(CoachSlotOccupancy).where(CoachSlotOccupancy.slot_id == slot_id)
+            )
+            await self.db.delete(slot)
         await self.db.commit()
         return True
 
@@ -586,48 +1125,87 @@ class BookingService:
         if not slots:
             return []
 
-        # 获取已有预约
+        # 获取已有预约（仅取区间字段，一次性构建索引）
         result = await self.db.execute(
-            select(Booking).where(
+            select(Booking.coach_id, Booking.booking_date, Booking.start_time, Booking.end_time)
+            .where(
                 Booking.coach_id == coach_id,
                 Booking.booking_date >= start_date,
                 Booking.booking_date <= end_date,
                 Booking.status.in_([BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value]),
             )
         )
-        existing_bookings = result.scalars().all()
-
-        # 生成可约时间列表
-        available_times = []
-        current_date = start_date
-        while current_date <= end_date:
-            day_of_week = current_date.weekday()
-            # Python weekday: 0=Monday, 需要转换为 0=Sunday
-            day_of_week = (day_of_week + 1) % 7
-
-            for slot in slots:
-                if slot.day_of_week == day_of_week:
-                    # 检查该时段是否已被预约
-                    is_booked = any(
-                        b.booking_date == current_date
-                        and b.start_time == slot.start_time
-                        and b.end_time == slot.end_time
-                        for b in existing_bookings
-                    )
+        index = CoachAvailabilityIndex.build(result.all())
+        occupancy = await self.get_slot_occupancy(
+            [slot.id for slot in slots if slot.max_students > 1], start_date, end_date
+        )
 
-                    available_times.append(
-                        CoachAvailableTimeSlot(
-                            date=current_date,
-                            start_time=slot.start_time,
-                            end_time=slot.end_time,
-                            is_available=not is_booked,
-                            remaining_slots=0 if is_booked else slot.max_students,
-                        )
-                    )
+        return index.expand_slots(slots, start_date, end_date, occupancy)
 
-            current_date += timedelta(days=1)
+    async def search_available_coaches(
+        self,
+        start_date: date,
+        end_date: date,
+        start_time: Optional[time] = None,
+        end_time: Optional[time] = None,
+        specialty: Optional[str] = None,
+        course_type: Optional[str] = None,
+    ) -> List[Tuple[Coach, List[CoachAvailableTimeSlot]]]:
+        """查询指定时间窗口内有空余名额的所有教练
+
+        时段与预约各一次集合查询，区间在内存中合并，避免按教练逐个请求。
+        """
+        slot_query = (
+            select(CoachAvailableSlot, Coach)
+            .join(Coach, Coach.id == CoachAvailableSlot.coach_id)
+            .where(CoachAvailableSlot.is_active.is_(True), Coach.status == "active")
+        )
+        if specialty:
+            slot_query = slot_query.where(Coach.specialty.contains(specialty))
+        if start_time:
+            slot_query = slot_query.where(CoachAvailableSlot.start_time >= start_time)
+        if end_time:
+            slot_query = slot_query.where(CoachAvailableSlot.end_time <= end_time)
+        if course_type == "private":
+            slot_query = slot_query.where(CoachAvailableSlot.max_students == 1)
+        elif course_type == "group":
+            slot_query = slot_query.where(CoachAvailableSlot.max_students > 1)
+
+        slot_rows = (await self.db.execute(slot_query)).all()
+        if not slot_rows:
+            return []
 
-        return available_times
+        coaches = {coach.id: coach for _, coach in slot_rows}
+        slots = [slot for slot, _ in slot_rows]
+
+        result = await self.db.execute(
+            select(Booking.coach_id, Booking.booking_date, Booking.start_time, Booking.end_time)
+            .where(
+                Booking.coach_id.in_(list(coaches)),
+                Booking.booking_date >= start_date,
+                Booking.booking_date <= end_date,
+                Booking.status.in_([BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value]),
+            )
+        )
+        index = CoachAvailabilityIndex.build(result.all())
+        occupancy = await self.get_slot_occupancy(
+            [slot.id for slot in slots if slot.max_students > 1], start_date, end_date
+        )
+
+        slots_by_coach: dict[int, List[CoachAvailableSlot]] = {}
+        for slot in slots:
+            slots_by_coach.setdefault(slot.coach_id, []).append(slot)
+
+        free_by_coach: dict[int, List[CoachAvailableTimeSlot]] = {}
+        for coach_id, coach_slots in slots_by_coach.items():
+            free_times = [
+                t for t in index.expand_slots(coach_slots, start_date, end_date, occupancy)
+                if t.is_available
+            ]
+            if free_times:
+                free_by_coach[coach_id] = free_times
+
+        return [(coaches[coach_id], free_by_coach[coach_id]) for coach_id in sorted(free_by_coach)]
 
 
 class MembershipCardService:
@@ -707,6 +1285,8 @@ class ReviewService:
             is_anonymous=data.is_anonymous,
         )
         self.db.add(review)
+        await self.db.flush()
+        await CoachStatsService(self.db).on_review_created(review)
         await self.db.commit()
         await self.db.refresh(review)
         return review
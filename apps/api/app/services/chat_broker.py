@@ -0,0 +1,210 @@
+"""
+聊天推送跨进程分发
+
+WebSocket 连接只存在于接受它的 worker 进程内。发送消息时经 ChatBroker 广播给所有 worker，
+每个 worker 在首次接受连接时订阅一次，收到后只投递给本进程内的连接：
+
+  - memory：进程内分发（单 worker 部署、开发与测试）。多个 InProcessBroker 共享同一个
+    InProcessHub 时可在单进程内模拟多 worker，用作其他消息中间件的本地替身
+  - postgres：PostgreSQL LISTEN/NOTIFY，复用业务库，无需额外组件
+
+其他中间件（如 Redis）实现 ChatBroker 的全部抽象方法后通过 register_chat_broker 注册，
+由 CHAT_BROKER_BACKEND 选择。
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (接收用户ID列表, 消息) -> 投递给本进程内的连接
+Deliver = Callable[[List[int], dict], Awaitable[None]]
+
+# NOTIFY 载荷上限为 8000 字节（含结尾）
+PG_NOTIFY_MAX_BYTES = 7999
+
+
+class ChatBroker(ABC):
+    """推送分发后端"""
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None:
+        """订阅分发通道，收到的消息交给 deliver 投递（每个进程调用一次）"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """取消订阅并释放连接"""
+
+    @abstractmethod
+    async def publish(self, user_ids: Iterable[int], message: dict) -> None:
+        """将消息分发给所有 worker（包括本进程），分发失败只记录日志不抛出"""
+
+
+class InProcessHub:
+    """进程内分发中心，同一 hub 上的所有 broker 互相可见"""
+
+    def __init__(self) -> None:
+        self.subscribers: List[Deliver] = []
+
+
+class InProcessBroker(ChatBroker):
+    """进程内分发"""
+
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        self.hub = hub or InProcessHub()
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        if self._deliver is None:
+            self._deliver = deliver
+            self.hub.subscribers.append(deliver)
+
+    async def stop(self) -> None:
+        if self._deliver is not None:
+            self.hub.subscribers.remove(self._deliver)
+            self._deliver = None
+
+    async def publish(self, user_ids: Iterable[int], message: dict) -> None:
+        recipients = list(user_ids)
+        if not recipients or not self.hub.subscribers:
+            return
+        await asyncio.gather(
+            *(deliver(recipients, message) for deliver in list(self.hub.subscribers)),
+            return_exceptions=True,
+        )
+
+
+class PostgresNotifyBroker(ChatBroker):
+    """PostgreSQL LISTEN/NOTIFY 分发
+
+    每个 worker 持有一个专用 asyncpg 连接，既 LISTEN 也用于 NOTIFY（PostgreSQL 会把通知
+    投递给发出者自身，因此本进程的连接也经由通道投递）。连接断开后按退避间隔重连，
+    断线期间的推送会丢失，客户端重连后通过历史消息接口补齐。
+    """
+
+    def __init__(self, dsn: str, channel: Optional[str] = None):
+        self.dsn = dsn
+        self.channel = channel or settings.CHAT_BROKER_CHANNEL
+        self._deliver: Optional[Deliver] = None
+        self._conn = None
+        self._send_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closing = False
+
+    @classmethod
+    def from_database_url(cls, url: str) -> "PostgresNotifyBroker":
+        """由 SQLAlchemy 连接串（postgresql+asyncpg://...）构造"""
+        dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        return cls(dsn)
+
+    async def start(self, deliver: Deliver) -> None:
+        if self._deliver is not None:
+            return
+        self._deliver = deliver
+        self._closing = False
+        await self._connect()
+
+    async def stop(self) -> None:
+        self._closing = True
+        self._deliver = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.remove_listener(self.channel, self._on_notify)
+            finally:
+                await conn.close()
+
+    async def publish(self, user_ids: Iterable[int], message: dict) -> None:
+        recipients = list(user_ids)
+        if not recipients:
+            return
+        payload = json.dumps(
+            {"u": recipients, "m": message}, ensure_ascii=False, separators=(",", ":")
+        )
+        if len(payload.encode()) > PG_NOTIFY_MAX_BYTES:
+            # 消息已落库，接收方可通过历史消息接口获取
+            logger.warning(
+                "chat push exceeds NOTIFY payload limit, dropping push to %s", recipients
+            )
+            return
+        if self._conn is None:
+            logger.warning("chat broker not connected, dropping push to %s", recipients)
+            return
+        try:
+            async with self._send_lock:
+                await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception:
+            # 发送方已收到确认，分发失败时同样由历史消息接口补齐
+            logger.exception("chat broker publish failed, dropping push to %s", recipients)
+
+    # ==================== 内部实现 ====================
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+
+    def _on_notify(self, _conn, _pid: int, _channel: str, payload: str) -> None:
+        if self._deliver is None:
+            return
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            logger.warning("invalid chat broker payload: %.200s", payload)
+            return
+        task = asyncio.create_task(self._deliver(envelope["u"], envelope["m"]))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_terminated(self, _conn) -> None:
+        self._conn = None
+        if not self._closing and self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 1.0
+        try:
+            while not self._closing:
+                try:
+                    await self._connect()
+                    logger.info("chat broker reconnected")
+                    return
+                except Exception:
+                    logger.exception("chat broker reconnect failed, retrying in %.0fs", delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+        finally:
+            self._reconnect_task = None
+
+
+_BACKENDS: Dict[str, Callable[[], ChatBroker]] = {
+    "memory": InProcessBroker,
+    "postgres": lambda: PostgresNotifyBroker.from_database_url(settings.DATABASE_URL),
+}
+
+
+def register_chat_broker(name: str, factory: Callable[[], ChatBroker]) -> None:
+    """注册分发后端，CHAT_BROKER_BACKEND 设为 name 时使用"""
+    _BACKENDS[name] = factory
+
+
+def create_chat_broker(backend: Optional[str] = None) -> ChatBroker:
+    """按名称（默认 CHAT_BROKER_BACKEND）创建分发后端"""
+    name = backend or settings.CHAT_BROKER_BACKEND
+    factory = _BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"未知的聊天推送后端: {name}")
+    return factory()
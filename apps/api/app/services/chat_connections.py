@@ -0,0 +1,166 @@
+"""
+聊天 WebSocket 连接注册表
+
+同一用户可在多个设备上同时在线（小程序、网页后台等），每个连接各自持有一个有界发送队列
+和一个写协程：推送只做入队（put_nowait），不在请求处理中等待任何客户端的 socket。
+  - 队列已满或单次发送超过 CHAT_WS_SEND_TIMEOUT_SECONDS 的慢消费者被踢下线（4008），
+    客户端重连后通过历史消息接口补齐
+  - 超过 CHAT_WS_PING_TIMEOUT_SECONDS 未收到客户端任何帧（心跳 "ping"）的连接视为失效（4009）
+  - 单用户连接数超过 CHAT_WS_MAX_CONNECTIONS_PER_USER 时关闭最早的连接
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.schemas.chat import UserBrief
+
+logger = logging.getLogger(__name__)
+
+CLOSE_SLOW_CONSUMER = 4008
+CLOSE_PING_TIMEOUT = 4009
+CLOSE_REPLACED = 4010
+
+# 关闭连接时最多等待客户端握手的时间（秒）
+_CLOSE_TIMEOUT_SECONDS = 1.0
+
+Frame = Union[dict, str]
+
+
+class ChatConnection:
+    """单个 WebSocket 连接及其发送队列"""
+
+    def __init__(
+        self,
+        registry: "ConnectionRegistry",
+        connection_id: int,
+        user_id: int,
+        websocket: WebSocket,
+        queue_size: int,
+    ):
+        self.registry = registry
+        self.id = connection_id
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[Frame]" = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self._writer: Optional[asyncio.Task] = None
+        # 发送消息用的按连接缓存：已验证的会话 -> 对方用户ID（会话成员不变）、本人简要信息
+        self.peers: Dict[int, int] = {}
+        self.sender: Optional[UserBrief] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, frame: Frame) -> bool:
+        """入队待发送的帧（dict 按 JSON 发送），队列已满返回 False"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def close(self, code: int) -> None:
+        """停止写协程并关闭 socket（已关闭时忽略）"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), _CLOSE_TIMEOUT_SECONDS)
+        except Exception:
+            # 对端已断开或迟迟不响应关闭握手
+            pass
+
+    async def _write_loop(self) -> None:
+        while True:
+            frame = await self.queue.get()
+            try:
+                if isinstance(frame, str):
+                    send = self.websocket.send_text(frame)
+                else:
+                    send = self.websocket.send_json(frame)
+                await asyncio.wait_for(send, self.registry.send_timeout)
+            except Exception:
+                logger.info("evicting chat connection %s of user %s", self.id, self.user_id)
+                await self.registry.evict(self, CLOSE_SLOW_CONSUMER)
+                return
+
+
+class ConnectionRegistry:
+    """本进程内的连接注册表（用户 -> 多个连接）"""
+
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+        max_per_user: Optional[int] = None,
+    ):
+        self.queue_size = queue_size or settings.CHAT_WS_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.CHAT_WS_SEND_TIMEOUT_SECONDS
+        self.max_per_user = max_per_user or settings.CHAT_WS_MAX_CONNECTIONS_PER_USER
+        self._connections: Dict[int, Dict[int, ChatConnection]] = {}
+        self._ids = itertools.count(1)
+        self._closing: Set[asyncio.Task] = set()
+
+    def connections_of(self, user_id: int) -> List[ChatConnection]:
+        return list(self._connections.get(user_id, {}).values())
+
+    def is_online(self, user_id: int) -> bool:
+        return bool(self._connections.get(user_id))
+
+    async def register(self, websocket: WebSocket, user_id: int) -> ChatConnection:
+        """登记已接受的连接并启动写协程"""
+        connection = ChatConnection(self, next(self._ids), user_id, websocket, self.queue_size)
+        connections = self._connections.setdefault(user_id, {})
+        connections[connection.id] = connection
+        connection.start()
+
+        # dict 保持插入顺序，最早的连接在前
+        for stale in list(connections.values())[: -self.max_per_user]:
+            await self.evict(stale, CLOSE_REPLACED)
+        return connection
+
+    def unregister(self, connection: ChatConnection) -> None:
+        connections = self._connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.pop(connection.id, None)
+        if not connections:
+            del self._connections[connection.user_id]
+
+    async def evict(self, connection: ChatConnection, code: int) -> None:
+        """移除并关闭连接"""
+        self.unregister(connection)
+        await connection.close(code)
+
+    def deliver(self, user_ids: Iterable[int], frame: Frame) -> int:
+        """向用户的所有连接入队，返回入队的连接数；队列已满的连接被踢下线"""
+        delivered = 0
+        for user_id in user_ids:
+            for connection in self.connections_of(user_id):
+                if connection.offer(frame):
+                    delivered += 1
+                else:
+                    self.unregister(connection)
+                    task = asyncio.create_task(connection.close(CLOSE_SLOW_CONSUMER))
+                    self._closing.add(task)
+                    task.add_done_callback(self._closing.discard)
+        return delivered
+
+    async def close_all(self) -> None:
+        connections = [
+            connection
+            for user_connections in self._connections.values()
+            for connection in user_connections.values()
+        ]
+        self._connections = {}
+        for connection in connections:
+            await connection.close(1001)
@@ -0,0 +1,184 @@
+"""
+会话读取状态（已读水位与未读计数）
+
+每个 (会话, 参与者) 一行：发送消息时对接收方 unread_count + 1（单行 upsert）；标记已读时
+只前移 last_read_message_id 并按水位之后的对方消息数重置 unread_count。未读角标直接读取
+计数，消息的已读状态由接收方水位推导（id <= 水位即已读），不再逐条更新 messages.status。
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.chat import Conversation, ConversationReadState, Message, MessageStatus
+
+
+class ChatReadStateService:
+    """会话读取状态服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== 读取 ====================
+
+    async def get_many(
+        self, conversation_ids: Iterable[int]
+    ) -> Dict[int, Dict[int, ConversationReadState]]:
+        """批量读取会话各参与者的状态，返回 {会话ID: {用户ID: 状态}}"""
+        ids = list(dict.fromkeys(conversation_ids))
+        if not ids:
+            return {}
+        result = await self.db.execute(
+            select(ConversationReadState)
+            .where(ConversationReadState.conversation_id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+        states: Dict[int, Dict[int, ConversationReadState]] = {}
+        for row in result.scalars().all():
+            states.setdefault(row.conversation_id, {})[row.user_id] = row
+        return states
+
+    async def watermarks(self, conversation_id: int) -> Dict[int, int]:
+        """会话各参与者的已读水位 {用户ID: last_read_message_id}"""
+        result = await self.db.execute(
+            select(ConversationReadState.user_id, ConversationReadState.last_read_message_id)
+            .where(ConversationReadState.conversation_id == conversation_id)
+        )
+        return {user_id: last_read or 0 for user_id, last_read in result.all()}
+
+    @staticmethod
+    def status_of(
+        message: Message, conversation: Conversation, watermarks: Mapping[int, int]
+    ) -> str:
+        """由接收方水位推导消息状态"""
+        recipient_id = (
+            conversation.participant2_id
+            if message.sender_id == conversation.participant1_id
+            else conversation.participant1_id
+        )
+        if watermarks.get(recipient_id, 0) >= message.id:
+            return MessageStatus.READ.value
+        return message.status
+
+    # ==================== 写入 ====================
+
+    async def on_messages_sent(self, conversation_id: int, unread: Mapping[int, int]) -> None:
+        """消息写入后调用（与消息同事务提交），unread 为接收方用户ID -> 新增消息数"""
+        if not unread:
+            return
+        now = datetime.now(timezone.utc)
+        stmt = dialect_insert(self.db)(ConversationReadState).values(
+            [
+                {
+                    "conversation_id": conversation_id,
+                    "user_id": user_id,
+                    "last_read_message_id": 0,
+                    "unread_count": count,
+                    "updated_at": now,
+                }
+                for user_id, count in unread.items()
+            ]
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["conversation_id", "user_id"],
+                set_={
+                    "unread_count": ConversationReadState.unread_count + stmt.excluded.unread_count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+    async def mark_read(
+        self, conversation: Conversation, user_id: int, up_to_id: Optional[int] = None
+    ) -> Optional[int]:
+        """将已读水位前移到 up_to_id（默认会话最后一条消息），返回生效的水位；水位不后退"""
+        last_message_id = conversation.last_message_id or 0
+        target = min(up_to_id or last_message_id, last_message_id)
+        current = await self.db.scalar(
+            select(ConversationReadState.last_read_message_id).where(
+                ConversationReadState.conversation_id == conversation.id,
+                ConversationReadState.user_id == user_id,
+            )
+        )
+        if target <= (current or 0):
+            return current
+
+        # 水位之后对方发来的消息数（仅扫描水位之后的索引区间）
+        remaining = (
+            select(func.count())
+            .where(
+                Message.conversation_id == conversation.id,
+                Message.id > target,
+                Message.sender_id != user_id,
+                Message.is_deleted.is_(False),
+            )
+            .scalar_subquery()
+        )
+        unread = 0 if target >= last_message_id else remaining
+        stmt = dialect_insert(self.db)(ConversationReadState).values(
+            conversation_id=conversation.id,
+            user_id=user_id,
+            last_read_message_id=target,
+            unread_count=unread,
+            updated_at=datetime.now(timezone.utc),
+        )
+        # 并发请求已把水位推得更远时不覆盖（水位不后退）
+        applied = await self.db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=["conversation_id", "user_id"],
+                set_={
+                    "last_read_message_id": stmt.excluded.last_read_message_id,
+                    "unread_count": stmt.excluded.unread_count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+                where=ConversationReadState.last_read_message_id
+                < stmt.excluded.last_read_message_id,
+            ).returning(ConversationReadState.last_read_message_id)
+        )
+        if applied is None:
+            return await self.db.scalar(
+                select(ConversationReadState.last_read_message_id).where(
+                    ConversationReadState.conversation_id == conversation.id,
+                    ConversationReadState.user_id == user_id,
+                )
+            )
+        return applied
+
+    async def rebuild(self) -> int:
+        """按 messages.status 重建读取状态（上线回填），返回写入的行数"""
+        recipient = case(
+            (Message.sender_id == Conversation.participant1_id, Conversation.participant2_id),
+            else_=Conversation.participant1_id,
+        )
+        is_read = Message.status == MessageStatus.READ.value
+        result = await self.db.execute(
+            select(
+                Message.conversation_id,
+                recipient,
+                func.max(case((is_read, Message.id), else_=0)),
+                func.sum(case((is_read, 0), else_=1)),
+            )
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(Message.is_deleted.is_(False))
+            .group_by(Message.conversation_id, recipient)
+        )
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "last_read_message_id": last_read or 0,
+                "unread_count": unread or 0,
+                "updated_at": now,
+            }
+            for conversation_id, user_id, last_read, unread in result.all()
+        ]
+        await self.db.execute(delete(ConversationReadState))
+        if rows:
+            await self.db.execute(insert(ConversationReadState), rows)
+        await self.db.commit()
+        return len(rows)
@@ -0,0 +1,207 @@
+"""
+聊天消息攒批写入
+
+经 WebSocket 发送的消息不逐条开事务：写入协程从队列取出消息，攒满 CHAT_WS_WRITE_BATCH_SIZE 条
+或等待 CHAT_WS_WRITE_FLUSH_MS 毫秒后在一个事务内批量插入消息、更新会话最后一条消息并累加
+接收方未读计数，提交后再逐条完成 future，调用方据此向客户端确认（ack）并推送给对方。
+
+幂等：(sender_id, client_msg_id) 唯一。批内重复的帧与已落库的帧直接返回已有消息（created=False），
+不会重复推送。整批写入违反约束（并发 worker 上同一幂等ID 撞唯一索引、回复的消息已不存在等）时
+逐条重试，只有出错的消息失败，同批其他消息照常落库；并发写入的同一幂等ID 重试时返回已有消息。
+"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.chat import Conversation, Message
+from app.services.chat_read_state import ChatReadStateService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingMessage:
+    """待写入的消息"""
+
+    conversation_id: int
+    sender_id: int
+    recipient_id: int
+    client_msg_id: str
+    content: str
+    type: str = "text"
+    reply_to_id: Optional[int] = None
+
+
+class WriteResult(NamedTuple):
+    message: Message
+    # False 表示该幂等ID 已写入过，返回的是已有消息
+    created: bool
+
+
+_Queued = Tuple[PendingMessage, "asyncio.Future[WriteResult]"]
+
+
+class ChatMessageWriter:
+    """聊天消息攒批写入协程"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.CHAT_WS_WRITE_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else settings.CHAT_WS_WRITE_FLUSH_MS / 1000
+        )
+        # None 为停止标记
+        self._queue: "asyncio.Queue[Optional[_Queued]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, pending: PendingMessage) -> "asyncio.Future[WriteResult]":
+        """入队待写入的消息，返回落库（提交）后完成的 future；同一调用方的消息按提交顺序写入"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((pending, future))
+        return future
+
+    async def stop(self) -> None:
+        """写完已入队的消息后停止"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._queue.put_nowait(None)
+        await task
+
+    # ==================== 内部实现 ====================
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_Queued]) -> None:
+        try:
+            async with self.session_factory() as db:
+                results = await self._write(db, [pending for pending, _ in batch])
+                await db.commit()
+        except IntegrityError as exc:
+            if len(batch) > 1:
+                # 约束冲突只由个别消息引起：逐条重试，隔离出错的消息
+                logger.warning("chat batch of %d hit %s, retrying one by one", len(batch), exc)
+                for item in batch:
+                    await self._flush([item])
+                return
+            logger.warning("failed to persist chat message: %s", exc)
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(exc)
+            return
+        except Exception as exc:
+            logger.exception("failed to persist %d chat messages", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _write(self, db: AsyncSession, batch: List[PendingMessage]) -> List[WriteResult]:
+        keys = {(pending.sender_id, pending.client_msg_id) for pending in batch}
+        existing: Dict[Tuple[int, str], Message] = {}
+        result = await db.execute(
+            select(Message).where(
+                Message.sender_id.in_({sender_id for sender_id, _ in keys}),
+                Message.client_msg_id.in_({client_msg_id for _, client_msg_id in keys}),
+            )
+        )
+        for message in result.scalars().all():
+            key = (message.sender_id, message.client_msg_id)
+            if key in keys:
+                existing[key] = message
+
+        created: Dict[Tuple[int, str], Message] = {}
+        unread: Dict[int, Counter] = defaultdict(Counter)
+        for pending in batch:
+            key = (pending.sender_id, pending.client_msg_id)
+            if key in existing or key in created:
+                continue
+            created[key] = Message(
+                conversation_id=pending.conversation_id,
+                sender_id=pending.sender_id,
+                type=pending.type,
+                content=pending.content,
+                reply_to_id=pending.reply_to_id,
+                client_msg_id=pending.client_msg_id,
+            )
+            unread[pending.conversation_id][pending.recipient_id] += 1
+
+        if created:
+            db.add_all(created.values())
+            await db.flush()
+
+            # 会话最后一条消息取本批内该会话 ID 最大的消息
+            latest: Dict[int, Message] = {}
+            for message in created.values():
+                current = latest.get(message.conversation_id)
+                if current is None or message.id > current.id:
+                    latest[message.conversation_id] = message
+            conversations = await db.execute(
+                select(Conversation).where(Conversation.id.in_(list(latest)))
+            )
+            for conversation in conversations.scalars().all():
+                message = latest[conversation.id]
+                if (conversation.last_message_id or 0) < message.id:
+                    conversation.last_message_id = message.id
+                    conversation.last_message_at = message.created_at
+
+            read_states = ChatReadStateService(db)
+            for conversation_id, counts in unread.items():
+                await read_states.on_messages_sent(conversation_id, counts)
+
+        results = []
+        returned = set()
+        for pending in batch:
+            key = (pending.sender_id, pending.client_msg_id)
+            if key in existing:
+                results.append(WriteResult(existing[key], False))
+            else:
+                # 批内重复的帧只有第一条算新写入
+                results.append(WriteResult(created[key], key not in returned))
+                returned.add(key)
+        return results
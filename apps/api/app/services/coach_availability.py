@@ -0,0 +1,161 @@
+"""
+教练可约时间索引
+
+按 (教练, 日期) 维护已占用区间的有序端点数组，一次构建后可在 O(log n)
+内回答“某时段与多少个已有预约重叠”，避免对每个时段线性扫描全部预约。
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from app.models.booking import CoachAvailableSlot
+from app.schemas.booking import CoachAvailableTimeSlot
+
+
+def time_to_minutes(value: time) -> int:
+    """时间转换为当天分钟数"""
+    return value.hour * 60 + value.minute
+
+
+def to_sunday_first_weekday(day: date) -> int:
+    """Python weekday(0=周一) 转换为时段配置使用的 0=周日"""
+    return (day.weekday() + 1) % 7
+
+
+def expand_weekly_dates(
+    start_date: date,
+    end_date: Optional[date] = None,
+    occurrences: Optional[int] = None,
+    weekdays: Optional[Iterable[int]] = None,
+    interval_weeks: int = 1,
+) -> List[date]:
+    """按每周重复规则展开日期（weekdays 使用 0=周日，默认取开始日期当天）
+
+    以开始日期所在周（周日起）为第 0 周，每隔 interval_weeks 周取一次；
+    到达 end_date 或 occurrences 任一上限即停止，两者至少提供一个。
+    """
+    if end_date is None and occurrences is None:
+        raise ValueError("请提供结束日期或预约次数")
+
+    days = set(weekdays) if weekdays else {to_sunday_first_weekday(start_date)}
+    if not days <= set(range(7)):
+        raise ValueError("上课日需在 0-6 之间")
+    week_start = start_date - timedelta(days=to_sunday_first_weekday(start_date))
+    dates: List[date] = []
+    week = 0
+    while occurrences is None or len(dates) < occurrences:
+        for offset in range(7):
+            day = week_start + timedelta(weeks=week, days=offset)
+            if end_date is not None and day > end_date:
+                return dates
+            if day >= start_date and offset in days:
+                dates.append(day)
+                if occurrences is not None and len(dates) >= occurrences:
+                    return dates
+        week += interval_weeks
+    return dates
+
+
+class _DayIntervals:
+    """单个教练单日的已占用区间（起点、终点分别排序）"""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self) -> None:
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, start: int, end: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def seal(self) -> None:
+        self.starts.sort()
+        self.ends.sort()
+
+    def count_overlaps(self, start: int, end: int) -> int:
+        """统计与 [start, end) 重叠的区间数
+
+        起点早于 end 的区间中，剔除终点不晚于 start 的区间即为重叠区间；
+        后者必然是前者的子集，因此两次二分相减即可。
+        """
+        started_before_end = bisect_left(self.starts, end)
+        ended_before_start = bisect_right(self.ends, start)
+        return started_before_end - ended_before_start
+
+
+class CoachAvailabilityIndex:
+    """多教练、多日期的预约区间索引"""
+
+    def __init__(self) -> None:
+        self._days: Dict[Tuple[int, date], _DayIntervals] = defaultdict(_DayIntervals)
+
+    @classmethod
+    def build(
+        cls, intervals: Iterable[Tuple[int, date, time, time]]
+    ) -> "CoachAvailabilityIndex":
+        """由 (coach_id, booking_date, start_time, end_time) 序列构建索引"""
+        index = cls()
+        for coach_id, booking_date, start_time, end_time in intervals:
+            index._days[(coach_id, booking_date)].add(
+                time_to_minutes(start_time), time_to_minutes(end_time)
+            )
+        for day in index._days.values():
+            day.seal()
+        return index
+
+    def count_overlaps(self, coach_id: int, day: date, start_time: time, end_time: time) -> int:
+        """统计教练在指定日期与给定时段重叠的预约数"""
+        intervals = self._days.get((coach_id, day))
+        if intervals is None:
+            return 0
+        return intervals.count_overlaps(time_to_minutes(start_time), time_to_minutes(end_time))
+
+    def is_free(self, coach_id: int, day: date, start_time: time, end_time: time) -> bool:
+        """判断教练在给定时段是否无任何重叠预约"""
+        return self.count_overlaps(coach_id, day, start_time, end_time) == 0
+
+    def expand_slots(
+        self,
+        slots: Sequence[CoachAvailableSlot],
+        start_date: date,
+        end_date: date,
+        occupancy: Optional[Mapping[Tuple[int, date], int]] = None,
+    ) -> List[CoachAvailableTimeSlot]:
+        """将每周时段配置展开为日期范围内的可约时间
+
+        时段按星期预先分组，每天只遍历当天生效的时段，总开销与输出规模成正比。
+        小班时段优先使用 occupancy 中 (slot_id, date) 的已占名额计数，
+        没有计数行时退回按重叠预约数计算。
+        """
+        occupancy = occupancy or {}
+        slots_by_weekday: Dict[int, List[CoachAvailableSlot]] = defaultdict(list)
+        for slot in slots:
+            slots_by_weekday[slot.day_of_week].append(slot)
+        for weekday_slots in slots_by_weekday.values():
+            weekday_slots.sort(key=lambda s: (s.start_time, s.end_time))
+
+        available_times: List[CoachAvailableTimeSlot] = []
+        current_date = start_date
+        while current_date <= end_date:
+            for slot in slots_by_weekday.get(to_sunday_first_weekday(current_date), ()):
+                booked = occupancy.get((slot.id, current_date)) if slot.max_students > 1 else None
+                if booked is None:
+                    booked = self.count_overlaps(
+                        slot.coach_id, current_date, slot.start_time, slot.end_time
+                    )
+                remaining = max(slot.max_students - booked, 0)
+                available_times.append(
+                    CoachAvailableTimeSlot(
+                        date=current_date,
+                        start_time=slot.start_time,
+                        end_time=slot.end_time,
+                        is_available=remaining > 0,
+                        remaining_slots=remaining,
+                    )
+                )
+            current_date += timedelta(days=1)
+
+        return available_times
@@ -0,0 +1,284 @@
+"""
+教练收入流水与月度汇总服务
+
+预约完成时写入一条收入流水，固化当时生效的课时费与提成比例，之后调整费率
+不会改变历史收入；同时以 ``col = col + delta`` 原子更新 coach_income_monthly，
+收入汇总页只读取月度汇总行，不扫描 bookings。已完成的预约被改为其他状态时
+删除对应流水并回退汇总。rebuild 仅用于上线回填与修复。
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus, CoachIncomeEntry, CoachIncomeMonthly
+from app.models.user import Coach
+
+_CENT = Decimal("0.01")
+
+
+def month_key(day: date) -> str:
+    """日期所属月份 YYYY-MM"""
+    return day.strftime("%Y-%m")
+
+
+def coach_rates(coach: Coach) -> Tuple[Decimal, Decimal]:
+    """教练当前生效的课时费与提成比例"""
+    hourly_rate = Decimal(str(coach.hourly_rate)) if coach.hourly_rate else Decimal("0")
+    commission_rate = coach.commission_rate or settings.COACH_DEFAULT_COMMISSION_RATE
+    return hourly_rate, Decimal(str(commission_rate))
+
+
+def _build_entry(booking: Any, coach: Coach) -> CoachIncomeEntry:
+    hourly_rate, commission_rate = coach_rates(coach)
+    return CoachIncomeEntry(
+        coach_id=booking.coach_id,
+        booking_id=booking.id,
+        student_id=booking.student_id,
+        booking_date=booking.booking_date,
+        income_month=month_key(booking.booking_date),
+        hourly_rate=hourly_rate,
+        commission_rate=commission_rate,
+        amount=(hourly_rate * commission_rate).quantize(_CENT, rounding=ROUND_HALF_UP),
+    )
+
+
+class CoachIncomeService:
+    """教练收入服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== 事件 ====================
+
+    async def on_booking_status_change(self, booking: Booking, old_status: str) -> None:
+        """预约状态变更后调用（booking.status 已为新状态）"""
+        was_completed = old_status == BookingStatus.COMPLETED.value
+        now_completed = booking.status == BookingStatus.COMPLETED.value
+        if now_completed and not was_completed:
+            await self.record(booking)
+        elif was_completed and not now_completed:
+            await self.reverse(booking.id)
+
+    async def record(self, booking: Booking) -> Optional[CoachIncomeEntry]:
+        """为已完成预约写入收入流水；已存在时返回 None"""
+        coach = await self.db.get(Coach, booking.coach_id)
+        entry = _build_entry(booking, coach)
+        try:
+            async with self.db.begin_nested():
+                self.db.add(entry)
+        except IntegrityError:
+            # 该预约已记账（重复完成或并发请求）
+            return None
+
+        await self._apply(entry.coach_id, entry.income_month, 1, entry.amount)
+        return entry
+
+    async def record_many(self, bookings: Iterable[Any]) -> int:
+        """为批量完成的预约写入收入流水并按月累加汇总（与状态 UPDATE 同一事务）
+
+        bookings 的元素需有 id / coach_id / student_id / booking_date 属性
+        （如 UPDATE ... RETURNING 的行）；已记账的预约跳过。返回写入的流水数。
+        """
+        bookings = list(bookings)
+        if not bookings:
+            return 0
+        recorded = set(
+            (
+                await self.db.execute(
+                    select(CoachIncomeEntry.booking_id).where(
+                        CoachIncomeEntry.booking_id.in_([booking.id for booking in bookings])
+                    )
+                )
+            ).scalars()
+        )
+        bookings = [booking for booking in bookings if booking.id not in recorded]
+        if not bookings:
+            return 0
+
+        coaches = {
+            coach.id: coach
+            for coach in (
+                await self.db.execute(
+                    select(Coach).where(Coach.id.in_({booking.coach_id for booking in bookings}))
+                )
+            ).scalars()
+        }
+        entries = [_build_entry(booking, coaches[booking.coach_id]) for booking in bookings]
+        self.db.add_all(entries)
+        await self.db.flush()
+
+        totals: Dict[Tuple[int, str], List[Any]] = defaultdict(lambda: [0, Decimal("0")])
+        for entry in entries:
+            total = totals[(entry.coach_id, entry.income_month)]
+            total[0] += 1
+            total[1] += entry.amount
+        for (coach_id, month), (lessons, income) in totals.items():
+            await self._apply(coach_id, month, lessons, income)
+        return len(entries)
+
+    async def reverse(self, booking_id: int) -> None:
+        """撤销预约对应的收入流水"""
+        entry = await self.db.scalar(
+            select(CoachIncomeEntry).where(CoachIncomeEntry.booking_id == booking_id)
+        )
+        if entry is None:
+            return
+        await self.db.delete(entry)
+        await self.db.flush()
+        await self._apply(entry.coach_id, entry.income_month, -1, -Decimal(str(entry.amount)))
+
+    # ==================== 读取 ====================
+
+    async def get_summary(self, coach_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+        """本月、上月与累计收入（只读取月度汇总行）"""
+        today = today or date.today()
+        this_month = month_key(today)
+        last_month = month_key(today.replace(day=1) - timedelta(days=1))
+
+        result = await self.db.execute(
+            select(CoachIncomeMonthly)
+            .where(CoachIncomeMonthly.coach_id == coach_id)
+            .execution_options(populate_existing=True)
+        )
+        summary = {
+            key: {"lessons": 0, "income": Decimal("0")}
+            for key in ("this_month", "last_month", "total")
+        }
+        for row in result.scalars().all():
+            income = Decimal(str(row.income))
+            buckets = ["total"]
+            if row.month == this_month:
+                buckets.append("this_month")
+            elif row.month == last_month:
+                buckets.append("last_month")
+            for key in buckets:
+                summary[key]["lessons"] += row.lessons
+                summary[key]["income"] += income
+
+        return {
+            key: {"lessons": value["lessons"], "income": float(value["income"])}
+            for key, value in summary.items()
+        }
+
+    async def get_entries(
+        self, coach_id: int, month: Optional[str] = None, page: int = 1, page_size: int = 20
+    ) -> List[CoachIncomeEntry]:
+        """分页读取收入流水（按上课日期倒序）"""
+        query = (
+            select(CoachIncomeEntry)
+            .options(
+                selectinload(CoachIncomeEntry.booking), selectinload(CoachIncomeEntry.student)
+            )
+            .where(CoachIncomeEntry.coach_id == coach_id)
+        )
+        if month:
+            query = query.where(CoachIncomeEntry.income_month == month)
+        query = (
+            query.order_by(CoachIncomeEntry.booking_date.desc(), CoachIncomeEntry.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    # ==================== 重建 ====================
+
+    async def rebuild(self, coach_ids: Optional[List[int]] = None) -> int:
+        """补齐缺失流水、清理失效流水并重算月度汇总，返回处理的教练数
+
+        历史上缺少流水的已完成预约按教练当前费率补记。
+        """
+        if coach_ids is None:
+            coach_ids = list((await self.db.execute(select(Coach.id))).scalars().all())
+        if not coach_ids:
+            return 0
+
+        # 清理预约已不再是完成状态的流水
+        still_completed = (
+            select(Booking.id)
+            .where(
+                Booking.id == CoachIncomeEntry.booking_id,
+                Booking.status == BookingStatus.COMPLETED.value,
+            )
+            .exists()
+        )
+        await self.db.execute(
+            delete(CoachIncomeEntry)
+            .where(CoachIncomeEntry.coach_id.in_(coach_ids), ~still_completed)
+            .execution_options(synchronize_session=False)
+        )
+
+        missing = await self.db.execute(
+            select(Booking)
+            .outerjoin(CoachIncomeEntry, CoachIncomeEntry.booking_id == Booking.id)
+            .where(
+                Booking.coach_id.in_(coach_ids),
+                Booking.status == BookingStatus.COMPLETED.value,
+                CoachIncomeEntry.id.is_(None),
+            )
+        )
+        coaches = {
+            coach.id: coach
+            for coach in (
+                await self.db.execute(select(Coach).where(Coach.id.in_(coach_ids)))
+            ).scalars()
+        }
+        for booking in missing.scalars().all():
+            self.db.add(_build_entry(booking, coaches[booking.coach_id]))
+        await self.db.flush()
+
+        rollup_query = (
+            select(
+                CoachIncomeEntry.coach_id,
+                CoachIncomeEntry.income_month,
+                func.count(CoachIncomeEntry.id),
+                func.coalesce(func.sum(CoachIncomeEntry.amount), 0),
+            )
+            .where(CoachIncomeEntry.coach_id.in_(coach_ids))
+            .group_by(CoachIncomeEntry.coach_id, CoachIncomeEntry.income_month)
+        )
+        rollups = (await self.db.execute(rollup_query)).all()
+        await self.db.execute(
+            delete(CoachIncomeMonthly).where(CoachIncomeMonthly.coach_id.in_(coach_ids))
+        )
+        self.db.add_all(
+            CoachIncomeMonthly(coach_id=coach_id, month=month, lessons=lessons, income=income)
+            for coach_id, month, lessons, income in rollups
+        )
+        await self.db.commit()
+        return len(coach_ids)
+
+    # ==================== 内部实现 ====================
+
+    async def _apply(self, coach_id: int, month: str, lessons: int, income: Decimal) -> None:
+        exists = await self.db.scalar(
+            select(CoachIncomeMonthly.coach_id).where(
+                CoachIncomeMonthly.coach_id == coach_id, CoachIncomeMonthly.month == month
+            )
+        )
+        if exists is None:
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(
+                        CoachIncomeMonthly(coach_id=coach_id, month=month, lessons=0, income=0)
+                    )
+            except IntegrityError:
+                # 并发请求已创建汇总行
+                pass
+
+        await self.db.execute(
+            update(CoachIncomeMonthly)
+            .where(CoachIncomeMonthly.coach_id == coach_id, CoachIncomeMonthly.month == month)
+            .values(
+                lessons=CoachIncomeMonthly.lessons + lessons,
+                income=CoachIncomeMonthly.income + income,
+            )
+        )
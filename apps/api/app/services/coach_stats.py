@@ -0,0 +1,261 @@
+"""
+教练统计读模型服务
+
+coach_stats 表由预约状态变更与评价创建事件增量维护：计数列通过
+``col = col + delta`` 的原子 UPDATE 修改，不在请求路径上扫描 bookings / reviews。
+统计行首次写入时以聚合结果为初值（排除触发本次事件的记录），
+rebuild 仅用于全量回填与修复。
+"""
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.booking import Booking, BookingStatus, CoachStats, Review
+from app.models.user import Coach
+
+# 预约状态 -> 计数列
+_STATUS_COLUMNS = {
+    BookingStatus.COMPLETED.value: "total_lessons",
+    BookingStatus.NO_SHOW.value: "no_show_count",
+    BookingStatus.CANCELLED.value: "cancelled_count",
+}
+
+
+class CoachStatsService:
+    """教练统计读模型服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== 读取 ====================
+
+    async def get_many(self, coach_ids: Iterable[int]) -> Dict[int, CoachStats]:
+        """批量读取教练统计；尚未物化的教练按实时聚合补齐（不落库）"""
+        ids = list(dict.fromkeys(coach_ids))
+        if not ids:
+            return {}
+        result = await self.db.execute(
+            select(CoachStats)
+            .where(CoachStats.coach_id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+        stats = {row.coach_id: row for row in result.scalars().all()}
+        missing = [coach_id for coach_id in ids if coach_id not in stats]
+        if missing:
+            stats.update(await self._compute(missing))
+        return stats
+
+    async def get(self, coach_id: int) -> CoachStats:
+        """读取单个教练统计"""
+        return (await self.get_many([coach_id]))[coach_id]
+
+    # ==================== 事件 ====================
+
+    async def on_booking_status_change(self, booking: Booking, old_status: str) -> None:
+        """预约状态变更后调用（booking.status 已为新状态）"""
+        new_status = booking.status
+        if old_status == new_status:
+            return
+
+        created = await self._ensure_row(booking.coach_id, exclude_booking_id=booking.id)
+        deltas: Dict[str, int] = defaultdict(int)
+        # 新建的统计行不包含本预约，无需扣除旧状态
+        if not created and old_status in _STATUS_COLUMNS:
+            deltas[_STATUS_COLUMNS[old_status]] -= 1
+        if new_status in _STATUS_COLUMNS:
+            deltas[_STATUS_COLUMNS[new_status]] += 1
+
+        was_completed = old_status == BookingStatus.COMPLETED.value and not created
+        now_completed = new_status == BookingStatus.COMPLETED.value
+        if was_completed != now_completed:
+            other_completed = await self.db.scalar(
+                select(Booking.id)
+                .where(
+                    Booking.coach_id == booking.coach_id,
+                    Booking.student_id == booking.student_id,
+                    Booking.status == BookingStatus.COMPLETED.value,
+                    Booking.id != booking.id,
+                )
+                .limit(1)
+            )
+            if other_completed is None:
+                deltas["total_students"] += 1 if now_completed else -1
+
+        await self._apply(booking.coach_id, deltas)
+
+    async def on_bookings_completed(self, bookings: Iterable[Any]) -> None:
+        """已确认预约批量置为已完成后调用（与状态 UPDATE 同一事务）
+
+        bookings 的元素需有 id / coach_id / student_id 属性（如 UPDATE ... RETURNING 的行）。
+        """
+        bookings = list(bookings)
+        if not bookings:
+            return
+        booking_ids = [booking.id for booking in bookings]
+        lessons: Counter = Counter(booking.coach_id for booking in bookings)
+        pairs = {(booking.coach_id, booking.student_id) for booking in bookings}
+
+        existing = set(
+            (
+                await self.db.execute(
+                    select(CoachStats.coach_id).where(CoachStats.coach_id.in_(list(lessons)))
+                )
+            ).scalars()
+        )
+        missing = [coach_id for coach_id in lessons if coach_id not in existing]
+        if missing:
+            # 新建的统计行按聚合结果初始化，已包含本批预约
+            computed = await self._compute(missing)
+            for coach_id in missing:
+                try:
+                    async with self.db.begin_nested():
+                        self.db.add(computed[coach_id])
+                except IntegrityError:
+                    # 并发请求已创建统计行，仍按增量累加
+                    continue
+                del lessons[coach_id]
+        if not lessons:
+            return
+
+        # 本批之外已有完成记录的 (教练, 学员) 不计为新学员
+        seen = set(
+            (
+                await self.db.execute(
+                    select(Booking.coach_id, Booking.student_id)
+                    .where(
+                        tuple_(Booking.coach_id, Booking.student_id).in_(
+                            [pair for pair in pairs if pair[0] in lessons]
+                        ),
+                        Booking.status == BookingStatus.COMPLETED.value,
+                        Booking.id.notin_(booking_ids),
+                    )
+                    .distinct()
+                )
+            ).all()
+        )
+        new_students: Counter = Counter(
+            coach_id for coach_id, student_id in pairs
+            if coach_id in lessons and (coach_id, student_id) not in seen
+        )
+        for coach_id, count in lessons.items():
+            await self._apply(
+                coach_id, {"total_lessons": count, "total_students": new_students[coach_id]}
+            )
+
+    async def on_review_created(self, review: Review) -> None:
+        """评价创建后调用"""
+        await self._ensure_row(review.coach_id, exclude_review_id=review.id)
+        await self._apply(review.coach_id, {"rating_sum": review.rating, "review_count": 1})
+
+    # ==================== 重建 ====================
+
+    async def rebuild(self, coach_ids: Optional[List[int]] = None) -> int:
+        """按 bookings / reviews 全量重算统计并覆盖写入，返回处理的教练数"""
+        if coach_ids is None:
+            coach_ids = list((await self.db.execute(select(Coach.id))).scalars().all())
+        if not coach_ids:
+            return 0
+
+        computed = await self._compute(coach_ids)
+        await self.db.execute(delete(CoachStats).where(CoachStats.coach_id.in_(coach_ids)))
+        self.db.add_all(computed.values())
+        await self.db.commit()
+        return len(computed)
+
+    # ==================== 内部实现 ====================
+
+    async def _compute(
+        self,
+        coach_ids: List[int],
+        exclude_booking_id: Optional[int] = None,
+        exclude_review_id: Optional[int] = None,
+    ) -> Dict[int, CoachStats]:
+        """按教练聚合统计（返回未加入会话的对象）"""
+        stats = {
+            coach_id: CoachStats(
+                coach_id=coach_id,
+                total_students=0,
+                total_lessons=0,
+                no_show_count=0,
+                cancelled_count=0,
+                rating_sum=0,
+                review_count=0,
+            )
+            for coach_id in coach_ids
+        }
+
+        booking_filter = [Booking.coach_id.in_(coach_ids)]
+        if exclude_booking_id is not None:
+            booking_filter.append(Booking.id != exclude_booking_id)
+
+        status_rows = await self.db.execute(
+            select(Booking.coach_id, Booking.status, func.count(Booking.id))
+            .where(*booking_filter, Booking.status.in_(list(_STATUS_COLUMNS)))
+            .group_by(Booking.coach_id, Booking.status)
+        )
+        for coach_id, status, count in status_rows.all():
+            setattr(stats[coach_id], _STATUS_COLUMNS[status], count)
+
+        student_rows = await self.db.execute(
+            select(Booking.coach_id, func.count(func.distinct(Booking.student_id)))
+            .where(*booking_filter, Booking.status == BookingStatus.COMPLETED.value)
+            .group_by(Booking.coach_id)
+        )
+        for coach_id, count in student_rows.all():
+            stats[coach_id].total_students = count
+
+        review_filter = [Review.coach_id.in_(coach_ids)]
+        if exclude_review_id is not None:
+            review_filter.append(Review.id != exclude_review_id)
+        review_rows = await self.db.execute(
+            select(
+                Review.coach_id,
+                func.coalesce(func.sum(Review.rating), 0),
+                func.count(Review.id),
+            )
+            .where(*review_filter)
+            .group_by(Review.coach_id)
+        )
+        for coach_id, rating_sum, count in review_rows.all():
+            stats[coach_id].rating_sum = int(rating_sum)
+            stats[coach_id].review_count = count
+
+        return stats
+
+    async def _ensure_row(
+        self,
+        coach_id: int,
+        exclude_booking_id: Optional[int] = None,
+        exclude_review_id: Optional[int] = None,
+    ) -> bool:
+        """确保统计行存在，返回是否本次新建"""
+        existing = await self.db.scalar(
+            select(CoachStats.coach_id).where(CoachStats.coach_id == coach_id)
+        )
+        if existing is not None:
+            return False
+
+        computed = await self._compute([coach_id], exclude_booking_id, exclude_review_id)
+        try:
+            async with self.db.begin_nested():
+                self.db.add(computed[coach_id])
+        except IntegrityError:
+            # 并发请求已创建统计行
+            return False
+        return True
+
+    async def _apply(self, coach_id: int, deltas: Dict[str, int]) -> None:
+        values = {
+            column: getattr(CoachStats, column) + delta
+            for column, delta in deltas.items()
+            if delta
+        }
+        if not values:
+            return
+        await self.db.execute(
+            update(CoachStats).where(CoachStats.coach_id == coach_id).values(**values)
+        )
@@ -0,0 +1,210 @@
+"""
+运营看板指标服务
+
+预约数、完成数按上课日期实时聚合（走 bookings (booking_date, status) 索引，
+只扫描查询区间内的预约），购买营收按交易时间实时聚合（走 transactions
+(type, created_at) 索引），预约与交易写入路径不再维护任何汇总行，避免同一日期
+的预约在汇总行锁上排队。新开课时账户数由开户路径以 ``col = col + delta`` 原子更新
+月汇总（dashboard_monthly_stats），rebuild 用于上线回填与修复。
+看板各接口的结果放入进程内短时快照缓存，自动刷新的看板在有效期内不再访问数据库。
+"""
+
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Tuple
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.booking import (
+    Booking,
+    BookingStatus,
+    StudentMembership,
+    Transaction,
+    TransactionType,
+)
+from app.models.dashboard import DashboardMonthlyStats
+
+
+def _month_of(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _month_start(month: str) -> datetime:
+    year, mon = month.split("-")
+    return datetime(int(year), int(mon), 1)
+
+
+def _next_month_start(month: str) -> datetime:
+    start = _month_start(month)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+class DailyBookingStats(NamedTuple):
+    """单日预约统计"""
+
+    bookings: int  # 预约数（含全部状态）
+    completed_bookings: int  # 已完成预约数
+
+
+class MonthlyStats(NamedTuple):
+    """单月看板统计"""
+
+    revenue: Decimal  # 购买交易金额合计
+    purchase_count: int  # 购买交易笔数
+    new_memberships: int  # 新开课时账户数
+
+
+class SnapshotCache:
+    """进程内短时快照缓存（同一键并发未命中时只加载一次）"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl_seconds <= 0:
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry and entry[0] > monotonic():
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > monotonic():
+                return entry[1]
+            value = await loader()
+            self._entries[key] = (monotonic() + self.ttl_seconds, value)
+            return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+dashboard_snapshot_cache = SnapshotCache(settings.DASHBOARD_SNAPSHOT_TTL_SECONDS)
+
+
+class DashboardMetricsService:
+    """运营看板指标服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== 事件 ====================
+
+    async def on_membership_created(self, membership: StudentMembership) -> None:
+        """新开课时账户后调用"""
+        created_at = membership.created_at or datetime.now(timezone.utc)
+        await self._apply_monthly(_month_of(created_at), new_memberships=1)
+
+    # ==================== 读取 ====================
+
+    async def get_daily(self, start: date, end: date) -> Dict[date, DailyBookingStats]:
+        """按上课日期实时统计 [start, end] 的预约数与完成数（无预约的日期不返回）"""
+        completed = func.sum(case((Booking.status == BookingStatus.COMPLETED.value, 1), else_=0))
+        result = await self.db.execute(
+            select(Booking.booking_date, func.count(Booking.id), completed)
+            .where(Booking.booking_date.between(start, end))
+            .group_by(Booking.booking_date)
+        )
+        return {
+            day: DailyBookingStats(total, completed_count or 0)
+            for day, total, completed_count in result.all()
+        }
+
+    async def get_monthly(self, months: List[str]) -> Dict[str, MonthlyStats]:
+        """读取指定月份（YYYY-MM）的营收、购买笔数（实时）与新开课时账户数（月汇总）"""
+        if not months:
+            return {}
+        months = sorted(set(months))
+        columns = []
+        for month in months:
+            in_month = (Transaction.created_at >= _month_start(month)) & (
+                Transaction.created_at < _next_month_start(month)
+            )
+            columns.append(func.sum(case((in_month, Transaction.amount), else_=0)))
+            columns.append(func.sum(case((in_month, 1), else_=0)))
+        purchases = (
+            await self.db.execute(
+                select(*columns).where(
+                    Transaction.type == TransactionType.PURCHASE.value,
+                    Transaction.created_at >= _month_start(months[0]),
+                    Transaction.created_at < _next_month_start(months[-1]),
+                )
+            )
+        ).one()
+
+        result = await self.db.execute(
+            select(DashboardMonthlyStats.month, DashboardMonthlyStats.new_memberships).where(
+                DashboardMonthlyStats.month.in_(months)
+            )
+        )
+        new_memberships = dict(result.all())
+
+        return {
+            month: MonthlyStats(
+                revenue=Decimal(str(purchases[2 * i] or 0)),
+                purchase_count=purchases[2 * i + 1] or 0,
+                new_memberships=new_memberships.get(month) or 0,
+            )
+            for i, month in enumerate(months)
+        }
+
+    # ==================== 重建 ====================
+
+    async def rebuild(self) -> int:
+        """按 student_memberships 全量重算月汇总，返回月汇总行数"""
+        counts: Dict[str, int] = {}
+        memberships = await self.db.execute(select(StudentMembership.created_at))
+        for (created_at,) in memberships.all():
+            month = _month_of(created_at)
+            counts[month] = counts.get(month, 0) + 1
+
+        await self.db.execute(delete(DashboardMonthlyStats))
+        self.db.add_all(
+            DashboardMonthlyStats(month=month, new_memberships=count)
+            for month, count in counts.items()
+        )
+        await self.db.commit()
+        return len(counts)
+
+    # ==================== 内部实现 ====================
+
+    async def _apply_monthly(self, month: str, **deltas: int) -> None:
+        values = {
+            column: getattr(DashboardMonthlyStats, column) + delta
+            for column, delta in deltas.items()
+            if delta
+        }
+        if not values:
+            return
+        await self._ensure_row(
+            DashboardMonthlyStats,
+            DashboardMonthlyStats.month == month,
+            DashboardMonthlyStats(month=month, new_memberships=0),
+        )
+        await self.db.execute(
+            update(DashboardMonthlyStats)
+            .where(DashboardMonthlyStats.month == month)
+            .values(**values)
+        )
+
+    async def _ensure_row(self, model, condition, row) -> None:
+        """确保汇总行存在"""
+        if await self.db.scalar(select(func.count()).select_from(model).where(condition)):
+            return
+        try:
+            async with self.db.begin_nested():
+                self.db.add(row)
+        except IntegrityError:
+            # 并发请求已创建汇总行
+            pass
@@ -0,0 +1,229 @@
+"""
+能量过期任务
+
+过期策略：获取满 ENERGY_EXPIRY_MONTHS 个月的能量若仍未被消费则过期（先进先出，消费优先抵扣最早
+获取的能量）。学员可过期量 = 截止日前累计获取 - 净消费（total_spent）- 已过期，且不超过当前余额；
+其中截止日前获取与已过期量均读取 energy_daily_stats（含已归档的历史），不扫描交易记录。
+
+按账户主键 keyset 分批：每批一次集合 CAS UPDATE（按 (id, version) 匹配，并发写入的账户在批内
+重新计算后重试），EXPIRE 交易记录与日汇总批量写入，进度检查点与本批数据同事务提交，
+单批锁持有时间与批大小相关。中断后再次运行从检查点继续；同一截止日已完成则直接返回。
+"""
+
+from datetime import date
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+from sqlalchemy import case, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.periods import utc_now_naive
+from app.models.energy import (
+    EnergyAccount,
+    EnergyDailyStats,
+    EnergyTransaction,
+    EnergyTransactionType,
+)
+from app.models.job import JobCheckpoint
+from app.services.energy_service import MAX_CAS_RETRIES, EnergyService
+
+EXPIRY_JOB = "energy_expiry"
+
+
+class ExpiryReport(TypedDict):
+    """过期任务的运行指标"""
+
+    cutoff: Optional[date]  # 早于该日获取的能量参与过期，未启用时为 None
+    resumed_from: int  # 从该账户ID之后继续（0 表示从头开始）
+    batches: int  # 执行的批次数
+    expired_accounts: int  # 发生过期的账户数
+    expired_amount: int  # 过期能量合计
+    skipped: int  # 重试后仍有并发写入冲突、留待下次运行的账户数
+    elapsed_ms: float  # 耗时（毫秒）
+
+
+def expiry_cutoff(today: date, months: int) -> date:
+    """过期截止日：today 往前 months 个月的同一天（月末按当月最后一天）"""
+    index = today.year * 12 + today.month - 1 - months
+    year, month = index // 12, index % 12 + 1
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = (next_month - date(year, month, 1)).days
+    return date(year, month, min(today.day, last_day))
+
+
+class EnergyExpiryService:
+    """能量过期任务"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: Optional[int] = None,
+        months: Optional[int] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size or settings.ENERGY_EXPIRY_BATCH_SIZE
+        self.months = settings.ENERGY_EXPIRY_MONTHS if months is None else months
+
+    async def run(self, today: Optional[date] = None) -> ExpiryReport:
+        """执行（或继续）截止日对应的一轮过期"""
+        started = perf_counter()
+        report = ExpiryReport(
+            cutoff=None,
+            resumed_from=0,
+            batches=0,
+            expired_accounts=0,
+            expired_amount=0,
+            skipped=0,
+            elapsed_ms=0.0,
+        )
+        if self.months <= 0:
+            return report
+
+        cutoff = expiry_cutoff(today or utc_now_naive().date(), self.months)
+        report["cutoff"] = cutoff
+        checkpoint = await self._load_checkpoint(cutoff.isoformat())
+        if checkpoint.completed:
+            report["elapsed_ms"] = round((perf_counter() - started) * 1000, 1)
+            return report
+        report["resumed_from"] = last_id = checkpoint.last_id
+
+        while True:
+            account_ids = list(
+                (
+                    await self.db.execute(
+                        select(EnergyAccount.id)
+                        .where(EnergyAccount.id > last_id, EnergyAccount.balance > 0)
+                        .order_by(EnergyAccount.id)
+                        .limit(self.batch_size)
+                    )
+                ).scalars()
+            )
+            if account_ids:
+                report["batches"] += 1
+                expired, skipped = await self._expire_batch(account_ids, cutoff)
+                report["expired_accounts"] += len(expired)
+                report["expired_amount"] += sum(expired.values())
+                report["skipped"] += skipped
+                last_id = account_ids[-1]
+
+            checkpoint.last_id = last_id
+            checkpoint.completed = len(account_ids) < self.batch_size
+            await self.db.commit()
+            if checkpoint.completed:
+                break
+
+        report["elapsed_ms"] = round((perf_counter() - started) * 1000, 1)
+        return report
+
+    # ==================== 内部实现 ====================
+
+    async def _load_checkpoint(self, run_key: str) -> JobCheckpoint:
+        checkpoint = await self.db.get(JobCheckpoint, EXPIRY_JOB, populate_existing=True)
+        if checkpoint is None:
+            checkpoint = JobCheckpoint(name=EXPIRY_JOB, run_key=run_key, last_id=0)
+            self.db.add(checkpoint)
+        elif checkpoint.run_key != run_key:
+            checkpoint.run_key = run_key
+            checkpoint.last_id = 0
+            checkpoint.completed = False
+        await self.db.flush()
+        return checkpoint
+
+    async def _expire_batch(
+        self, account_ids: List[int], cutoff: date
+    ) -> Tuple[Dict[int, int], int]:
+        """过期一批账户，返回（学员 -> 过期量, 放弃的账户数）"""
+        expired: Dict[int, int] = {}
+        pending = account_ids
+        for _ in range(MAX_CAS_RETRIES):
+            plan = await self._plan(pending, cutoff)
+            if not plan:
+                return expired, 0
+
+            amount_by_id = case(
+                {account_id: amount for account_id, (_, _, amount) in plan.items()},
+                value=EnergyAccount.id,
+            )
+            result = await self.db.execute(
+                update(EnergyAccount)
+                .where(
+                    tuple_(EnergyAccount.id, EnergyAccount.version).in_(
+                        [(account_id, version) for account_id, (_, version, _) in plan.items()]
+                    )
+                )
+                .values(
+                    balance=EnergyAccount.balance - amount_by_id,
+                    version=EnergyAccount.version + 1,
+                    updated_at=utc_now_naive(),
+                )
+                .returning(EnergyAccount.id, EnergyAccount.student_id, EnergyAccount.balance)
+                .execution_options(synchronize_session=False)
+            )
+            updated = result.all()
+
+            if updated:
+                await self.db.execute(
+                    insert(EnergyTransaction),
+                    [
+                        {
+                            "account_id": account_id,
+                            "student_id": student_id,
+                            "type": EnergyTransactionType.EXPIRE.value,
+                            "amount": -plan[account_id][2],
+                            "balance_after": balance,
+                            "description": f"{cutoff.isoformat()} 前获取的能量过期",
+                            "created_at": utc_now_naive(),
+                        }
+                        for account_id, student_id, balance in updated
+                    ],
+                )
+                batch_expired = {
+                    student_id: plan[account_id][2] for account_id, student_id, _ in updated
+                }
+                await EnergyService.bump_daily_stats(self.db, "expired", batch_expired)
+                expired.update(batch_expired)
+
+            done = {account_id for account_id, _, _ in updated}
+            pending = [account_id for account_id in plan if account_id not in done]
+            if not pending:
+                return expired, 0
+        return expired, len(pending)
+
+    async def _plan(
+        self, account_ids: List[int], cutoff: date
+    ) -> Dict[int, Tuple[int, int, int]]:
+        """计算账户可过期量，返回 {账户ID: (学员ID, 版本号, 过期量)}（仅含过期量大于 0 的账户）"""
+        rollup = (
+            select(
+                EnergyDailyStats.student_id,
+                func.sum(
+                    case((EnergyDailyStats.stat_date < cutoff, EnergyDailyStats.earned), else_=0)
+                ).label("earned_before"),
+                func.sum(EnergyDailyStats.expired).label("expired"),
+            )
+            .join(EnergyAccount, EnergyAccount.student_id == EnergyDailyStats.student_id)
+            .where(EnergyAccount.id.in_(account_ids))
+            .group_by(EnergyDailyStats.student_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(
+                EnergyAccount.id,
+                EnergyAccount.student_id,
+                EnergyAccount.version,
+                EnergyAccount.balance,
+                EnergyAccount.total_spent,
+                rollup.c.earned_before,
+                rollup.c.expired,
+            )
+            .join(rollup, rollup.c.student_id == EnergyAccount.student_id)
+            .where(EnergyAccount.id.in_(account_ids))
+        )
+
+        plan: Dict[int, Tuple[int, int, int]] = {}
+        for account_id, student_id, version, balance, spent, earned_before, done in result.all():
+            amount = min(balance, (earned_before or 0) - (spent or 0) - (done or 0))
+            if amount > 0:
+                plan[account_id] = (student_id, version, amount)
+        return plan
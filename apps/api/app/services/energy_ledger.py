@@ -0,0 +1,127 @@
+"""
+能量交易记录归档
+
+energy_transactions 只追加不修改。归档任务将热数据窗口（ENERGY_LEDGER_HOT_MONTHS 个自然月，
+含当月）之前的记录按主键分批迁入 energy_transactions_archive（保留原ID），并按学员、类型累加
+energy_archive_counts，使热表及其 (student_id, created_at) 索引的大小与保留窗口相关而与历史
+总量无关。EnergyService.get_transactions 先读热表，翻页超出热数据时才继续读归档表。
+
+PostgreSQL 原生分区要求主键包含分区键，与现有自增主键及 ORM 映射不兼容，因此各方言统一
+采用归档表方案。
+"""
+
+from datetime import date, datetime
+from time import perf_counter
+from typing import Optional, TypedDict
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.energy import EnergyArchiveCount, EnergyTransaction, EnergyTransactionArchive
+
+# 归档与交易记录表共有的列（按列名对应）
+_LEDGER_COLUMNS = [column.name for column in EnergyTransactionArchive.__table__.columns]
+
+
+class ArchiveReport(TypedDict):
+    """归档任务的运行指标"""
+
+    cutoff: date  # 早于该日的记录被归档
+    batches: int  # 执行的批次数
+    moved: int  # 迁移的记录数
+    elapsed_ms: float  # 耗时（毫秒）
+
+
+def hot_window_start(today: date, hot_months: Optional[int] = None) -> date:
+    """热数据窗口起始日（当月往前 hot_months - 1 个月的 1 日）
+
+    至少保留两个月，保证跨月的本周统计与周期计数重建只需读取热表。
+    """
+    months = max(hot_months or settings.ENERGY_LEDGER_HOT_MONTHS, 2)
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class EnergyLedgerArchiver:
+    """能量交易记录归档任务"""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: Optional[int] = None,
+        hot_months: Optional[int] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size or settings.ENERGY_LEDGER_ARCHIVE_BATCH_SIZE
+        self.hot_months = hot_months
+
+    async def archive_cold_months(self, today: Optional[date] = None) -> ArchiveReport:
+        """将热数据窗口之前的交易记录迁入归档表，每批单独提交"""
+        cutoff = hot_window_start(today or date.today(), self.hot_months)
+        cutoff_at = datetime.combine(cutoff, datetime.min.time())
+        started = perf_counter()
+        batches = moved = 0
+
+        while True:
+            ids = list(
+                (
+                    await self.db.execute(
+                        select(EnergyTransaction.id)
+                        .where(EnergyTransaction.created_at < cutoff_at)
+                        .order_by(EnergyTransaction.id)
+                        .limit(self.batch_size)
+                    )
+                ).scalars()
+            )
+            if not ids:
+                break
+            batches += 1
+
+            columns = [getattr(EnergyTransaction, name) for name in _LEDGER_COLUMNS]
+            await self.db.execute(
+                insert(EnergyTransactionArchive).from_select(
+                    _LEDGER_COLUMNS, select(*columns).where(EnergyTransaction.id.in_(ids))
+                )
+            )
+            counts = (
+                await self.db.execute(
+                    select(
+                        EnergyTransaction.student_id,
+                        EnergyTransaction.type,
+                        func.count(EnergyTransaction.id),
+                    )
+                    .where(EnergyTransaction.id.in_(ids))
+                    .group_by(EnergyTransaction.student_id, EnergyTransaction.type)
+                )
+            ).all()
+            stmt = dialect_insert(self.db)(EnergyArchiveCount).values(
+                [
+                    {"student_id": student_id, "type": tx_type, "count": count}
+                    for student_id, tx_type, count in counts
+                ]
+            )
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["student_id", "type"],
+                    set_={"count": EnergyArchiveCount.count + stmt.excluded.count},
+                )
+            )
+            await self.db.execute(
+                delete(EnergyTransaction)
+                .where(EnergyTransaction.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+            moved += len(ids)
+
+            if len(ids) < self.batch_size:
+                break
+
+        return ArchiveReport(
+            cutoff=cutoff,
+            batches=batches,
+            moved=moved,
+            elapsed_ms=round((perf_counter() - started) * 1000, 1),
+        )
@@ -0,0 +1,159 @@
+"""
+能量规则进程内注册表
+
+规则表数据量小且很少变更，获取能量时的规则元数据从进程内快照读取，不访问数据库。
+各进程每隔 ENERGY_RULE_CACHE_POLL_SECONDS 轮询一次 cache_versions 中的版本号，
+版本变化时整表重载；规则变更后调用 bump_version（或运行
+python -m scripts.reload_energy_rules）即可让所有 worker 在一个轮询周期内生效。
+快照中不存在的规则代码按代码单独点查一次并补入快照（新增规则无需等待轮询）。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from time import monotonic
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.cache import CacheVersion
+from app.models.energy import EnergyRule
+
+ENERGY_RULES_CACHE = "energy_rules"
+
+
+@dataclass(frozen=True)
+class RuleSnapshot:
+    """能量规则只读快照（字段同 EnergyRule）"""
+
+    id: int
+    name: str
+    code: str
+    source_type: str
+    points: int
+    multiplier: float
+    daily_limit: Optional[int]
+    weekly_limit: Optional[int]
+    monthly_limit: Optional[int]
+    description: Optional[str]
+    is_active: bool
+    sort_order: int
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, rule: EnergyRule) -> "RuleSnapshot":
+        return cls(
+            id=rule.id,
+            name=rule.name,
+            code=rule.code,
+            source_type=rule.source_type,
+            points=rule.points,
+            multiplier=float(rule.multiplier if rule.multiplier is not None else 1),
+            daily_limit=rule.daily_limit,
+            weekly_limit=rule.weekly_limit,
+            monthly_limit=rule.monthly_limit,
+            description=rule.description,
+            is_active=bool(rule.is_active),
+            sort_order=rule.sort_order or 0,
+            created_at=rule.created_at,
+        )
+
+
+class EnergyRuleRegistry:
+    """按版本号轮询失效的能量规则注册表（仅包含启用的规则）"""
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self._rules: Dict[str, RuleSnapshot] = {}
+        self._version: Optional[int] = None
+        self._next_poll = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession, code: str) -> Optional[RuleSnapshot]:
+        """按代码获取启用的规则"""
+        await self._ensure_fresh(db)
+        rule = self._rules.get(code)
+        if rule is not None:
+            return rule
+
+        result = await db.execute(
+            select(EnergyRule).where(EnergyRule.code == code, EnergyRule.is_active.is_(True))
+        )
+        model = result.scalar_one_or_none()
+        if model is None:
+            return None
+        rule = RuleSnapshot.from_model(model)
+        self._rules[code] = rule
+        return rule
+
+    async def list_active(self, db: AsyncSession) -> List[RuleSnapshot]:
+        """全部启用的规则（按 sort_order 排序）"""
+        await self._ensure_fresh(db)
+        return sorted(self._rules.values(), key=lambda rule: (rule.sort_order, rule.id))
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """读取当前版本号并整表重载（应用启动时预热）"""
+        async with self._lock:
+            await self._reload(db, await self._read_version(db))
+
+    def clear(self) -> None:
+        """丢弃本地快照，下次访问时重载"""
+        self._rules = {}
+        self._version = None
+        self._next_poll = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    async def bump_version(db: AsyncSession) -> None:
+        """规则变更后递增版本号（随调用方事务提交），各进程在下一轮询周期重载"""
+        result = await db.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == ENERGY_RULES_CACHE)
+            .values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount:
+            return
+        try:
+            async with db.begin_nested():
+                db.add(CacheVersion(name=ENERGY_RULES_CACHE, version=1))
+        except IntegrityError:
+            # 并发请求已创建版本行
+            await db.execute(
+                update(CacheVersion)
+                .where(CacheVersion.name == ENERGY_RULES_CACHE)
+                .values(version=CacheVersion.version + 1)
+            )
+
+    # ==================== 内部实现 ====================
+
+    async def _ensure_fresh(self, db: AsyncSession) -> None:
+        if self._version is not None and monotonic() < self._next_poll:
+            return
+        async with self._lock:
+            if self._version is not None and monotonic() < self._next_poll:
+                return
+            version = await self._read_version(db)
+            if version != self._version:
+                await self._reload(db, version)
+            else:
+                self._next_poll = monotonic() + self.poll_seconds
+
+    async def _read_version(self, db: AsyncSession) -> int:
+        version = await db.scalar(
+            select(CacheVersion.version).where(CacheVersion.name == ENERGY_RULES_CACHE)
+        )
+        return version or 0
+
+    async def _reload(self, db: AsyncSession, version: int) -> None:
+        result = await db.execute(select(EnergyRule).where(EnergyRule.is_active.is_(True)))
+        self._rules = {
+            rule.code: RuleSnapshot.from_model(rule) for rule in result.scalars().all()
+        }
+        self._version = version
+        self._next_poll = monotonic() + self.poll_seconds
+
+
+energy_rule_registry = EnergyRuleRegistry(settings.ENERGY_RULE_CACHE_POLL_SECONDS)
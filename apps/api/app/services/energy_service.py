@@ -3,28 +3,44 @@
 """
 
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple, TypedDict, cast
+from datetime import date, datetime
+from typing import (
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+    cast,
+)
 
-from sqlalchemy import and_, func, select, update
+from sqlalchemy import ColumnElement, Date, and_, case, delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.periods import period_buckets, utc_now_naive
 from app.models.energy import (
     ENERGY_LEVELS,
     EnergyAccount,
-    EnergyRule,
+    EnergyArchiveCount,
+    EnergyDailyStats,
+    EnergyRuleCounter,
     EnergyTransaction,
+    EnergyTransactionArchive,
     EnergyTransactionType,
 )
+from app.models.user import Student
+from app.services.energy_rules import RuleSnapshot, energy_rule_registry
+from app.services.leaderboard_index import leaderboard_index
 
 logger = logging.getLogger(__name__)
 MAX_CAS_RETRIES = 3
 
 
-def _utc_now_naive() -> datetime:
-    return datetime.now(timezone.utc).replace(tzinfo=None)
-
-
 class AccountSnapshot(TypedDict):
     id: int
     balance: int
@@ -34,6 +50,36 @@ class AccountSnapshot(TypedDict):
     version: int
 
 
+class EarnOutcome(TypedDict):
+    student_id: int
+    success: bool
+    amount: int
+    balance: int
+    message: str
+
+
+def _level_after(new_total_earned: ColumnElement[int]) -> ColumnElement[int]:
+    """按新的累计获取计算等级的 SQL 表达式（等级只升不降）"""
+    level_by_total = case(
+        *[
+            (new_total_earned >= int(info["min_points"]), lvl)
+            for lvl, info in sorted(ENERGY_LEVELS.items(), reverse=True)
+        ],
+        else_=1,
+    )
+    return case(
+        (level_by_total > EnergyAccount.level, level_by_total), else_=EnergyAccount.level
+    )
+
+
+# 规则上限字段 -> (周期, 提示前缀)
+_RULE_LIMITS = (
+    ("daily_limit", "day", "今日"),
+    ("weekly_limit", "week", "本周"),
+    ("monthly_limit", "month", "本月"),
+)
+
+
 class EnergyService:
     """能量系统服务"""
 
@@ -69,7 +115,7 @@ class EnergyService:
             "total_earned": EnergyAccount.total_earned + total_earned_delta,
             "total_spent": EnergyAccount.total_spent + total_spent_delta,
             "version": EnergyAccount.version + 1,
-            "updated_at": _utc_now_naive(),
+            "updated_at": utc_now_naive(),
         }
         if new_level is not None:
             values["level"] = new_level
@@ -97,6 +143,104 @@ class EnergyService:
             return None
         return cast(AccountSnapshot, cast(object, dict(row)))
 
+    @staticmethod
+    async def _lock_account(db: AsyncSession, student_id: int) -> None:
+        """serialized 模式下锁定学员账户行（SELECT ... FOR UPDATE），持有到调用方提交或回滚
+
+        行锁由数据库持有，跨 worker 有效，上限检查与余额写入在同一把锁下完成；
+        同一事务内先后锁定多个学员时，锁顺序冲突交由数据库死锁检测处理。
+        """
+        if settings.ENERGY_ACCOUNT_UPDATE_MODE != "serialized":
+            return
+        await EnergyService.get_or_create_account(db, student_id)
+        await db.execute(
+            select(EnergyAccount.id)
+            .where(EnergyAccount.student_id == student_id)
+            .with_for_update()
+        )
+
+    @staticmethod
+    async def _update_account(
+        db: AsyncSession,
+        student_id: int,
+        balance_delta: int,
+        total_earned_delta: int = 0,
+        total_spent_delta: int = 0,
+    ) -> Optional[AccountSnapshot]:
+        """
+        按 ENERGY_ACCOUNT_UPDATE_MODE 累加账户余额，成功返回最新快照
+
+        cas: 读取快照后按版本号更新，冲突时重试 MAX_CAS_RETRIES 次；
+        serialized: 单条条件 UPDATE 原子累加，不依赖读到的快照，不会因并发写入失败。
+        扣减后余额为负或重试耗尽时返回 None。
+        """
+        if settings.ENERGY_ACCOUNT_UPDATE_MODE == "serialized":
+            return await EnergyService._atomic_update_account(
+                db, student_id, balance_delta, total_earned_delta, total_spent_delta
+            )
+
+        for _ in range(MAX_CAS_RETRIES):
+            snapshot = await EnergyService._get_account_snapshot(db, student_id)
+            if not snapshot:
+                await EnergyService.get_or_create_account(db, student_id)
+                continue
+            if snapshot["balance"] + balance_delta < 0:
+                return None
+
+            new_level = None
+            if total_earned_delta:
+                new_total_earned = snapshot["total_earned"] + total_earned_delta
+                new_level = max(snapshot["level"], EnergyService.calculate_level(new_total_earned))
+            updated = await EnergyService._cas_update_account(
+                db,
+                account_id=snapshot["id"],
+                expected_version=snapshot["version"],
+                balance_delta=balance_delta,
+                total_earned_delta=total_earned_delta,
+                total_spent_delta=total_spent_delta,
+                new_level=new_level,
+            )
+            if updated:
+                return updated
+        return None
+
+    @staticmethod
+    async def _atomic_update_account(
+        db: AsyncSession,
+        student_id: int,
+        balance_delta: int,
+        total_earned_delta: int = 0,
+        total_spent_delta: int = 0,
+    ) -> Optional[AccountSnapshot]:
+        """单条条件 UPDATE 累加账户（扣减时要求余额充足），余额不足返回 None"""
+        values: dict[str, object] = {
+            "balance": EnergyAccount.balance + balance_delta,
+            "total_earned": EnergyAccount.total_earned + total_earned_delta,
+            "total_spent": EnergyAccount.total_spent + total_spent_delta,
+            "version": EnergyAccount.version + 1,
+            "updated_at": utc_now_naive(),
+        }
+        if total_earned_delta:
+            values["level"] = _level_after(EnergyAccount.total_earned + total_earned_delta)
+
+        stmt = update(EnergyAccount).where(EnergyAccount.student_id == student_id)
+        if balance_delta < 0:
+            stmt = stmt.where(EnergyAccount.balance >= -balance_delta)
+        result = await db.execute(
+            stmt.values(**values).returning(
+                EnergyAccount.id,
+                EnergyAccount.balance,
+                EnergyAccount.total_earned,
+                EnergyAccount.total_spent,
+                EnergyAccount.level,
+                EnergyAccount.version,
+            )
+        )
+        row = result.mappings().one_or_none()
+        if not row:
+            return None
+        return cast(AccountSnapshot, cast(object, dict(row)))
+
     @staticmethod
     async def get_or_create_account(db: AsyncSession, student_id: int) -> EnergyAccount:
         """获取或创建能量账户"""
@@ -136,71 +280,193 @@ class EnergyService:
         }
 
     @staticmethod
-    async def get_rule_by_code(db: AsyncSession, code: str) -> Optional[EnergyRule]:
-        """根据代码获取积分规则"""
+    async def get_rule_by_code(db: AsyncSession, code: str) -> Optional[RuleSnapshot]:
+        """根据代码获取积分规则（读取进程内规则注册表）"""
+        return await energy_rule_registry.get(db, code)
+
+    @staticmethod
+    async def check_limit(
+        db: AsyncSession, student_id: int, rule: RuleSnapshot
+    ) -> Tuple[bool, str]:
+        """检查积分获取限制（读取周期计数，至多三行主键点查）"""
+        rejected = await EnergyService._check_limits_batch(db, [student_id], rule)
+        if student_id in rejected:
+            return False, rejected[student_id]
+        return True, ""
+
+    @staticmethod
+    async def _check_limits_batch(
+        db: AsyncSession, student_ids: List[int], rule: RuleSnapshot
+    ) -> Dict[int, str]:
+        """按周期计数判定多名学员的获取上限，返回已达上限的学员及提示"""
+        buckets = period_buckets(utc_now_naive())
+        limits = [
+            (getattr(rule, field), period, label)
+            for field, period, label in _RULE_LIMITS
+            if getattr(rule, field)
+        ]
+        if not limits or not student_ids:
+            return {}
+
         result = await db.execute(
-            select(EnergyRule).where(and_(EnergyRule.code == code, EnergyRule.is_active.is_(True)))
+            select(
+                EnergyRuleCounter.student_id, EnergyRuleCounter.period, EnergyRuleCounter.amount
+            ).where(
+                EnergyRuleCounter.student_id.in_(student_ids),
+                EnergyRuleCounter.rule_id == rule.id,
+                tuple_(EnergyRuleCounter.period, EnergyRuleCounter.bucket_start).in_(
+                    [(period, buckets[period]) for _, period, _ in limits]
+                ),
+            )
         )
-        return result.scalar_one_or_none()
+        earned = {(student_id, period): amount for student_id, period, amount in result.all()}
+
+        rejected: Dict[int, str] = {}
+        for student_id in student_ids:
+            for limit, period, label in limits:
+                if earned.get((student_id, period), 0) >= limit:
+                    rejected[student_id] = f"{label}已达上限 {limit} 能量"
+                    break
+        return rejected
 
     @staticmethod
-    async def check_limit(db: AsyncSession, student_id: int, rule: EnergyRule) -> Tuple[bool, str]:
-        """检查积分获取限制"""
-        now = _utc_now_naive()
+    async def _bump_period_counters(
+        db: AsyncSession, student_ids: List[int], rule_id: int, amount: int
+    ) -> None:
+        """累加学员在当前日/周/月周期桶内的规则获取量（与获取记录同事务）"""
+        if not student_ids:
+            return
+        rows = [
+            {
+                "student_id": student_id,
+                "rule_id": rule_id,
+                "period": period,
+                "bucket_start": bucket_start,
+                "amount": amount,
+            }
+            for student_id in student_ids
+            for period, bucket_start in period_buckets(utc_now_naive()).items()
+        ]
+
+        stmt = dialect_insert(db)(EnergyRuleCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "rule_id", "period", "bucket_start"],
+            set_={"amount": EnergyRuleCounter.amount + stmt.excluded.amount},
+        )
+        await db.execute(stmt)
 
-        # 检查每日限制
-        if rule.daily_limit:
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            result = await db.execute(
-                select(func.sum(EnergyTransaction.amount)).where(
-                    and_(
-                        EnergyTransaction.student_id == student_id,
-                        EnergyTransaction.rule_id == rule.id,
-                        EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                        EnergyTransaction.created_at >= today_start,
-                    )
+    @staticmethod
+    async def bump_daily_stats(db: AsyncSession, column: str, amounts: Mapping[int, int]) -> None:
+        """累加学员当日的获取/消费/退还/过期汇总（与交易记录同事务），amounts 为学员 -> 数量"""
+        if not amounts:
+            return
+        today = utc_now_naive().date()
+        stmt = dialect_insert(db)(EnergyDailyStats).values(
+            [
+                {"student_id": student_id, "stat_date": today, column: amount}
+                for student_id, amount in amounts.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "stat_date"],
+            set_={column: getattr(EnergyDailyStats, column) + getattr(stmt.excluded, column)},
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def rebuild_daily_stats(db: AsyncSession, since: Optional[date] = None) -> int:
+        """按交易记录（含归档）重算 since（含）之后的日汇总，未指定时全量重建，返回写入的行数"""
+        totals: Dict[Tuple[int, date], List[int]] = {}
+        for ledger in (EnergyTransaction, EnergyTransactionArchive):
+            stat_date = func.date(ledger.created_at, type_=Date)
+            query = select(
+                ledger.student_id,
+                stat_date,
+                *[
+                    func.sum(case((ledger.type == tx_type.value, amount), else_=0))
+                    for tx_type, amount in [
+                        (EnergyTransactionType.EARN, ledger.amount),
+                        (EnergyTransactionType.SPEND, -ledger.amount),
+                        (EnergyTransactionType.REFUND, ledger.amount),
+                        (EnergyTransactionType.EXPIRE, -ledger.amount),
+                    ]
+                ],
+            ).where(
+                ledger.type.in_(
+                    [
+                        EnergyTransactionType.EARN.value,
+                        EnergyTransactionType.SPEND.value,
+                        EnergyTransactionType.REFUND.value,
+                        EnergyTransactionType.EXPIRE.value,
+                    ]
                 )
             )
-            today_earned = result.scalar() or 0
-            if today_earned >= rule.daily_limit:
-                return False, f"今日已达上限 {rule.daily_limit} 能量"
-
-        # 检查每周限制
-        if rule.weekly_limit:
-            week_start = now - timedelta(days=now.weekday())
-            week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            result = await db.execute(
-                select(func.sum(EnergyTransaction.amount)).where(
-                    and_(
-                        EnergyTransaction.student_id == student_id,
-                        EnergyTransaction.rule_id == rule.id,
-                        EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                        EnergyTransaction.created_at >= week_start,
-                    )
+            if since is not None:
+                query = query.where(
+                    ledger.created_at >= datetime.combine(since, datetime.min.time())
                 )
+            result = await db.execute(query.group_by(ledger.student_id, stat_date))
+            for student_id, day, *amounts in result.all():
+                row = totals.setdefault((student_id, day), [0, 0, 0, 0])
+                for index, amount in enumerate(amounts):
+                    row[index] += amount or 0
+
+        clear = delete(EnergyDailyStats)
+        if since is not None:
+            clear = clear.where(EnergyDailyStats.stat_date >= since)
+        await db.execute(clear)
+        if totals:
+            await db.execute(
+                insert(EnergyDailyStats),
+                [
+                    {
+                        "student_id": student_id,
+                        "stat_date": day,
+                        "earned": earned,
+                        "spent": spent,
+                        "refunded": refunded,
+                        "expired": expired,
+                    }
+                    for (student_id, day), (earned, spent, refunded, expired) in totals.items()
+                ],
             )
-            week_earned = result.scalar() or 0
-            if week_earned >= rule.weekly_limit:
-                return False, f"本周已达上限 {rule.weekly_limit} 能量"
+        await db.commit()
+        return len(totals)
 
-        # 检查每月限制
-        if rule.monthly_limit:
-            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    @staticmethod
+    async def rebuild_period_counters(db: AsyncSession) -> int:
+        """按获取记录重算当前周期桶的计数并清理过期桶，返回写入的计数行数"""
+        await db.execute(delete(EnergyRuleCounter))
+
+        counters = []
+        for period, bucket_start in period_buckets(utc_now_naive()).items():
             result = await db.execute(
-                select(func.sum(EnergyTransaction.amount)).where(
-                    and_(
-                        EnergyTransaction.student_id == student_id,
-                        EnergyTransaction.rule_id == rule.id,
-                        EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                        EnergyTransaction.created_at >= month_start,
-                    )
+                select(
+                    EnergyTransaction.student_id,
+                    EnergyTransaction.rule_id,
+                    func.sum(EnergyTransaction.amount),
                 )
+                .where(
+                    EnergyTransaction.type == EnergyTransactionType.EARN.value,
+                    EnergyTransaction.rule_id.is_not(None),
+                    EnergyTransaction.created_at
+                    >= datetime.combine(bucket_start, datetime.min.time()),
+                )
+                .group_by(EnergyTransaction.student_id, EnergyTransaction.rule_id)
             )
-            month_earned = result.scalar() or 0
-            if month_earned >= rule.monthly_limit:
-                return False, f"本月已达上限 {rule.monthly_limit} 能量"
-
-        return True, ""
+            counters.extend(
+                EnergyRuleCounter(
+                    student_id=student_id,
+                    rule_id=rule_id,
+                    period=period,
+                    bucket_start=bucket_start,
+                    amount=amount,
+                )
+                for student_id, rule_id, amount in result.all()
+            )
+        db.add_all(counters)
+        await db.commit()
+        return len(counters)
 
     @staticmethod
     async def earn(
@@ -222,6 +488,7 @@ class EnergyService:
         if not rule:
             return False, 0, 0, f"积分规则 {rule_code} 不存在"
 
+        await EnergyService._lock_account(db, student_id)
         # 检查限制
         can_earn, limit_msg = await EnergyService.check_limit(db, student_id, rule)
         if not can_earn:
@@ -233,45 +500,163 @@ class EnergyService:
         # 计算积分
         amount = int(rule.points * float(rule.multiplier))
 
-        for _ in range(MAX_CAS_RETRIES):
-            snapshot = await EnergyService._get_account_snapshot(db, student_id)
-            if not snapshot:
-                await EnergyService.get_or_create_account(db, student_id)
-                continue
+        updated = await EnergyService._update_account(
+            db, student_id, balance_delta=amount, total_earned_delta=amount
+        )
+        if not updated:
+            return False, 0, 0, "系统繁忙，请稍后重试"
+
+        transaction = EnergyTransaction(
+            account_id=updated["id"],
+            student_id=student_id,
+            type=EnergyTransactionType.EARN.value,
+            source_type=rule.source_type,
+            amount=amount,
+            balance_after=updated["balance"],
+            rule_id=rule.id,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            description=description or rule.name,
+        )
+        db.add(transaction)
+        await EnergyService._bump_period_counters(db, [student_id], rule.id, amount)
+        await EnergyService.bump_daily_stats(db, "earned", {student_id: amount})
+        leaderboard_index.record(db, {student_id: amount})
 
-            new_total_earned = snapshot["total_earned"] + amount
-            new_level = max(snapshot["level"], EnergyService.calculate_level(new_total_earned))
-            updated = await EnergyService._cas_update_account(
-                db,
-                account_id=snapshot["id"],
-                expected_version=snapshot["version"],
-                balance_delta=amount,
-                total_earned_delta=amount,
-                new_level=new_level,
-            )
-            if not updated:
-                continue
+        await db.flush()
 
-            transaction = EnergyTransaction(
-                account_id=snapshot["id"],
-                student_id=student_id,
-                type=EnergyTransactionType.EARN.value,
-                source_type=rule.source_type,
-                amount=amount,
-                balance_after=updated["balance"],
-                rule_id=rule.id,
-                reference_type=reference_type,
-                reference_id=reference_id,
-                description=description or rule.name,
+        logger.info(f"Student {student_id} earned {amount} energy via {rule_code}")
+        return True, amount, updated["balance"], f"获得 {amount} 能量"
+
+    @staticmethod
+    async def earn_batch(
+        db: AsyncSession,
+        rule_code: str,
+        student_ids: Sequence[int],
+        reference_type: Optional[str] = None,
+        reference_id: Optional[int] = None,
+        description: Optional[str] = None,
+    ) -> List[EarnOutcome]:
+        """
+        批量获取能量积分（如整班签到）
+
+        一次查询读取所有学员的周期计数判定上限，一次集合 UPDATE ... RETURNING 更新余额，
+        交易记录一次批量插入、周期计数一次批量累加。返回按学员的结果（顺序同入参，重复学员只处理一次）。
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        rule = await EnergyService.get_rule_by_code(db, rule_code)
+        if not rule:
+            return [
+                EarnOutcome(
+                    student_id=student_id,
+                    success=False,
+                    amount=0,
+                    balance=0,
+                    message=f"积分规则 {rule_code} 不存在",
+                )
+                for student_id in student_ids
+            ]
+
+        known = set(
+            (await db.execute(select(Student.id).where(Student.id.in_(student_ids)))).scalars()
+        )
+        rejected = {
+            student_id: "学员不存在" for student_id in student_ids if student_id not in known
+        }
+        rejected.update(await EnergyService._check_limits_batch(db, list(known), rule))
+        outcomes: Dict[int, EarnOutcome] = {
+            student_id: EarnOutcome(
+                student_id=student_id, success=False, amount=0, balance=0, message=message
             )
-            db.add(transaction)
+            for student_id, message in rejected.items()
+        }
+        eligible = [student_id for student_id in student_ids if student_id not in outcomes]
 
-            await db.flush()
+        if eligible:
+            await EnergyService._ensure_accounts(db, eligible)
+            amount = int(rule.points * float(rule.multiplier))
+            new_total = EnergyAccount.total_earned + amount
+            result = await db.execute(
+                update(EnergyAccount)
+                .where(EnergyAccount.student_id.in_(eligible))
+                .values(
+                    balance=EnergyAccount.balance + amount,
+                    total_earned=new_total,
+                    level=_level_after(new_total),
+                    version=EnergyAccount.version + 1,
+                    updated_at=utc_now_naive(),
+                )
+                .returning(EnergyAccount.id, EnergyAccount.student_id, EnergyAccount.balance)
+                .execution_options(synchronize_session=False)
+            )
+            updated = result.all()
+
+            await db.execute(
+                insert(EnergyTransaction),
+                [
+                    {
+                        "account_id": account_id,
+                        "student_id": student_id,
+                        "type": EnergyTransactionType.EARN.value,
+                        "source_type": rule.source_type,
+                        "amount": amount,
+                        "balance_after": balance,
+                        "rule_id": rule.id,
+                        "reference_type": reference_type,
+                        "reference_id": reference_id,
+                        "description": description or rule.name,
+                        "created_at": utc_now_naive(),
+                    }
+                    for account_id, student_id, balance in updated
+                ],
+            )
+            earned_ids = [student_id for _, student_id, _ in updated]
+            await EnergyService._bump_period_counters(db, earned_ids, rule.id, amount)
+            await EnergyService.bump_daily_stats(
+                db, "earned", dict.fromkeys(earned_ids, amount)
+            )
+            leaderboard_index.record(
+                db, {student_id: amount for _, student_id, _ in updated}
+            )
+            for _, student_id, balance in updated:
+                outcomes[student_id] = EarnOutcome(
+                    student_id=student_id,
+                    success=True,
+                    amount=amount,
+                    balance=balance,
+                    message=f"获得 {amount} 能量",
+                )
+            logger.info(
+                f"{len(updated)} students earned {amount} energy via {rule_code} (batch)"
+            )
 
-            logger.info(f"Student {student_id} earned {amount} energy via {rule_code}")
-            return True, amount, updated["balance"], f"获得 {amount} 能量"
+        return [outcomes[student_id] for student_id in student_ids]
 
-        return False, 0, 0, "系统繁忙，请稍后重试"
+    @staticmethod
+    async def _ensure_accounts(db: AsyncSession, student_ids: List[int]) -> None:
+        """为尚无能量账户的学员批量建账"""
+        existing = set(
+            (
+                await db.execute(
+                    select(EnergyAccount.student_id).where(
+                        EnergyAccount.student_id.in_(student_ids)
+                    )
+                )
+            ).scalars()
+        )
+        missing = [student_id for student_id in student_ids if student_id not in existing]
+        if not missing:
+            return
+        try:
+            async with db.begin_nested():
+                db.add_all(
+                    EnergyAccount(student_id=student_id, balance=0, level=1)
+                    for student_id in missing
+                )
+        except IntegrityError:
+            # 并发请求已为部分学员建账，逐个补齐
+            for student_id in missing:
+                await EnergyService.get_or_create_account(db, student_id)
 
     @staticmethod
     async def spend(
@@ -288,49 +673,38 @@ class EnergyService:
         Returns:
             (success, amount, balance, message)
         """
+        await EnergyService._lock_account(db, student_id)
         await EnergyService.get_or_create_account(db, student_id)
 
-        for _ in range(MAX_CAS_RETRIES):
-            snapshot = await EnergyService._get_account_snapshot(db, student_id)
-            if not snapshot:
-                await EnergyService.get_or_create_account(db, student_id)
-                continue
-
-            if snapshot["balance"] < amount:
-                return False, 0, snapshot["balance"], f"能量不足，当前余额 {snapshot['balance']}"
-
-            updated = await EnergyService._cas_update_account(
-                db,
-                account_id=snapshot["id"],
-                expected_version=snapshot["version"],
-                balance_delta=-amount,
-                total_spent_delta=amount,
-            )
-            if not updated:
-                continue
-
-            transaction = EnergyTransaction(
-                account_id=snapshot["id"],
-                student_id=student_id,
-                type=EnergyTransactionType.SPEND.value,
-                amount=-amount,
-                balance_after=updated["balance"],
-                reference_type=reference_type,
-                reference_id=reference_id,
-                description=description or "能量消费",
-            )
-            db.add(transaction)
+        updated = await EnergyService._update_account(
+            db, student_id, balance_delta=-amount, total_spent_delta=amount
+        )
+        if not updated:
+            latest = await EnergyService._get_account_snapshot(db, student_id)
+            latest_balance = latest["balance"] if latest else 0
+            if latest_balance < amount:
+                return False, 0, latest_balance, f"能量不足，当前余额 {latest_balance}"
+            return False, 0, latest_balance, "系统繁忙，请稍后重试"
+
+        transaction = EnergyTransaction(
+            account_id=updated["id"],
+            student_id=student_id,
+            type=EnergyTransactionType.SPEND.value,
+            amount=-amount,
+            balance_after=updated["balance"],
+            reference_type=reference_type,
+            reference_id=reference_id,
+            description=description or "能量消费",
+        )
+        db.add(transaction)
+        await EnergyService.bump_daily_stats(db, "spent", {student_id: amount})
 
-            await db.flush()
+        await db.flush()
 
-            logger.info(
-                f"Student {student_id} spent {amount} energy for {reference_type}:{reference_id}"
-            )
-            return True, amount, updated["balance"], f"消费 {amount} 能量"
-
-        latest = await EnergyService._get_account_snapshot(db, student_id)
-        latest_balance = latest["balance"] if latest else 0
-        return False, 0, latest_balance, "系统繁忙，请稍后重试"
+        logger.info(
+            f"Student {student_id} spent {amount} energy for {reference_type}:{reference_id}"
+        )
+        return True, amount, updated["balance"], f"消费 {amount} 能量"
 
     @staticmethod
     async def refund(
@@ -342,43 +716,33 @@ class EnergyService:
         description: Optional[str] = None,
     ) -> Tuple[bool, int, int, str]:
         """退还能量积分"""
+        await EnergyService._lock_account(db, student_id)
         await EnergyService.get_or_create_account(db, student_id)
 
-        for _ in range(MAX_CAS_RETRIES):
-            snapshot = await EnergyService._get_account_snapshot(db, student_id)
-            if not snapshot:
-                await EnergyService.get_or_create_account(db, student_id)
-                continue
-
-            updated = await EnergyService._cas_update_account(
-                db,
-                account_id=snapshot["id"],
-                expected_version=snapshot["version"],
-                balance_delta=amount,
-                total_spent_delta=-amount,
-            )
-            if not updated:
-                continue
-
-            transaction = EnergyTransaction(
-                account_id=snapshot["id"],
-                student_id=student_id,
-                type=EnergyTransactionType.REFUND.value,
-                amount=amount,
-                balance_after=updated["balance"],
-                reference_type=reference_type,
-                reference_id=reference_id,
-                description=description or "能量退还",
-            )
-            db.add(transaction)
-
-            await db.flush()
+        updated = await EnergyService._update_account(
+            db, student_id, balance_delta=amount, total_spent_delta=-amount
+        )
+        if not updated:
+            latest = await EnergyService._get_account_snapshot(db, student_id)
+            latest_balance = latest["balance"] if latest else 0
+            return False, 0, latest_balance, "系统繁忙，请稍后重试"
+
+        transaction = EnergyTransaction(
+            account_id=updated["id"],
+            student_id=student_id,
+            type=EnergyTransactionType.REFUND.value,
+            amount=amount,
+            balance_after=updated["balance"],
+            reference_type=reference_type,
+            reference_id=reference_id,
+            description=description or "能量退还",
+        )
+        db.add(transaction)
+        await EnergyService.bump_daily_stats(db, "refunded", {student_id: amount})
 
-            return True, amount, updated["balance"], f"退还 {amount} 能量"
+        await db.flush()
 
-        latest = await EnergyService._get_account_snapshot(db, student_id)
-        latest_balance = latest["balance"] if latest else 0
-        return False, 0, latest_balance, "系统繁忙，请稍后重试"
+        return True, amount, updated["balance"], f"退还 {amount} 能量"
 
     @staticmethod
     def calculate_level(total_earned: int) -> int:
@@ -398,54 +762,73 @@ class EnergyService:
         page: int = 1,
         page_size: int = 20,
         type_filter: Optional[str] = None,
-    ) -> Tuple[list[EnergyTransaction], int]:
-        """获取交易记录"""
-        query = select(EnergyTransaction).where(EnergyTransaction.student_id == student_id)
+    ) -> Tuple[List[Union[EnergyTransaction, EnergyTransactionArchive]], int]:
+        """
+        获取交易记录
 
+        先读热表；热表记录均晚于归档记录，翻页超出热表时再按剩余偏移读取归档表。
+        归档部分的总数读取 energy_archive_counts，不统计归档表。
+        """
+        offset = (page - 1) * page_size
+
+        hot_query = select(EnergyTransaction).where(EnergyTransaction.student_id == student_id)
+        archived_query = select(func.sum(EnergyArchiveCount.count)).where(
+            EnergyArchiveCount.student_id == student_id
+        )
         if type_filter:
-            query = query.where(EnergyTransaction.type == type_filter)
+            hot_query = hot_query.where(EnergyTransaction.type == type_filter)
+            archived_query = archived_query.where(EnergyArchiveCount.type == type_filter)
 
         # 总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total = (await db.execute(count_query)).scalar() or 0
+        count_query = select(func.count()).select_from(hot_query.subquery())
+        hot_total = (await db.execute(count_query)).scalar() or 0
+        archived_total = (await db.execute(archived_query)).scalar() or 0
 
         # 分页
-        query = query.order_by(EnergyTransaction.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        transactions: List[Union[EnergyTransaction, EnergyTransactionArchive]] = []
+        if offset < hot_total:
+            result = await db.execute(
+                hot_query.order_by(EnergyTransaction.created_at.desc(), EnergyTransaction.id.desc())
+                .offset(offset)
+                .limit(page_size)
+            )
+            transactions.extend(result.scalars().all())
 
-        result = await db.execute(query)
-        transactions = result.scalars().all()
+        remaining = page_size - len(transactions)
+        if remaining > 0 and archived_total:
+            archive_query = select(EnergyTransactionArchive).where(
+                EnergyTransactionArchive.student_id == student_id
+            )
+            if type_filter:
+                archive_query = archive_query.where(EnergyTransactionArchive.type == type_filter)
+            result = await db.execute(
+                archive_query.order_by(
+                    EnergyTransactionArchive.created_at.desc(), EnergyTransactionArchive.id.desc()
+                )
+                .offset(max(offset - hot_total, 0))
+                .limit(remaining)
+            )
+            transactions.extend(result.scalars().all())
 
-        return list(transactions), total
+        return transactions, hot_total + archived_total
 
     @staticmethod
     async def get_today_earned(db: AsyncSession, student_id: int) -> int:
         """获取今日获取的能量"""
-        today_start = _utc_now_naive().replace(hour=0, minute=0, second=0, microsecond=0)
-        result = await db.execute(
-            select(func.sum(EnergyTransaction.amount)).where(
-                and_(
-                    EnergyTransaction.student_id == student_id,
-                    EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                    EnergyTransaction.created_at >= today_start,
-                )
-            )
-        )
-        return result.scalar() or 0
+        return await EnergyService._get_earned_since(db, student_id, "day")
 
     @staticmethod
     async def get_week_earned(db: AsyncSession, student_id: int) -> int:
         """获取本周获取的能量"""
-        now = _utc_now_naive()
-        week_start = now - timedelta(days=now.weekday())
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        return await EnergyService._get_earned_since(db, student_id, "week")
+
+    @staticmethod
+    async def _get_earned_since(db: AsyncSession, student_id: int, period: str) -> int:
+        """读取当前周期起的日汇总（至多 31 行）"""
         result = await db.execute(
-            select(func.sum(EnergyTransaction.amount)).where(
-                and_(
-                    EnergyTransaction.student_id == student_id,
-                    EnergyTransaction.type == EnergyTransactionType.EARN.value,
-                    EnergyTransaction.created_at >= week_start,
-                )
+            select(func.sum(EnergyDailyStats.earned)).where(
+                EnergyDailyStats.student_id == student_id,
+                EnergyDailyStats.stat_date >= period_buckets(utc_now_naive())[period],
             )
         )
         return result.scalar() or 0
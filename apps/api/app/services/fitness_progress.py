@@ -0,0 +1,147 @@
+"""
+体测进步计算
+
+每次新增体测后按学员最近两次体测（按体测日期、ID 排序）逐项比较同名指标，重写该学员在
+fitness_improvements 中的行（两次均有得分时按得分，否则按原始值并按指标方向取正负）；
+进步榜按 (metric_name, improvement) 索引直接取前 N 名，名次由一次索引范围计数得出，
+不再在请求路径上聚合 fitness_tests / fitness_metrics。
+rebuild 用于上线回填与修复。
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.growth import FitnessImprovement, FitnessMetric, FitnessTest
+
+# 原始值越小越好的指标（计时类等），按原始值计算进步时取反；与小程序体测对比的方向一致
+_LOWER_IS_BETTER_METRICS = frozenset({"weight", "sprint_50m", "shuttle_run"})
+
+
+class FitnessProgressService:
+    """体测进步服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== 读取 ====================
+
+    async def top(self, metric_name: str, limit: int) -> List[Tuple[int, int, float]]:
+        """指标进步榜前 limit 名（同值按学员ID升序），返回 [(名次, 学员ID, 进步幅度)]"""
+        result = await self.db.execute(
+            select(FitnessImprovement.student_id, FitnessImprovement.improvement)
+            .where(FitnessImprovement.metric_name == metric_name)
+            .order_by(FitnessImprovement.improvement.desc(), FitnessImprovement.student_id)
+            .limit(limit)
+        )
+        return [
+            (rank, student_id, float(improvement))
+            for rank, (student_id, improvement) in enumerate(result.all(), 1)
+        ]
+
+    async def rank_of(
+        self, metric_name: str, student_id: int
+    ) -> Tuple[Optional[int], Optional[float]]:
+        """学员在指标进步榜中的（名次, 进步幅度），未上榜返回 (None, None)"""
+        improvement = await self.db.scalar(
+            select(FitnessImprovement.improvement).where(
+                FitnessImprovement.metric_name == metric_name,
+                FitnessImprovement.student_id == student_id,
+            )
+        )
+        if improvement is None:
+            return None, None
+        ahead = await self.db.scalar(
+            select(func.count()).where(
+                FitnessImprovement.metric_name == metric_name,
+                or_(
+                    FitnessImprovement.improvement > improvement,
+                    and_(
+                        FitnessImprovement.improvement == improvement,
+                        FitnessImprovement.student_id < student_id,
+                    ),
+                ),
+            )
+        )
+        return (ahead or 0) + 1, float(improvement)
+
+    # ==================== 事件 ====================
+
+    async def on_test_created(self, student_id: int) -> None:
+        """新增体测（含指标）并 flush 后调用，与体测记录同事务提交"""
+        await self._recompute(student_id)
+
+    async def rebuild(self) -> int:
+        """按全部体测记录重算，返回写入的进步行数"""
+        await self.db.execute(delete(FitnessImprovement))
+        student_ids = (
+            await self.db.execute(select(FitnessTest.student_id).distinct())
+        ).scalars()
+        written = 0
+        for student_id in list(student_ids):
+            written += await self._recompute(student_id)
+        await self.db.commit()
+        return written
+
+    # ==================== 内部实现 ====================
+
+    async def _recompute(self, student_id: int) -> int:
+        await self.db.execute(
+            delete(FitnessImprovement)
+            .where(FitnessImprovement.student_id == student_id)
+            .execution_options(synchronize_session=False)
+        )
+        test_ids = list(
+            (
+                await self.db.execute(
+                    select(FitnessTest.id)
+                    .where(FitnessTest.student_id == student_id)
+                    .order_by(FitnessTest.test_date.desc(), FitnessTest.id.desc())
+                    .limit(2)
+                )
+            ).scalars()
+        )
+        if len(test_ids) < 2:
+            return 0
+        latest_id, previous_id = test_ids
+
+        metrics: Dict[int, Dict[str, FitnessMetric]] = {latest_id: {}, previous_id: {}}
+        result = await self.db.execute(
+            select(FitnessMetric)
+            .where(FitnessMetric.test_id.in_(test_ids))
+            .order_by(FitnessMetric.id)
+        )
+        for metric in result.scalars().all():
+            metrics[metric.test_id][metric.metric_name] = metric
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for name, latest in metrics[latest_id].items():
+            previous = metrics[previous_id].get(name)
+            if previous is None:
+                continue
+            if latest.score is not None and previous.score is not None:
+                improvement = Decimal(str(latest.score)) - Decimal(str(previous.score))
+            else:
+                improvement = Decimal(str(latest.value)) - Decimal(str(previous.value))
+                if name in _LOWER_IS_BETTER_METRICS:
+                    improvement = -improvement
+            rows.append(
+                {
+                    "student_id": student_id,
+                    "metric_name": name,
+                    "metric_type": latest.metric_type,
+                    "previous_test_id": previous_id,
+                    "latest_test_id": latest_id,
+                    "previous_value": previous.value,
+                    "latest_value": latest.value,
+                    "improvement": improvement,
+                    "updated_at": now,
+                }
+            )
+        if rows:
+            await self.db.execute(insert(FitnessImprovement), rows)
+        return len(rows)
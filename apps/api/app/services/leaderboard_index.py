@@ -0,0 +1,200 @@
+"""
+排行榜进程内索引
+
+每个排行（能量、训练次数）的每个周期（week/month/all）维护一个按 (-分值, 学员ID) 排序的
+有序数组与学员 -> 分值映射：前 N 名、任意学员的名次与分值、"我附近"窗口均通过二分查找完成，
+O(log n)。索引从汇总表构建，不扫描明细：
+  - 能量：周/月取 energy_daily_stats 当期各日，全部取 energy_accounts 累计获取
+  - 训练：周/月取 training_daily_stats 当期各日，全部取 training_stats 累计次数
+写入事务登记的增量在提交后计入已加载的排行，回滚则丢弃。多 worker 部署时各进程只感知
+本进程的写入，因此索引在 LEADERBOARD_INDEX_TTL_SECONDS 后按汇总表重建，周期切换时立即重建。
+"""
+
+import asyncio
+from bisect import bisect_left, insort
+from datetime import date, datetime, timezone
+from time import monotonic
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.periods import period_buckets
+from app.models.energy import EnergyAccount, EnergyDailyStats
+from app.models.growth import TrainingDailyStats, TrainingStats
+
+LEADERBOARD_PERIODS = ("week", "month", "all")
+
+# (会话, 周期起始日) -> 学员 -> 分值；起始日为 None 表示全部
+ScoreLoader = Callable[[AsyncSession, Optional[date]], Awaitable[Dict[int, int]]]
+
+
+def _bucket_of(period: str, now: datetime) -> Optional[date]:
+    """周期起始日（all 无起始日）"""
+    if period == "all":
+        return None
+    return period_buckets(now)[period]
+
+
+class RankedBoard:
+    """有序排行（同分按学员ID升序），只收录分值大于 0 的学员"""
+
+    def __init__(self, scores: Optional[Mapping[int, int]] = None):
+        self._scores: Dict[int, int] = {}
+        self._order: List[Tuple[int, int]] = []
+        for student_id, value in (scores or {}).items():
+            if value > 0:
+                self._scores[student_id] = value
+        self._order = sorted((-value, student_id) for student_id, value in self._scores.items())
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, student_id: int, delta: int) -> None:
+        """累加学员分值并调整位置"""
+        old = self._scores.get(student_id, 0)
+        if old > 0:
+            del self._order[bisect_left(self._order, (-old, student_id))]
+        new = old + delta
+        if new > 0:
+            self._scores[student_id] = new
+            insort(self._order, (-new, student_id))
+        else:
+            self._scores.pop(student_id, None)
+
+    def value_of(self, student_id: int) -> int:
+        return self._scores.get(student_id, 0)
+
+    def rank_of(self, student_id: int) -> Optional[int]:
+        """学员名次（从 1 开始），未上榜返回 None"""
+        value = self._scores.get(student_id)
+        if value is None:
+            return None
+        return bisect_left(self._order, (-value, student_id)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int, int]]:
+        """前 limit 名，返回 [(名次, 学员ID, 分值)]"""
+        return self._slice(0, limit)
+
+    def around(self, student_id: int, radius: int) -> List[Tuple[int, int, int]]:
+        """学员及其前后各 radius 名，未上榜返回空列表"""
+        rank = self.rank_of(student_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self._slice(start, rank + radius)
+
+    def _slice(self, start: int, stop: int) -> List[Tuple[int, int, int]]:
+        return [
+            (start + offset + 1, student_id, -negative)
+            for offset, (negative, student_id) in enumerate(self._order[start:stop])
+        ]
+
+
+class LeaderboardIndex:
+    """按周期缓存的排行榜索引"""
+
+    def __init__(self, name: str, loader: ScoreLoader, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._loader = loader
+        self._pending_key = f"leaderboard_deltas:{name}"
+        # period -> (周期起始日, 过期时间, 排行)
+        self._boards: Dict[str, Tuple[Optional[date], float, RankedBoard]] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession, period: str) -> RankedBoard:
+        """读取周期排行，缺失、过期或周期切换时从汇总表重建"""
+        bucket = _bucket_of(period, datetime.now(timezone.utc).replace(tzinfo=None))
+        entry = self._boards.get(period)
+        if entry and entry[0] == bucket and entry[1] > monotonic():
+            return entry[2]
+
+        async with self._lock:
+            entry = self._boards.get(period)
+            if entry and entry[0] == bucket and entry[1] > monotonic():
+                return entry[2]
+            board = RankedBoard(await self._loader(db, bucket))
+            self._boards[period] = (bucket, monotonic() + self.ttl_seconds, board)
+            return board
+
+    def record(self, db: AsyncSession, deltas: Mapping[int, int]) -> None:
+        """登记本事务内的分值增量（学员 -> 增量），事务提交后计入已加载的排行"""
+        pending: Dict[int, int] = db.info.setdefault(self._pending_key, {})
+        for student_id, amount in deltas.items():
+            pending[student_id] = pending.get(student_id, 0) + amount
+
+    def apply(self, deltas: Mapping[int, int]) -> None:
+        """将已提交的分值增量计入当前周期的排行"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for period, (bucket, _, board) in list(self._boards.items()):
+            if bucket != _bucket_of(period, now):
+                continue
+            for student_id, amount in deltas.items():
+                board.add(student_id, amount)
+
+    def clear(self) -> None:
+        self._boards = {}
+        self._lock = asyncio.Lock()
+
+    def _on_commit(self, session: Session) -> None:
+        pending = session.info.pop(self._pending_key, None)
+        if pending:
+            self.apply(pending)
+
+    def _on_rollback(self, session: Session) -> None:
+        session.info.pop(self._pending_key, None)
+
+
+async def _load_energy_scores(db: AsyncSession, bucket: Optional[date]) -> Dict[int, int]:
+    if bucket is None:
+        query = select(EnergyAccount.student_id, EnergyAccount.total_earned).where(
+            EnergyAccount.total_earned > 0
+        )
+    else:
+        query = (
+            select(EnergyDailyStats.student_id, func.sum(EnergyDailyStats.earned))
+            .where(EnergyDailyStats.stat_date >= bucket)
+            .group_by(EnergyDailyStats.student_id)
+        )
+    result = await db.execute(query)
+    return {student_id: int(value or 0) for student_id, value in result.all()}
+
+
+async def _load_training_scores(db: AsyncSession, bucket: Optional[date]) -> Dict[int, int]:
+    if bucket is None:
+        query = select(TrainingStats.student_id, TrainingStats.total_sessions).where(
+            TrainingStats.total_sessions > 0
+        )
+    else:
+        query = (
+            select(TrainingDailyStats.student_id, func.sum(TrainingDailyStats.sessions))
+            .where(TrainingDailyStats.stat_date >= bucket)
+            .group_by(TrainingDailyStats.student_id)
+        )
+    result = await db.execute(query)
+    return {student_id: int(value or 0) for student_id, value in result.all()}
+
+
+leaderboard_index = LeaderboardIndex(
+    "energy", _load_energy_scores, settings.LEADERBOARD_INDEX_TTL_SECONDS
+)
+training_leaderboard_index = LeaderboardIndex(
+    "training", _load_training_scores, settings.LEADERBOARD_INDEX_TTL_SECONDS
+)
+_INDEXES = (leaderboard_index, training_leaderboard_index)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session: Session) -> None:
+    for index in _INDEXES:
+        index._on_commit(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_deltas(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        for index in _INDEXES:
+            index._on_rollback(session)
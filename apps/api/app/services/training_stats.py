@@ -0,0 +1,88 @@
+"""
+训练计数服务
+
+training_daily_stats（学员 × UTC 日）与 training_stats（学员累计）由 /training/complete
+在写入训练记录的同一事务内各做一次单行 upsert（``sessions = sessions + 1``）维护，
+训练排行榜从这两张表构建进程内索引，不再按学员聚合 training_sessions。
+rebuild 按训练记录全量重算，用于上线回填与计数漂移后的修复。
+"""
+
+from datetime import date, datetime, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import Date, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.growth import TrainingDailyStats, TrainingSession, TrainingStats
+from app.services.leaderboard_index import training_leaderboard_index
+
+
+class TrainingStatsService:
+    """训练计数服务"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def on_session_completed(self, session: TrainingSession) -> None:
+        """训练记录写入后调用（与训练记录同事务提交）"""
+        created_at = session.created_at or datetime.now(timezone.utc)
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc)
+        student_id = session.student_id
+
+        daily = dialect_insert(self.db)(TrainingDailyStats).values(
+            student_id=student_id, stat_date=created_at.date(), sessions=1
+        )
+        await self.db.execute(
+            daily.on_conflict_do_update(
+                index_elements=["student_id", "stat_date"],
+                set_={"sessions": TrainingDailyStats.sessions + 1},
+            )
+        )
+        total = dialect_insert(self.db)(TrainingStats).values(
+            student_id=student_id, total_sessions=1
+        )
+        await self.db.execute(
+            total.on_conflict_do_update(
+                index_elements=["student_id"],
+                set_={"total_sessions": TrainingStats.total_sessions + 1},
+            )
+        )
+        training_leaderboard_index.record(self.db, {student_id: 1})
+
+    async def rebuild(self) -> int:
+        """按训练记录重算日计数与累计计数，返回写入的日计数行数"""
+        stat_date = func.date(TrainingSession.created_at, type_=Date)
+        result = await self.db.execute(
+            select(TrainingSession.student_id, stat_date, func.count(TrainingSession.id))
+            .where(TrainingSession.created_at.is_not(None))
+            .group_by(TrainingSession.student_id, stat_date)
+        )
+        daily: Dict[Tuple[int, date], int] = {
+            (student_id, day): count for student_id, day, count in result.all()
+        }
+        totals: Dict[int, int] = {}
+        for (student_id, _), count in daily.items():
+            totals[student_id] = totals.get(student_id, 0) + count
+
+        await self.db.execute(delete(TrainingDailyStats))
+        await self.db.execute(delete(TrainingStats))
+        if daily:
+            await self.db.execute(
+                insert(TrainingDailyStats),
+                [
+                    {"student_id": student_id, "stat_date": day, "sessions": count}
+                    for (student_id, day), count in daily.items()
+                ],
+            )
+            await self.db.execute(
+                insert(TrainingStats),
+                [
+                    {"student_id": student_id, "total_sessions": count}
+                    for student_id, count in totals.items()
+                ],
+            )
+        await self.db.commit()
+        training_leaderboard_index.clear()
+        return len(daily)
@@ -0,0 +1,38 @@
+"""
+能量交易记录归档脚本
+运行方式: python -m scripts.archive_energy_ledger [--hot-months N] [--batch-size N]
+
+将热数据窗口（默认 ENERGY_LEDGER_HOT_MONTHS 个自然月，含当月）之前的能量交易记录
+迁入归档表，建议每月初执行一次。可重复执行。
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.energy_ledger import EnergyLedgerArchiver
+
+
+async def main(hot_months: int, batch_size: int):
+    async with AsyncSessionLocal() as session:
+        report = await EnergyLedgerArchiver(session, batch_size, hot_months).archive_cold_months()
+    print(
+        f"已归档 {report['cutoff']} 之前的记录 {report['moved']} 条，"
+        f"批次 {report['batches']}，耗时 {report['elapsed_ms']}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="归档能量交易记录")
+    parser.add_argument(
+        "--hot-months", type=int, default=settings.ENERGY_LEDGER_HOT_MONTHS, help="热数据保留月数"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.ENERGY_LEDGER_ARCHIVE_BATCH_SIZE, help="每批条数"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.hot_months, args.batch_size))
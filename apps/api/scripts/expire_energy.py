@@ -0,0 +1,43 @@
+"""
+能量过期脚本
+运行方式: python -m scripts.expire_energy [--months N] [--batch-size N]
+
+将获取满 N 个月（默认 ENERGY_EXPIRY_MONTHS）仍未消费的能量置为过期，建议每日执行一次。
+任务按批提交并记录检查点，中断后重新运行会从上次进度继续。
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.energy_expiry import EnergyExpiryService
+
+
+async def main(months: int, batch_size: int):
+    async with AsyncSessionLocal() as session:
+        report = await EnergyExpiryService(session, batch_size, months).run()
+    if report["cutoff"] is None:
+        print("能量过期未启用（ENERGY_EXPIRY_MONTHS=0）")
+        return
+    print(
+        f"截止 {report['cutoff']}：从账户 {report['resumed_from']} 之后"
+        f"处理 {report['batches']} 批，"
+        f"{report['expired_accounts']} 个账户过期 {report['expired_amount']} 能量，"
+        f"冲突跳过 {report['skipped']} 个，耗时 {report['elapsed_ms']}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="能量过期")
+    parser.add_argument(
+        "--months", type=int, default=settings.ENERGY_EXPIRY_MONTHS, help="获取满 N 个月后过期"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.ENERGY_EXPIRY_BATCH_SIZE, help="每批账户数"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.months, args.batch_size))
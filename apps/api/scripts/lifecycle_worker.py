@@ -0,0 +1,47 @@
+"""
+预约与课时卡生命周期扫描 worker
+运行方式: python -m scripts.lifecycle_worker [--once] [--interval 秒] [--batch-size N]
+
+将下课超过宽限期的已确认预约置为已完成、过期课时卡置为过期，每轮输出运行指标。
+与 API 进程内调度（LIFECYCLE_SCHEDULER_ENABLED）二选一即可。
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.booking_lifecycle import BookingLifecycleService
+
+
+async def run(once: bool, interval: int, batch_size: int):
+    while True:
+        async with AsyncSessionLocal() as session:
+            reports = await BookingLifecycleService(session, batch_size).run_once()
+        for name, report in reports.items():
+            print(
+                f"[{name}] 批次 {report['batches']}，更新 {report['updated']} 行，"
+                f"耗时 {report['elapsed_ms']}ms"
+            )
+        if once:
+            return
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="预约与课时卡生命周期扫描")
+    parser.add_argument("--once", action="store_true", help="只执行一轮后退出")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=settings.LIFECYCLE_SWEEP_INTERVAL_SECONDS,
+        help="扫描间隔（秒）",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.LIFECYCLE_SWEEP_BATCH_SIZE, help="每批处理行数"
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.once, args.interval, args.batch_size))
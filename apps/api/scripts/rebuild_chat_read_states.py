@@ -0,0 +1,25 @@
+"""
+会话读取状态重建脚本
+运行方式: python -m scripts.rebuild_chat_read_states
+
+按 messages.status 重算 conversation_read_states 的已读水位与未读计数，
+用于上线回填或计数漂移后的修复。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.chat_read_state import ChatReadStateService
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        count = await ChatReadStateService(session).rebuild()
+    print(f"已重建 {count} 条会话读取状态")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+"""
+教练收入流水与月度汇总重建脚本
+运行方式: python -m scripts.rebuild_coach_income [--coach-id ID ...]
+
+为缺少流水的已完成预约补记收入（按教练当前费率），清理失效流水并重算
+coach_income_monthly，用于上线回填或汇总漂移后的修复。
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.coach_income import CoachIncomeService
+
+
+async def main(coach_ids=None):
+    async with AsyncSessionLocal() as session:
+        count = await CoachIncomeService(session).rebuild(coach_ids)
+    print(f"已重建 {count} 位教练的收入汇总")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重建教练收入流水与月度汇总")
+    parser.add_argument("--coach-id", type=int, action="append", help="仅重建指定教练，可重复")
+    args = parser.parse_args()
+    asyncio.run(main(args.coach_id))
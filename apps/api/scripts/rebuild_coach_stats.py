@@ -0,0 +1,28 @@
+"""
+教练统计读模型重建脚本
+运行方式: python -m scripts.rebuild_coach_stats [--coach-id ID ...]
+
+按 bookings / reviews 全量重算 coach_stats，用于上线回填或计数漂移后的修复。
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.coach_stats import CoachStatsService
+
+
+async def main(coach_ids=None):
+    async with AsyncSessionLocal() as session:
+        count = await CoachStatsService(session).rebuild(coach_ids)
+    print(f"已重建 {count} 位教练的统计数据")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重建教练统计读模型")
+    parser.add_argument("--coach-id", type=int, action="append", help="仅重建指定教练，可重复")
+    args = parser.parse_args()
+    asyncio.run(main(args.coach_id))
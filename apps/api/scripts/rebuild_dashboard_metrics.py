@@ -0,0 +1,25 @@
+"""
+运营看板汇总重建脚本
+运行方式: python -m scripts.rebuild_dashboard_metrics
+
+按 student_memberships 全量重算看板月汇总（新开课时账户数），
+用于上线回填或汇总漂移后的修复。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.dashboard_metrics import DashboardMetricsService
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        monthly = await DashboardMetricsService(session).rebuild()
+    print(f"已重建 {monthly} 条月汇总")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
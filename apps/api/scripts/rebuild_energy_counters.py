@@ -0,0 +1,25 @@
+"""
+能量规则周期计数重建脚本
+运行方式: python -m scripts.rebuild_energy_counters
+
+按能量获取记录重算当前日/周/月周期桶的计数，并清理已过期的周期桶。
+用于上线回填，也可定期运行以控制计数表大小。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.energy_service import EnergyService
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        count = await EnergyService.rebuild_period_counters(session)
+    print(f"已重建 {count} 条能量周期计数")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
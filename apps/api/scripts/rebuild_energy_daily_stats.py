@@ -0,0 +1,30 @@
+"""
+能量日汇总重建脚本
+运行方式: python -m scripts.rebuild_energy_daily_stats [--since YYYY-MM-DD]
+
+按 energy_transactions 重算 energy_daily_stats，用于上线回填或汇总漂移后的修复。
+指定 --since 时只重算该日（含）之后的数据。
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.energy_service import EnergyService
+
+
+async def main(since=None):
+    async with AsyncSessionLocal() as session:
+        count = await EnergyService.rebuild_daily_stats(session, since)
+    print(f"已重建 {count} 条能量日汇总")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重建能量日汇总")
+    parser.add_argument("--since", type=date.fromisoformat, help="起始日期（含），默认全量")
+    args = parser.parse_args()
+    asyncio.run(main(args.since))
@@ -0,0 +1,25 @@
+"""
+体测进步重建脚本
+运行方式: python -m scripts.rebuild_fitness_improvements
+
+按 fitness_tests / fitness_metrics 重算 fitness_improvements，
+用于上线回填或数据修复（例如直接修改了历史体测记录之后）。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.fitness_progress import FitnessProgressService
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        count = await FitnessProgressService(session).rebuild()
+    print(f"已重建 {count} 条体测进步记录")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+"""
+训练计数重建脚本
+运行方式: python -m scripts.rebuild_training_stats
+
+按 training_sessions 重算 training_daily_stats 与 training_stats，
+用于上线回填或计数漂移后的修复。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.training_stats import TrainingStatsService
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        count = await TrainingStatsService(session).rebuild()
+    print(f"已重建 {count} 条训练日计数")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+"""
+能量规则缓存刷新脚本
+运行方式: python -m scripts.reload_energy_rules
+
+直接修改 energy_rules 表后运行，递增规则版本号，各 API 进程在下一个轮询周期
+（ENERGY_RULE_CACHE_POLL_SECONDS）内重载规则。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.energy_rules import EnergyRuleRegistry
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        await EnergyRuleRegistry.bump_version(session)
+        await session.commit()
+    print("已递增能量规则版本号")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
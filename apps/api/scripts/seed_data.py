@@ -17,13 +17,23 @@ from app.models import (
     User, Student, Coach,
     MembershipCard, StudentMembership, CoachAvailableSlot,
     Booking, Transaction, Review,
+    CoachSlotOccupancy, CoachStats, CoachIncomeEntry, CoachIncomeMonthly,
+    DashboardMonthlyStats,
     CardType, MembershipStatus, BookingStatus, TransactionType,
     Notification, NotificationType,
-    Conversation, Message, ConversationType, MessageType, MessageStatus,
-    EnergyRule, EnergyAccount, EnergyTransaction, EnergySourceType, EnergyTransactionType,
-    Merchant, MerchantUser, RedeemItem, RedeemOrder, MerchantStatus, RedeemOrderStatus
+    Conversation, ConversationReadState, Message, ConversationType, MessageType, MessageStatus,
+    EnergyRule, EnergyRuleCounter, EnergyDailyStats,
+    EnergyTransactionArchive, EnergyArchiveCount, EnergyAccount, EnergyTransaction,
+    EnergySourceType, EnergyTransactionType,
+    Merchant, MerchantUser, RedeemItem, RedeemOrder, MerchantStatus, RedeemOrderStatus,
+    TrainingDailyStats, TrainingStats, FitnessImprovement
 )
 from app.core.security import get_password_hash
+from app.services.coach_income import CoachIncomeService
+from app.services.coach_stats import CoachStatsService
+from app.services.dashboard_metrics import DashboardMetricsService
+from app.services.energy_rules import EnergyRuleRegistry
+from app.services.energy_service import EnergyService
 
 
 async def clear_data():
@@ -35,17 +45,30 @@ async def clear_data():
         await db.execute(delete(RedeemItem))
         await db.execute(delete(MerchantUser))
         await db.execute(delete(Merchant))
+        await db.execute(delete(EnergyRuleCounter))
+        await db.execute(delete(EnergyDailyStats))
+        await db.execute(delete(EnergyArchiveCount))
+        await db.execute(delete(EnergyTransactionArchive))
         await db.execute(delete(EnergyTransaction))
         await db.execute(delete(EnergyAccount))
         await db.execute(delete(EnergyRule))
+        await db.execute(delete(ConversationReadState))
         await db.execute(delete(Message))
         await db.execute(delete(Conversation))
         await db.execute(delete(Notification))
+        await db.execute(delete(DashboardMonthlyStats))
+        await db.execute(delete(CoachIncomeMonthly))
+        await db.execute(delete(CoachIncomeEntry))
+        await db.execute(delete(CoachStats))
         await db.execute(delete(Review))
         await db.execute(delete(Transaction))
         await db.execute(delete(Booking))
+        await db.execute(delete(CoachSlotOccupancy))
         await db.execute(delete(CoachAvailableSlot))
         await db.execute(delete(StudentMembership))
+        await db.execute(delete(FitnessImprovement))
+        await db.execute(delete(TrainingDailyStats))
+        await db.execute(delete(TrainingStats))
         await db.execute(delete(MembershipCard))
         await db.execute(delete(Student))
         await db.execute(delete(Coach))
@@ -268,6 +291,8 @@ async def seed_data():
             BookingStatus.PENDING,
             BookingStatus.CANCELLED,
         ]
+        # 有效预约受教练、学员时段不重叠约束，已占用的时段直接跳过
+        taken = set()
 
         for coach_idx, coach in enumerate(coaches):
             num_bookings = random.randint(3, 5)
@@ -286,6 +311,13 @@ async def seed_data():
                 elif day_offset > 0:
                     status = random.choice([BookingStatus.PENDING, BookingStatus.CONFIRMED])
 
+                if status in (BookingStatus.PENDING, BookingStatus.CONFIRMED):
+                    keys = {("coach", coach.id, booking_date, hour),
+                            ("student", student.id, booking_date, hour)}
+                    if keys & taken:
+                        continue
+                    taken |= keys
+
                 booking = Booking(
                     student_id=student.id,
                     coach_id=coach.id,
@@ -435,6 +467,8 @@ async def seed_data():
             await db.flush()
             energy_rules.append(rule)
             print(f"  创建积分规则: {rule.name} (+{rule.points})")
+        # 通知运行中的 API 进程重载规则
+        await EnergyRuleRegistry.bump_version(db)
 
         # 13. 为学员创建能量账户和交易记录
         for student in students:
@@ -562,6 +596,13 @@ async def seed_data():
         print("  商家和商品数据创建完成")
 
         await db.commit()
+
+        # 种子数据直接写表，需按明细重建读模型
+        await CoachStatsService(db).rebuild()
+        await CoachIncomeService(db).rebuild()
+        await DashboardMetricsService(db).rebuild()
+        await EnergyService.rebuild_period_counters(db)
+        await EnergyService.rebuild_daily_stats(db)
         print("\n种子数据创建完成！")
 
         print("\n" + "=" * 60)
@@ -14,6 +14,8 @@ from app.core.database import Base, get_db
 from app.core.security import get_password_hash
 from app.main import app
 from app.models import Coach, Student, User
+from app.services.energy_rules import energy_rule_registry
+from app.services.leaderboard_index import leaderboard_index, training_leaderboard_index
 
 # Test database URL
 # Prefer an explicit TEST_DATABASE_URL when provided.
@@ -60,6 +62,10 @@ async def db_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
+    # Tables are recreated per test, so cached rules and rankings must not leak across tests.
+    energy_rule_registry.clear()
+    leaderboard_index.clear()
+    training_leaderboard_index.clear()
     async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
     async with async_session() as session:
@@ -0,0 +1,143 @@
+"""
+Contention benchmark for energy account writes.
+
+N concurrent writers (each with its own session/transaction) earn and spend
+against the same student account. In serialized mode every write must succeed,
+a capped rule must admit exactly as many earns as its limit allows, and the
+ledger must reconcile with the account balance.
+
+Serialized mode relies on SELECT ... FOR UPDATE, which SQLite ignores (its
+whole-database write lock would make the assertions pass without the row
+lock), so those cases only run when TEST_DATABASE_URL points at PostgreSQL.
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.energy import EnergyAccount, EnergyRule, EnergyTransaction
+from app.models.user import Student, User
+from app.services.energy_service import EnergyService
+
+WRITERS = 20
+CAPPED_EARNS = 3
+
+
+def _require_row_locks(test_engine, mode: str) -> None:
+    if mode == "serialized" and test_engine.dialect.name != "postgresql":
+        pytest.skip("serialized mode needs SELECT ... FOR UPDATE (PostgreSQL)")
+
+
+async def _create_student(db_session, student_no: str) -> int:
+    user = User(email=f"{student_no.lower()}@test.com", role="student", status="active")
+    db_session.add(user)
+    await db_session.flush()
+    student = Student(user_id=user.id, student_no=student_no, name="Contention")
+    db_session.add(student)
+    await db_session.flush()
+    return student.id
+
+
+async def _run_writers(
+    test_engine, student_id: int, rule_code: str, spend: bool = True
+) -> tuple[list, list]:
+    session_factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def writer(index: int) -> tuple[bool, str, float]:
+        start = time.perf_counter()
+        async with session_factory() as session:
+            if spend and index % 2:
+                success, _, _, message = await EnergyService.spend(
+                    session, student_id, 5, reference_type="redeem_order", reference_id=index
+                )
+            else:
+                success, _, _, message = await EnergyService.earn(session, student_id, rule_code)
+            await session.commit()
+        return success, message, (time.perf_counter() - start) * 1000
+
+    results = await asyncio.gather(*(writer(i) for i in range(WRITERS)))
+    failures = [message for success, message, _ in results if not success]
+    return failures, [elapsed for _, _, elapsed in results]
+
+
+class TestEnergyAccountContention:
+    """Concurrent earns and spends on a single energy account."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", ["cas", "serialized"])
+    async def test_concurrent_writers_on_one_account(
+        self, db_session, test_engine, monkeypatch, mode
+    ):
+        _require_row_locks(test_engine, mode)
+        monkeypatch.setattr(settings, "ENERGY_ACCOUNT_UPDATE_MODE", mode)
+        student_id = await _create_student(db_session, "S-CONTENTION")
+        db_session.add_all(
+            [
+                EnergyRule(name="签到", code="contention", source_type="checkin", points=10),
+                EnergyAccount(student_id=student_id, balance=100, total_earned=100, level=2),
+            ]
+        )
+        await db_session.commit()
+
+        failures, elapsed = await _run_writers(test_engine, student_id, "contention")
+
+        db_session.expire_all()
+        account = (
+            await db_session.execute(
+                select(EnergyAccount).where(EnergyAccount.student_id == student_id)
+            )
+        ).scalar_one()
+        ledger = await db_session.scalar(
+            select(func.coalesce(func.sum(EnergyTransaction.amount), 0)).where(
+                EnergyTransaction.student_id == student_id
+            )
+        )
+
+        print(f"\n{'=' * 60}")
+        print(f"Energy Account Contention ({mode}, {WRITERS} writers, 1 account)")
+        print(f"{'=' * 60}")
+        print(f"Failed Writes: {len(failures)} {sorted(set(failures))}")
+        print(f"Avg Latency: {statistics.mean(elapsed):.2f}ms  Max: {max(elapsed):.2f}ms")
+        print(f"{'=' * 60}")
+
+        # 账户余额始终与流水对账
+        assert account.balance == 100 + ledger
+        if mode == "serialized":
+            assert failures == []
+            assert account.balance == 100 + (WRITERS // 2) * (10 - 5)
+
+    @pytest.mark.asyncio
+    async def test_serialized_capped_rule_admits_exactly_the_limit(
+        self, db_session, test_engine, monkeypatch
+    ):
+        _require_row_locks(test_engine, "serialized")
+        monkeypatch.setattr(settings, "ENERGY_ACCOUNT_UPDATE_MODE", "serialized")
+        student_id = await _create_student(db_session, "S-CAPPED")
+        db_session.add_all(
+            [
+                EnergyRule(
+                    name="限次签到",
+                    code="contention_capped",
+                    source_type="checkin",
+                    points=10,
+                    daily_limit=CAPPED_EARNS * 10,
+                ),
+                EnergyAccount(student_id=student_id, balance=0),
+            ]
+        )
+        await db_session.commit()
+
+        failures, _ = await _run_writers(test_engine, student_id, "contention_capped", spend=False)
+
+        # 上限检查与入账在同一把行锁下完成，并发写入恰好放行上限允许的次数
+        assert len(failures) == WRITERS - CAPPED_EARNS
+        db_session.expire_all()
+        balance = await db_session.scalar(
+            select(EnergyAccount.balance).where(EnergyAccount.student_id == student_id)
+        )
+        assert balance == CAPPED_EARNS * 10
@@ -0,0 +1,152 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import (
+    Booking,
+    BookingStatus,
+    CoachIncomeEntry,
+    MembershipCard,
+    MembershipStatus,
+    StudentMembership,
+)
+from app.models.user import Coach, Student
+from app.services.booking_lifecycle import BookingLifecycleService
+from app.services.coach_income import CoachIncomeService
+from app.services.coach_stats import CoachStatsService
+
+
+async def _ids(db_session, test_users) -> tuple[int, int]:
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    return coach.id, student.id
+
+
+@pytest.mark.asyncio
+async def test_sweep_completes_confirmed_bookings_past_grace_period(db_session, test_users):
+    coach_id, student_id = await _ids(db_session, test_users)
+    now = datetime(2026, 10, 18, 12, 0)
+    # 宽限期 24 小时：截止点为 10-17 12:00
+    cases = [
+        (date(2026, 10, 10), time(9), BookingStatus.CONFIRMED.value),
+        (date(2026, 10, 12), time(9), BookingStatus.CONFIRMED.value),
+        (date(2026, 10, 17), time(10), BookingStatus.CONFIRMED.value),
+        (date(2026, 10, 17), time(14), BookingStatus.CONFIRMED.value),  # 仍在宽限期内
+        (date(2026, 10, 11), time(9), BookingStatus.CANCELLED.value),
+        (date(2026, 10, 20), time(9), BookingStatus.CONFIRMED.value),
+    ]
+    bookings = [
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=(datetime.combine(day, end) - timedelta(hours=1)).time(),
+            end_time=end,
+            status=status,
+        )
+        for day, end, status in cases
+    ]
+    db_session.add_all(bookings)
+    await db_session.commit()
+    booking_ids = [b.id for b in bookings]
+
+    report = await BookingLifecycleService(db_session, batch_size=2).complete_past_bookings(now)
+
+    assert (report["batches"], report["updated"]) == (2, 3)
+    db_session.expire_all()
+    statuses = [
+        (await db_session.get(Booking, booking_id)).status for booking_id in booking_ids
+    ]
+    assert statuses == [
+        BookingStatus.COMPLETED.value,
+        BookingStatus.COMPLETED.value,
+        BookingStatus.COMPLETED.value,
+        BookingStatus.CONFIRMED.value,
+        BookingStatus.CANCELLED.value,
+        BookingStatus.CONFIRMED.value,
+    ]
+    stats = await CoachStatsService(db_session).get(coach_id)
+    assert stats.total_lessons == 3
+    entries = (await db_session.execute(select(CoachIncomeEntry.booking_id))).scalars().all()
+    assert sorted(entries) == booking_ids[:3]
+
+    again = await BookingLifecycleService(db_session).complete_past_bookings(now)
+    assert (again["batches"], again["updated"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_sweep_applies_batch_deltas_to_existing_stats(db_session, test_users):
+    coach_id, student_id = await _ids(db_session, test_users)
+    coach = await db_session.get(Coach, coach_id)
+    coach.hourly_rate = 200
+    coach.commission_rate = 0.5
+    day = date(2026, 10, 10)
+
+    def _booking(hour: int, status: str) -> Booking:
+        return Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=time(hour),
+            end_time=time(hour + 1),
+            status=status,
+        )
+
+    db_session.add(_booking(8, BookingStatus.COMPLETED.value))
+    await db_session.commit()
+    await CoachStatsService(db_session).rebuild([coach_id])
+    await CoachIncomeService(db_session).rebuild([coach_id])
+
+    db_session.add_all([_booking(hour, BookingStatus.CONFIRMED.value) for hour in (9, 10)])
+    await db_session.commit()
+
+    report = await BookingLifecycleService(db_session).complete_past_bookings(
+        datetime(2026, 10, 18, 12, 0)
+    )
+
+    assert report["updated"] == 2
+    db_session.expire_all()
+    stats = await CoachStatsService(db_session).get(coach_id)
+    # 学员此前已上过课，不重复计入学员数
+    assert (stats.total_lessons, stats.total_students) == (3, 1)
+    summary = await CoachIncomeService(db_session).get_summary(coach_id, today=day)
+    assert summary["this_month"] == {"lessons": 3, "income": 300.0}
+
+
+@pytest.mark.asyncio
+async def test_sweep_expires_memberships_and_forfeits_remaining_lessons(db_session, test_users):
+    _, student_id = await _ids(db_session, test_users)
+    student = await db_session.get(Student, student_id)
+    student.remaining_lessons = 7
+    card = MembershipCard(name="月卡", card_type="times", total_times=10, price=500)
+    db_session.add(card)
+    await db_session.flush()
+    today = date(2026, 10, 18)
+    memberships = [
+        StudentMembership(
+            student_id=student_id, card_id=card.id, remaining_times=times, expire_date=expire
+        )
+        for times, expire in [(3, today - timedelta(days=1)), (4, today), (0, None)]
+    ]
+    db_session.add_all(memberships)
+    await db_session.commit()
+    membership_ids = [m.id for m in memberships]
+
+    report = await BookingLifecycleService(db_session).expire_memberships(today)
+
+    assert (report["batches"], report["updated"]) == (1, 1)
+    db_session.expire_all()
+    assert [
+        (await db_session.get(StudentMembership, membership_id)).status
+        for membership_id in membership_ids
+    ] == [
+        MembershipStatus.EXPIRED.value,
+        MembershipStatus.ACTIVE.value,
+        MembershipStatus.ACTIVE.value,
+    ]
+    assert (await db_session.get(Student, student_id)).remaining_lessons == 4
@@ -0,0 +1,230 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.models.booking import (
+    BOOKING_COACH_OVERLAP_CONSTRAINT,
+    BOOKING_STUDENT_OVERLAP_CONSTRAINT,
+    Booking,
+    BookingStatus,
+    CoachAvailableSlot,
+    MembershipCard,
+    StudentMembership,
+    is_booking_overlap_violation,
+)
+from app.models.user import Coach, Student, User
+from app.schemas.booking import BookingCreate
+from app.services.booking_service import BookingService
+
+
+async def _coach_and_student(db_session, test_users) -> tuple[Coach, Student]:
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    return coach, student
+
+
+async def _add_user(db_session, role: str, suffix: str) -> User:
+    user = User(
+        email=f"{role}-{suffix}@test.com",
+        phone=f"139000{suffix:>05}",
+        password_hash="x",
+        role=role,
+        nickname=f"{role} {suffix}",
+        status="active",
+    )
+    db_session.add(user)
+    await db_session.flush()
+    return user
+
+
+async def _other_student(db_session, suffix: str = "99") -> Student:
+    user = await _add_user(db_session, "student", suffix)
+    student = Student(user_id=user.id, student_no=f"S-{suffix}", name=user.nickname)
+    db_session.add(student)
+    await db_session.flush()
+    return student
+
+
+async def _expect_violation(db_session, booking: Booking, constraint: str) -> None:
+    db_session.add(booking)
+    with pytest.raises(IntegrityError) as exc_info:
+        await db_session.flush()
+    assert is_booking_overlap_violation(exc_info.value, constraint)
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_database_rejects_overlapping_coach_bookings(db_session, test_users):
+    coach, student = await _coach_and_student(db_session, test_users)
+    coach_id, student_id = coach.id, student.id
+    others = [(await _other_student(db_session, str(n))).id for n in range(91, 95)]
+    slot, other_slot = [
+        CoachAvailableSlot(
+            coach_id=coach_id,
+            day_of_week=0,
+            start_time=time(start, 0),
+            end_time=time(start + 1, 0),
+            max_students=4,
+        )
+        for start in (14, 15)
+    ]
+    db_session.add_all([slot, other_slot])
+    await db_session.flush()
+    slot_id, other_slot_id = slot.id, other_slot.id
+    day = date.today() + timedelta(days=5)
+
+    def _booking(student: int, start: int, end: int, **extra) -> Booking:
+        values = {"status": BookingStatus.CONFIRMED.value, **extra}
+        return Booking(
+            student_id=student,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=time(*divmod(start, 60)),
+            end_time=time(*divmod(end, 60)),
+            **values,
+        )
+
+    # 私教 9:00-10:00 与同一小班时段 14:00-15:00 的两名学员
+    db_session.add_all(
+        [
+            _booking(student_id, 9 * 60, 10 * 60),
+            _booking(others[0], 14 * 60, 15 * 60, slot_id=slot_id),
+            _booking(others[1], 14 * 60, 15 * 60, slot_id=slot_id),
+        ]
+    )
+    await db_session.commit()
+
+    # 私教与私教、私教与小班预约、不同小班时段之间均不允许重叠
+    for booking in [
+        _booking(others[2], 9 * 60 + 30, 10 * 60 + 30, status=BookingStatus.PENDING.value),
+        _booking(others[2], 14 * 60 + 30, 15 * 60 + 30),
+        _booking(others[3], 14 * 60 + 30, 15 * 60 + 30, slot_id=other_slot_id),
+    ]:
+        await _expect_violation(db_session, booking, BOOKING_COACH_OVERLAP_CONSTRAINT)
+
+    # 相邻时段与已取消记录不受约束
+    db_session.add_all(
+        [
+            _booking(others[2], 10 * 60, 11 * 60),
+            _booking(others[3], 9 * 60, 10 * 60, status=BookingStatus.CANCELLED.value),
+            _booking(others[3], 14 * 60, 15 * 60, slot_id=slot_id),
+        ]
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_database_rejects_overlapping_student_bookings(db_session, test_users):
+    coach, student = await _coach_and_student(db_session, test_users)
+    coach_id, student_id = coach.id, student.id
+    other_user = await _add_user(db_session, "coach", "98")
+    other_coach = Coach(user_id=other_user.id, coach_no="C-OTHER", name="Other Coach")
+    db_session.add(other_coach)
+    await db_session.flush()
+    other_coach_id = other_coach.id
+    day = date.today() + timedelta(days=5)
+    db_session.add(
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=BookingStatus.CONFIRMED.value,
+        )
+    )
+    await db_session.commit()
+
+    await _expect_violation(
+        db_session,
+        Booking(
+            student_id=student_id,
+            coach_id=other_coach_id,
+            booking_date=day,
+            start_time=time(9, 30),
+            end_time=time(10, 30),
+            status=BookingStatus.PENDING.value,
+        ),
+        BOOKING_STUDENT_OVERLAP_CONSTRAINT,
+    )
+
+
+@pytest.mark.asyncio
+async def test_constraint_mode_maps_violation_to_coach_conflict(
+    db_session, test_users, monkeypatch
+):
+    monkeypatch.setattr(settings, "BOOKING_CONFLICT_MODE", "constraint")
+    coach, student = await _coach_and_student(db_session, test_users)
+    coach_id, student_id = coach.id, student.id
+    other_user = User(
+        email="other-student@test.com",
+        phone="13900000099",
+        password_hash="x",
+        role="student",
+        nickname="Other Student",
+        status="active",
+    )
+    db_session.add(other_user)
+    await db_session.flush()
+    other = Student(user_id=other_user.id, student_no="S-OTHER", name="Other Student")
+    db_session.add(other)
+    await db_session.flush()
+    card = MembershipCard(name="次卡", card_type="times", total_times=10, price=100)
+    db_session.add(card)
+    await db_session.flush()
+    db_session.add(StudentMembership(student_id=student_id, card_id=card.id, remaining_times=5))
+    slot = CoachAvailableSlot(
+        coach_id=coach_id,
+        day_of_week=0,
+        start_time=time(17, 0),
+        end_time=time(18, 0),
+        max_students=4,
+    )
+    db_session.add(slot)
+    await db_session.flush()
+    db_session.add_all(
+        [
+            Booking(
+                student_id=other.id,
+                coach_id=coach_id,
+                slot_id=slot_id,
+                booking_date=date.today() + timedelta(days=5),
+                start_time=start,
+                end_time=end,
+                status=BookingStatus.CONFIRMED.value,
+            )
+            for slot_id, start, end in [
+                (None, time(14, 0), time(15, 0)),
+                (slot.id, time(17, 0), time(18, 0)),
+            ]
+        ]
+    )
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    data = BookingCreate(
+        coach_id=coach_id,
+        booking_date=date.today() + timedelta(days=5),
+        start_time=time(14, 30),
+        end_time=time(15, 30),
+    )
+    with pytest.raises(ValueError, match="该时段教练已被预约"):
+        await service.create_booking(data, student_id)
+    # 与小班预约部分重叠的私教预约同样被约束拒绝
+    with pytest.raises(ValueError, match="该时段教练已被预约"):
+        await service.create_booking(
+            data.model_copy(update={"start_time": time(16, 30), "end_time": time(17, 30)}),
+            student_id,
+        )
+
+    booking = await service.create_booking(
+        data.model_copy(update={"start_time": time(15, 0), "end_time": time(16, 0)}), student_id
+    )
+    assert booking.id is not None
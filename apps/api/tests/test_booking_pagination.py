@@ -0,0 +1,98 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import Booking, BookingStatus
+from app.models.user import Coach, Student
+from app.services.booking_service import BookingService
+
+
+async def _seed_bookings(db_session, test_users) -> tuple[int, int, list[int]]:
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    day = date.today() + timedelta(days=2)
+    bookings = [
+        Booking(
+            student_id=student.id,
+            coach_id=coach.id,
+            booking_date=day + timedelta(days=offset // 2),
+            start_time=time(9 + offset % 2, 0),
+            end_time=time(10 + offset % 2, 0),
+            status=BookingStatus.CONFIRMED.value,
+        )
+        for offset in range(5)
+    ]
+    db_session.add_all(bookings)
+    await db_session.commit()
+    ordered = sorted(bookings, key=lambda b: (b.booking_date, b.start_time, b.id), reverse=True)
+    return coach.id, student.id, [b.id for b in ordered]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_walk_every_booking_once(db_session, test_users):
+    _, student_id, expected = await _seed_bookings(db_session, test_users)
+    service = BookingService(db_session)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        bookings, cursor, total = await service.get_student_bookings_by_cursor(
+            student_id, cursor=cursor, limit=2
+        )
+        seen.extend(b.id for b in bookings)
+        pages += 1
+        assert total is None
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 3
+
+    _, _, total = await service.get_student_bookings_by_cursor(student_id, with_total=True)
+    assert total == 5
+
+    with pytest.raises(ValueError, match="无效的分页游标"):
+        await service.get_student_bookings_by_cursor(student_id, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_booking_list_endpoints_support_cursor_mode(
+    client, db_session, test_users, student_token, coach_token
+):
+    _, _, expected = await _seed_bookings(db_session, test_users)
+
+    response = await client.get(
+        "/api/v1/bookings",
+        params={"pagination": "cursor", "page_size": 3},
+        headers={"Authorization": f"Bearer {student_token}"},
+    )
+    assert response.status_code == 200, response.text
+    first = response.json()
+    assert [item["id"] for item in first["items"]] == expected[:3]
+    assert first["total"] is None
+    assert first["next_cursor"]
+
+    response = await client.get(
+        "/api/v1/coaches/me/bookings",
+        params={"cursor": first["next_cursor"], "page_size": 3, "with_total": True},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert response.status_code == 200, response.text
+    second = response.json()
+    assert [item["id"] for item in second["items"]] == expected[3:]
+    assert second["total"] == 5
+    assert second["next_cursor"] is None
+
+    # 页码模式保持原有返回结构
+    response = await client.get(
+        "/api/v1/bookings",
+        params={"page": 2, "page_size": 3},
+        headers={"Authorization": f"Bearer {student_token}"},
+    )
+    legacy = response.json()
+    assert (legacy["total"], legacy["page"]) == (5, 2)
+    assert [item["id"] for item in legacy["items"]] == expected[3:]
@@ -0,0 +1,156 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.booking import (
+    Booking,
+    BookingStatus,
+    MembershipCard,
+    StudentMembership,
+    Transaction,
+)
+from app.models.user import Coach, Student
+from app.schemas.booking import BookingSeriesCreate
+from app.services.booking_service import BookingService
+from app.services.coach_availability import expand_weekly_dates
+
+
+def test_expand_weekly_dates_honours_interval_and_limits():
+    monday = date(2026, 10, 19)
+
+    assert expand_weekly_dates(monday, occurrences=3) == [
+        monday,
+        monday + timedelta(weeks=1),
+        monday + timedelta(weeks=2),
+    ]
+    assert expand_weekly_dates(
+        monday, monday + timedelta(days=23), weekdays=[1, 3], interval_weeks=2
+    ) == [
+        monday,
+        monday + timedelta(days=2),
+        monday + timedelta(days=14),
+        monday + timedelta(days=16),
+    ]
+    with pytest.raises(ValueError):
+        expand_weekly_dates(monday)
+
+
+async def _setup(db_session, test_users, remaining_times: int) -> tuple[int, int, int]:
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    card = MembershipCard(name="学期卡", card_type="times", total_times=20, price=1000)
+    db_session.add(card)
+    await db_session.flush()
+    membership = StudentMembership(
+        student_id=student.id, card_id=card.id, remaining_times=remaining_times
+    )
+    db_session.add(membership)
+    await db_session.commit()
+    return coach.id, student.id, membership.id
+
+
+def _series(coach_id: int, start: date, **kwargs) -> BookingSeriesCreate:
+    return BookingSeriesCreate(
+        coach_id=coach_id,
+        start_date=start,
+        occurrences=4,
+        start_time=time(18, 0),
+        end_time=time(19, 0),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_series_is_all_or_nothing_by_default(db_session, test_users):
+    coach_id, student_id, _ = await _setup(db_session, test_users, remaining_times=10)
+    start = date.today() + timedelta(days=3)
+    db_session.add(
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=start + timedelta(weeks=2),
+            start_time=time(18, 30),
+            end_time=time(19, 30),
+            status=BookingStatus.CONFIRMED.value,
+        )
+    )
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    with pytest.raises(ValueError, match="已有其他预约"):
+        await service.create_booking_series(_series(coach_id, start), student_id)
+
+    count = await db_session.scalar(select(func.count(Booking.id)))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_series_partial_mode_reports_skipped_and_deducts_in_bulk(db_session, test_users):
+    coach_id, student_id, membership_id = await _setup(db_session, test_users, remaining_times=2)
+    start = date.today() + timedelta(days=3)
+    db_session.add(
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=start + timedelta(weeks=1),
+            start_time=time(18, 0),
+            end_time=time(19, 0),
+            status=BookingStatus.CONFIRMED.value,
+        )
+    )
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    bookings, skipped = await service.create_booking_series(
+        _series(coach_id, start, all_or_nothing=False), student_id
+    )
+
+    assert [b.booking_date for b in bookings] == [start, start + timedelta(weeks=2)]
+    assert skipped == [
+        (start + timedelta(weeks=1), "该时段您已有其他预约"),
+        (start + timedelta(weeks=3), "课时余额不足"),
+    ]
+
+    membership = await db_session.get(StudentMembership, membership_id)
+    await db_session.refresh(membership)
+    assert membership.remaining_times == 0
+    assert membership.status == "exhausted"
+    consumed = await db_session.scalar(
+        select(func.count(Transaction.id)).where(Transaction.student_id == student_id)
+    )
+    assert consumed == 2
+
+
+@pytest.mark.asyncio
+async def test_series_endpoint_creates_weekly_bookings(
+    client, db_session, test_users, student_token
+):
+    coach_id, _, _ = await _setup(db_session, test_users, remaining_times=5)
+    start = date.today() + timedelta(days=3)
+
+    response = await client.post(
+        "/api/v1/bookings/series",
+        json={
+            "coach_id": coach_id,
+            "start_date": start.isoformat(),
+            "occurrences": 2,
+            "start_time": "08:00:00",
+            "end_time": "09:00:00",
+        },
+        headers={"Authorization": f"Bearer {student_token}"},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["booking_date"] for item in body["created"]] == [
+        start.isoformat(),
+        (start + timedelta(weeks=1)).isoformat(),
+    ]
+    assert {item["coach_name"] for item in body["created"]} == {"Coach User"}
+    assert all(item["student_name"] for item in body["created"])
+    assert body["skipped"] == []
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.api.v1.endpoints.chat import ConnectionManager
+from app.services.chat_broker import (
+    ChatBroker,
+    InProcessBroker,
+    InProcessHub,
+    PostgresNotifyBroker,
+    create_chat_broker,
+    register_chat_broker,
+)
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _flush_writers():
+    # 推送只入队，等待各连接的写协程发送
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_push_reaches_recipient_connected_to_another_worker():
+    # 共享 hub 的两个 broker 模拟两个 worker
+    hub = InProcessHub()
+    worker_a = ConnectionManager(InProcessBroker(hub))
+    worker_b = ConnectionManager(InProcessBroker(hub))
+    sender, recipient = _FakeSocket(), _FakeSocket()
+    await worker_a.connect(sender, 1)
+    await worker_b.connect(recipient, 2)
+
+    await worker_a.send_personal_message({"type": "new_message", "data": {"id": 7}}, 2)
+    await worker_b.broadcast_to_conversation({"type": "typing"}, [1, 2])
+    await _flush_writers()
+
+    assert recipient.sent == [{"type": "new_message", "data": {"id": 7}}, {"type": "typing"}]
+    assert sender.sent == [{"type": "typing"}]
+
+    await worker_b.stop()
+    await worker_a.send_personal_message({"type": "new_message"}, 2)
+    await _flush_writers()
+    assert len(recipient.sent) == 2
+    await worker_a.stop()
+
+
+@pytest.mark.asyncio
+async def test_registered_backend_can_replace_the_broker():
+    hub = InProcessHub()
+    register_chat_broker("test-loopback", lambda: InProcessBroker(hub))
+    manager = ConnectionManager(create_chat_broker("memory"))
+    socket = _FakeSocket()
+    await manager.connect(socket, 3)
+
+    await manager.use_broker(create_chat_broker("test-loopback"))
+    await InProcessBroker(hub).publish([3], {"type": "ping"})
+    await _flush_writers()
+
+    assert socket.sent == [{"type": "ping"}]
+    with pytest.raises(ValueError):
+        create_chat_broker("missing")
+    await manager.stop()
+
+
+def test_incomplete_broker_fails_at_construction():
+    class PublishOnly(ChatBroker):
+        async def publish(self, user_ids, message):
+            pass
+
+    register_chat_broker("test-incomplete", PublishOnly)
+    with pytest.raises(TypeError):
+        create_chat_broker("test-incomplete")
+
+
+@pytest.mark.asyncio
+async def test_postgres_publish_failure_is_logged_not_raised(caplog):
+    class _BrokenConnection:
+        async def execute(self, *args):
+            raise ConnectionError("connection reset")
+
+    broker = PostgresNotifyBroker("postgresql://localhost/unused")
+    broker._conn = _BrokenConnection()
+
+    await broker.publish([1], {"type": "new_message"})
+
+    assert "chat broker publish failed" in caplog.text
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.services.chat_connections import (
+    CLOSE_REPLACED,
+    CLOSE_SLOW_CONSUMER,
+    ConnectionRegistry,
+)
+
+
+class _FakeSocket:
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.sent = []
+        self.close_code = None
+
+    async def send_json(self, message):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+@pytest.mark.asyncio
+async def test_every_device_of_a_user_receives_pushes():
+    registry = ConnectionRegistry(queue_size=10, send_timeout=1, max_per_user=2)
+    phone, web, oldest = _FakeSocket(), _FakeSocket(), _FakeSocket()
+    await registry.register(oldest, 1)
+    await registry.register(phone, 1)
+    await registry.register(web, 1)
+
+    # 超出单用户连接数时关闭最早的连接
+    assert oldest.close_code == CLOSE_REPLACED
+    assert registry.deliver([1, 2], {"type": "new_message"}) == 2
+    await asyncio.sleep(0.01)
+    assert phone.sent == web.sent == [{"type": "new_message"}]
+    await registry.close_all()
+    assert not registry.is_online(1)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumers_are_evicted_without_blocking_the_sender():
+    registry = ConnectionRegistry(queue_size=2, send_timeout=0.05, max_per_user=5)
+    healthy, stalled, slow = _FakeSocket(), _FakeSocket(stalled=True), _FakeSocket(stalled=True)
+    await registry.register(healthy, 1)
+    await registry.register(stalled, 1)
+    await registry.register(slow, 2)
+
+    # 队列已满：入队立即返回，连接被踢下线
+    for index in range(4):
+        registry.deliver([2], {"seq": index})
+    await asyncio.sleep(0.01)
+    assert slow.close_code == CLOSE_SLOW_CONSUMER
+    assert not registry.is_online(2)
+
+    # 单次发送超时
+    registry.deliver([1], {"seq": 0})
+    await asyncio.sleep(0.2)
+    assert stalled.close_code == CLOSE_SLOW_CONSUMER
+    assert healthy.sent == [{"seq": 0}]
+    assert registry.connections_of(1)[0].websocket is healthy
+    await registry.close_all()
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.chat import Conversation, Message, MessageStatus
+
+
+async def _thread(db_session, test_users, count: int) -> tuple[int, list[int]]:
+    coach_id, parent_id = test_users["coach"].id, test_users["parent"].id
+    conversation = Conversation(participant1_id=coach_id, participant2_id=parent_id)
+    db_session.add(conversation)
+    await db_session.flush()
+    messages = [
+        Message(
+            conversation_id=conversation.id,
+            sender_id=coach_id if index % 2 == 0 else parent_id,
+            content=f"m{index}",
+        )
+        for index in range(count)
+    ]
+    db_session.add_all(messages)
+    await db_session.flush()
+    conversation.last_message_id = messages[-1].id
+    await db_session.commit()
+    return conversation.id, [message.id for message in messages]
+
+
+@pytest.mark.asyncio
+async def test_history_pages_by_message_id_without_marking_read(
+    client, db_session, test_users, parent_token
+):
+    conversation_id, ids = await _thread(db_session, test_users, 5)
+    headers = {"Authorization": f"Bearer {parent_token}"}
+    url = f"/api/v1/chat/conversations/{conversation_id}/messages"
+
+    first = (await client.get(url, params={"limit": 2}, headers=headers)).json()
+    assert [item["id"] for item in first["items"]] == [ids[4], ids[3]]
+    assert (first["has_more"], first["total"]) == (True, None)
+
+    older = (
+        await client.get(url, params={"limit": 3, "before_id": ids[3]}, headers=headers)
+    ).json()
+    assert [item["id"] for item in older["items"]] == [ids[2], ids[1], ids[0]]
+    assert older["has_more"] is False
+
+    newer = (
+        await client.get(
+            url, params={"limit": 2, "after_id": ids[1], "with_total": True}, headers=headers
+        )
+    ).json()
+    assert [item["id"] for item in newer["items"]] == [ids[3], ids[2]]
+    assert (newer["has_more"], newer["total"]) == (True, 5)
+
+    response = await client.get(url, params={"before_id": 1, "after_id": 1}, headers=headers)
+    assert response.status_code == 400
+
+    # 读取历史不产生写入
+    statuses = (await db_session.execute(select(Message.status))).scalars().all()
+    assert set(statuses) == {MessageStatus.SENT.value}
+
+
+@pytest.mark.asyncio
+async def test_mark_conversation_read_up_to_cursor(
+    client, db_session, test_users, parent_token, coach_token
+):
+    conversation_id, ids = await _thread(db_session, test_users, 5)
+    headers = {"Authorization": f"Bearer {parent_token}"}
+    url = f"/api/v1/chat/conversations/{conversation_id}/read"
+
+    response = await client.put(url, params={"up_to_id": ids[2]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["last_read_message_id"] == ids[2]
+
+    # 已读状态由家长的已读水位推导，只影响对方（教练，偶数序号）发来的消息
+    history = await client.get(
+        f"/api/v1/chat/conversations/{conversation_id}/messages",
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert [item["status"] for item in reversed(history.json()["items"])] == [
+        MessageStatus.READ.value,
+        MessageStatus.SENT.value,
+        MessageStatus.READ.value,
+        MessageStatus.SENT.value,
+        MessageStatus.SENT.value,
+    ]
+
+    # 水位不后退；默认标记到会话最后一条消息
+    response = await client.put(url, params={"up_to_id": ids[0]}, headers=headers)
+    assert response.json()["last_read_message_id"] == ids[2]
+    response = await client.put(url, headers=headers)
+    assert response.json()["last_read_message_id"] == ids[4]
+
+    # 不再逐条改写 messages.status
+    statuses = (await db_session.execute(select(Message.status))).scalars().all()
+    assert set(statuses) == {MessageStatus.SENT.value}
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.chat import Conversation, ConversationReadState, Message, MessageStatus
+from app.services.chat_read_state import ChatReadStateService
+
+
+async def _unread(db_session, conversation_id: int, user_id: int):
+    db_session.expire_all()
+    return await db_session.scalar(
+        select(ConversationReadState.unread_count).where(
+            ConversationReadState.conversation_id == conversation_id,
+            ConversationReadState.user_id == user_id,
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_unread_counter_follows_sends_and_read_watermark(
+    client, db_session, test_users, coach_token, parent_token
+):
+    coach_id, parent_id = test_users["coach"].id, test_users["parent"].id
+    conversation = Conversation(participant1_id=coach_id, participant2_id=parent_id)
+    db_session.add(conversation)
+    await db_session.commit()
+    conversation_id = conversation.id
+    coach = {"Authorization": f"Bearer {coach_token}"}
+    parent = {"Authorization": f"Bearer {parent_token}"}
+    send_url = f"/api/v1/chat/conversations/{conversation_id}/messages"
+
+    ids = []
+    for index in range(3):
+        response = await client.post(send_url, json={"content": f"c{index}"}, headers=coach)
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    await client.post(send_url, json={"content": "p0"}, headers=parent)
+
+    assert await _unread(db_session, conversation_id, parent_id) == 3
+    assert await _unread(db_session, conversation_id, coach_id) == 1
+
+    listing = (await client.get("/api/v1/chat/conversations", headers=parent)).json()
+    assert [item["unread_count"] for item in listing["items"]] == [3]
+
+    # 部分已读：按水位之后对方的消息数重置
+    response = await client.put(f"/api/v1/chat/messages/{ids[0]}/read", headers=parent)
+    assert response.status_code == 200, response.text
+    assert await _unread(db_session, conversation_id, parent_id) == 2
+
+    response = await client.put(
+        f"/api/v1/chat/conversations/{conversation_id}/read", headers=parent
+    )
+    assert response.status_code == 200, response.text
+    assert await _unread(db_session, conversation_id, parent_id) == 0
+    assert await _unread(db_session, conversation_id, coach_id) == 1
+
+    listing = (await client.get("/api/v1/chat/conversations", headers=coach)).json()
+    item = listing["items"][0]
+    assert item["unread_count"] == 1
+    # 最后一条是家长发的，教练尚未读
+    assert item["last_message"]["status"] == MessageStatus.SENT.value
+
+
+@pytest.mark.asyncio
+async def test_rebuild_read_states_from_message_status(db_session, test_users):
+    coach_id, parent_id = test_users["coach"].id, test_users["parent"].id
+    conversation = Conversation(participant1_id=coach_id, participant2_id=parent_id)
+    db_session.add(conversation)
+    await db_session.flush()
+    statuses = [MessageStatus.READ, MessageStatus.READ, MessageStatus.SENT]
+    messages = [
+        Message(
+            conversation_id=conversation.id,
+            sender_id=coach_id,
+            content=f"m{index}",
+            status=status.value,
+        )
+        for index, status in enumerate(statuses)
+    ]
+    messages.append(Message(conversation_id=conversation.id, sender_id=parent_id, content="p"))
+    db_session.add_all(messages)
+    await db_session.commit()
+
+    assert await ChatReadStateService(db_session).rebuild() == 2
+    rows = (
+        await db_session.execute(
+            select(
+                ConversationReadState.user_id,
+                ConversationReadState.last_read_message_id,
+                ConversationReadState.unread_count,
+            ).order_by(ConversationReadState.user_id)
+        )
+    ).all()
+    expected = sorted([(parent_id, messages[1].id, 1), (coach_id, 0, 1)])
+    assert sorted(rows) == expected
@@ -0,0 +1,201 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.v1.endpoints.chat import ConnectionManager
+from app.models.chat import Conversation, ConversationReadState, Message
+from app.services.chat_broker import InProcessBroker
+from app.services.chat_connections import ConnectionRegistry
+from app.services.chat_writer import ChatMessageWriter, PendingMessage
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _send(conversation_id: int, client_msg_id: str, content: str, **extra) -> str:
+    return json.dumps(
+        {
+            "type": "send",
+            "data": {
+                "conversation_id": conversation_id,
+                "client_msg_id": client_msg_id,
+                "content": content,
+                **extra,
+            },
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_websocket_send_batches_writes_and_acks_after_commit(
+    db_session, test_engine, test_users
+):
+    coach_id, parent_id = test_users["coach"].id, test_users["parent"].id
+    conversation = Conversation(participant1_id=coach_id, participant2_id=parent_id)
+    other = Conversation(participant1_id=parent_id, participant2_id=test_users["admin"].id)
+    db_session.add_all([conversation, other])
+    await db_session.commit()
+    conversation_id, other_id = conversation.id, other.id
+
+    writer = ChatMessageWriter(
+        session_factory=async_sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        ),
+        batch_size=10,
+        flush_interval=0.02,
+    )
+    manager = ConnectionManager(InProcessBroker(), ConnectionRegistry(queue_size=50), writer)
+    coach_socket, parent_socket = _FakeSocket(), _FakeSocket()
+    coach = await manager.connect(coach_socket, coach_id)
+    await manager.connect(parent_socket, parent_id)
+
+    await manager.receive(coach, "ping")
+    for index in range(3):
+        await manager.receive(coach, _send(conversation_id, f"c-{index}", f"m{index}"))
+    # 重发（未收到确认）与非成员会话、无效帧
+    await manager.receive(coach, _send(conversation_id, "c-0", "m0"))
+    await manager.receive(coach, _send(other_id, "c-x", "nope"))
+    await manager.receive(coach, "{not json")
+    assert coach.peers == {conversation_id: parent_id}
+
+    await _wait_for(lambda: len(coach_socket.sent) == 7)
+    assert coach_socket.sent[0] == "pong"
+    errors = [frame["data"] for frame in coach_socket.sent[1:] if frame["type"] == "error"]
+    assert errors == [
+        {"client_msg_id": "c-x", "detail": "Not found"},
+        {"client_msg_id": None, "detail": "无效的消息帧"},
+    ]
+    acks = [frame["data"] for frame in coach_socket.sent[1:] if frame["type"] == "ack"]
+    assert [ack["client_msg_id"] for ack in acks] == ["c-0", "c-1", "c-2", "c-0"]
+    ids = [ack["message"]["id"] for ack in acks]
+    assert ids[:3] == sorted(ids[:3]) and ids[3] == ids[0]
+    assert acks[0]["message"]["sender"]["id"] == coach_id
+
+    # 对方只收到一次推送（重发的帧不重复推送）
+    await _wait_for(lambda: len(parent_socket.sent) == 3)
+    assert [frame["data"]["content"] for frame in parent_socket.sent] == ["m0", "m1", "m2"]
+
+    db_session.expire_all()
+    rows = (await db_session.execute(select(Message.id).order_by(Message.id))).scalars().all()
+    assert rows == ids[:3]
+    assert await db_session.scalar(
+        select(Conversation.last_message_id).where(Conversation.id == conversation_id)
+    ) == ids[2]
+    assert await db_session.scalar(
+        select(ConversationReadState.unread_count).where(
+            ConversationReadState.conversation_id == conversation_id,
+            ConversationReadState.user_id == parent_id,
+        )
+    ) == 3
+
+    # 已落库后再重发：返回已有消息
+    await manager.receive(coach, _send(conversation_id, "c-1", "m1"))
+    await _wait_for(lambda: len(coach_socket.sent) == 8)
+    assert coach_socket.sent[-1]["data"]["message"]["id"] == ids[1]
+    await asyncio.sleep(0.05)
+    assert len(parent_socket.sent) == 3
+
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_bad_frame_does_not_fail_the_rest_of_its_batch(db_session, test_engine, test_users):
+    coach_id, parent_id = test_users["coach"].id, test_users["parent"].id
+    conversation = Conversation(participant1_id=coach_id, participant2_id=parent_id)
+    other = Conversation(participant1_id=parent_id, participant2_id=test_users["admin"].id)
+    db_session.add_all([conversation, other])
+    await db_session.flush()
+    foreign = Message(conversation_id=other.id, sender_id=parent_id, content="elsewhere")
+    db_session.add(foreign)
+    await db_session.commit()
+    conversation_id, foreign_id = conversation.id, foreign.id
+
+    # SQLite 默认不检查外键，单独的引擎开启后与 PostgreSQL 行为一致
+    engine = create_async_engine(test_engine.url, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        event.listen(
+            engine.sync_engine,
+            "connect",
+            lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"),
+        )
+    writer = ChatMessageWriter(
+        session_factory=async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+        batch_size=10,
+        flush_interval=0.05,
+    )
+
+    # 绕过入队前校验的无效回复引用与有效消息落在同一批
+    futures = [
+        writer.submit(
+            PendingMessage(
+                conversation_id=conversation_id,
+                sender_id=coach_id,
+                recipient_id=parent_id,
+                client_msg_id=f"b-{index}",
+                content=f"m{index}",
+                reply_to_id=reply_to_id,
+            )
+        )
+        for index, reply_to_id in enumerate([None, 10_000_000, None])
+    ]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    await writer.stop()
+    await engine.dispose()
+
+    assert isinstance(results[1], IntegrityError)
+    assert [result.message.content for result in (results[0], results[2])] == ["m0", "m2"]
+    db_session.expire_all()
+    assert (
+        await db_session.execute(
+            select(Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id)
+        )
+    ).scalars().all() == ["m0", "m2"]
+
+    # 入队前校验：回复其他会话的消息直接返回错误
+    manager = ConnectionManager(
+        InProcessBroker(),
+        ConnectionRegistry(queue_size=50),
+        ChatMessageWriter(
+            session_factory=async_sessionmaker(
+                test_engine, class_=AsyncSession, expire_on_commit=False
+            ),
+            flush_interval=0.01,
+        ),
+    )
+    socket = _FakeSocket()
+    coach = await manager.connect(socket, coach_id)
+    await manager.receive(coach, _send(conversation_id, "r-1", "re", reply_to_id=foreign_id))
+    await _wait_for(lambda: len(socket.sent) == 1)
+    assert socket.sent[0] == {
+        "type": "error",
+        "data": {"client_msg_id": "r-1", "detail": "回复的消息不存在"},
+    }
+    await manager.stop()
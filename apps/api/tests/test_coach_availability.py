@@ -0,0 +1,144 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import Booking, BookingStatus, CoachAvailableSlot
+from app.models.user import Coach, Student, User
+from app.services.booking_service import BookingService
+from app.services.coach_availability import CoachAvailabilityIndex
+
+
+def _next_weekday(weekday: int) -> date:
+    """Next date (from tomorrow) whose Sunday-first weekday equals ``weekday``."""
+    day = date.today() + timedelta(days=1)
+    while (day.weekday() + 1) % 7 != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+def test_index_counts_partial_overlaps_not_only_exact_matches():
+    day = date(2026, 3, 2)
+    index = CoachAvailabilityIndex.build(
+        [
+            (1, day, time(9, 30), time(10, 30)),
+            (1, day, time(12, 0), time(13, 0)),
+            (2, day, time(9, 0), time(10, 0)),
+        ]
+    )
+
+    assert index.count_overlaps(1, day, time(9, 0), time(10, 0)) == 1
+    assert index.count_overlaps(1, day, time(10, 30), time(12, 0)) == 0
+    assert index.count_overlaps(1, day, time(8, 0), time(14, 0)) == 2
+    assert index.is_free(1, day + timedelta(days=1), time(9, 0), time(10, 0))
+    assert not index.is_free(2, day, time(9, 59), time(11, 0))
+
+
+@pytest.mark.asyncio
+async def test_available_times_mark_partially_overlapping_booking_as_taken(
+    db_session, test_users
+):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+
+    day = _next_weekday(1)
+    db_session.add_all(
+        [
+            CoachAvailableSlot(
+                coach_id=coach.id,
+                day_of_week=1,
+                start_time=time(9, 0),
+                end_time=time(10, 0),
+                max_students=1,
+            ),
+            CoachAvailableSlot(
+                coach_id=coach.id,
+                day_of_week=1,
+                start_time=time(10, 0),
+                end_time=time(11, 0),
+                max_students=1,
+            ),
+            Booking(
+                student_id=student.id,
+                coach_id=coach.id,
+                booking_date=day,
+                start_time=time(9, 30),
+                end_time=time(10, 0),
+                status=BookingStatus.CONFIRMED.value,
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    slots = await service.get_coach_available_times(coach.id, day, day + timedelta(days=6))
+
+    assert [(s.start_time, s.is_available) for s in slots] == [
+        (time(9, 0), False),
+        (time(10, 0), True),
+    ]
+    assert all(s.date == day for s in slots)
+
+
+@pytest.mark.asyncio
+async def test_search_available_coaches_excludes_booked_coach(db_session, test_users):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    other_user = User(
+        email="coach2@test.com",
+        phone="13800000009",
+        password_hash="x",
+        role="coach",
+        nickname="Coach Two",
+        status="active",
+    )
+    db_session.add(other_user)
+    await db_session.flush()
+    other = Coach(user_id=other_user.id, coach_no="C-SEARCH-2", name="Coach Two", status="active")
+    db_session.add(other)
+    await db_session.flush()
+
+    day = _next_weekday(2)
+    db_session.add_all(
+        [
+            CoachAvailableSlot(
+                coach_id=coach.id,
+                day_of_week=2,
+                start_time=time(14, 0),
+                end_time=time(15, 0),
+                max_students=1,
+            ),
+            CoachAvailableSlot(
+                coach_id=other.id,
+                day_of_week=2,
+                start_time=time(14, 0),
+                end_time=time(15, 0),
+                max_students=1,
+            ),
+            Booking(
+                student_id=student.id,
+                coach_id=coach.id,
+                booking_date=day,
+                start_time=time(14, 0),
+                end_time=time(15, 0),
+                status=BookingStatus.PENDING.value,
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    results = await service.search_available_coaches(
+        day, day, start_time=time(13, 0), end_time=time(16, 0)
+    )
+
+    assert [c.id for c, _ in results] == [other.id]
+    assert [(s.date, s.start_time) for s in results[0][1]] == [(day, time(14, 0))]
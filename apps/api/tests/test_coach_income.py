@@ -0,0 +1,122 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import Booking, BookingStatus, CoachIncomeEntry
+from app.models.user import Coach, Student
+from app.services.booking_service import BookingService
+from app.services.coach_income import CoachIncomeService
+
+
+@pytest.mark.asyncio
+async def test_income_keeps_rate_in_effect_at_completion(
+    client, db_session, test_users, coach_token
+):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    coach.hourly_rate = 200
+    coach.commission_rate = 0.5
+    coach_id, student_id = coach.id, student.id
+
+    today = date.today()
+    last_month_day = today.replace(day=1) - timedelta(days=1)
+    bookings = [
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=time(8 + i, 0),
+            end_time=time(9 + i, 0),
+            status=BookingStatus.CONFIRMED.value,
+        )
+        for i, day in enumerate([last_month_day, today, today])
+    ]
+    db_session.add_all(bookings)
+    await db_session.commit()
+    booking_ids = [b.id for b in bookings]
+
+    headers = {"Authorization": f"Bearer {coach_token}"}
+    for booking_id in booking_ids[:2]:
+        response = await client.put(
+            f"/api/v1/coaches/me/bookings/{booking_id}/complete", headers=headers
+        )
+        assert response.status_code == 200, response.text
+
+    # 调整费率后完成的课程按新费率记账，已记账的收入不变
+    db_session.expire_all()
+    coach = await db_session.get(Coach, coach_id)
+    coach.hourly_rate = 300
+    await db_session.commit()
+    service = BookingService(db_session)
+    await service.complete_booking(booking_ids[2])
+
+    response = await client.get("/api/v1/coaches/me/income/summary", headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["last_month"] == {"lessons": 1, "income": 100.0}
+    assert body["this_month"] == {"lessons": 2, "income": 250.0}
+    assert body["total"] == {"lessons": 3, "income": 350.0}
+    assert (body["hourly_rate"], body["commission_rate"]) == (300.0, 0.5)
+
+    response = await client.get(
+        "/api/v1/coaches/me/income/details",
+        params={"month": today.strftime("%Y-%m")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert sorted((item["id"], item["income"]) for item in items) == [
+        (booking_ids[1], 100.0),
+        (booking_ids[2], 150.0),
+    ]
+
+    # 完成后改判缺席：撤销流水并回退月度汇总
+    await service.mark_no_show(booking_ids[1])
+    income_service = CoachIncomeService(db_session)
+    incremental = await income_service.get_summary(coach_id)
+    assert incremental["this_month"] == {"lessons": 1, "income": 150.0}
+    assert await db_session.scalar(
+        select(CoachIncomeEntry.id).where(CoachIncomeEntry.booking_id == booking_ids[1])
+    ) is None
+
+    await income_service.rebuild([coach_id])
+    assert await income_service.get_summary(coach_id) == incremental
+
+
+@pytest.mark.asyncio
+async def test_rebuild_backfills_completed_bookings_without_entries(db_session, test_users):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    coach.hourly_rate = 100
+    coach.commission_rate = None
+    coach_id = coach.id
+    db_session.add(
+        Booking(
+            student_id=student.id,
+            coach_id=coach_id,
+            booking_date=date(2026, 3, 10),
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=BookingStatus.COMPLETED.value,
+        )
+    )
+    await db_session.commit()
+
+    service = CoachIncomeService(db_session)
+    summary = await service.get_summary(coach_id, today=date(2026, 4, 2))
+    assert summary["total"] == {"lessons": 0, "income": 0.0}
+
+    assert await service.rebuild([coach_id]) == 1
+    summary = await service.get_summary(coach_id, today=date(2026, 4, 2))
+    # 未设置提成比例时使用默认比例
+    assert summary["last_month"] == {"lessons": 1, "income": 70.0}
+    assert summary["total"] == {"lessons": 1, "income": 70.0}
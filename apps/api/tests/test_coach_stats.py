@@ -0,0 +1,96 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import Booking, BookingStatus, CoachStats
+from app.models.user import Coach, Student
+from app.schemas.booking import BookingCancelRequest, ReviewCreate
+from app.services.booking_service import BookingService, ReviewService
+from app.services.coach_stats import CoachStatsService
+
+
+def _counters(stats: CoachStats) -> tuple:
+    return (
+        stats.total_students,
+        stats.total_lessons,
+        stats.no_show_count,
+        stats.cancelled_count,
+        stats.rating_sum,
+        stats.review_count,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_booking_and_review_events(client, db_session, test_users):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    coach_id, student_id = coach.id, student.id
+
+    day = date.today() + timedelta(days=3)
+    bookings = [
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day,
+            start_time=time(8 + i, 0),
+            end_time=time(9 + i, 0),
+            status=BookingStatus.CONFIRMED.value,
+        )
+        for i in range(4)
+    ]
+    # 已完成的历史课程：统计行首次创建时应计入
+    bookings.append(
+        Booking(
+            student_id=student_id,
+            coach_id=coach_id,
+            booking_date=day - timedelta(days=10),
+            start_time=time(8, 0),
+            end_time=time(9, 0),
+            status=BookingStatus.COMPLETED.value,
+        )
+    )
+    db_session.add_all(bookings)
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    await service.complete_booking(bookings[0].id)
+    await service.complete_booking(bookings[1].id)
+    await service.mark_no_show(bookings[2].id)
+    await service.cancel_booking(bookings[3].id, test_users["student"].id, BookingCancelRequest())
+    await ReviewService(db_session).create_review(
+        ReviewCreate(booking_id=bookings[0].id, rating=4), student_id
+    )
+    await ReviewService(db_session).create_review(
+        ReviewCreate(booking_id=bookings[1].id, rating=5), student_id
+    )
+
+    stats_service = CoachStatsService(db_session)
+    incremental = _counters(await stats_service.get(coach_id))
+    assert incremental == (1, 3, 1, 1, 9, 2)
+
+    await stats_service.rebuild([coach_id])
+    assert _counters(await stats_service.get(coach_id)) == incremental
+
+    response = await client.get(f"/api/v1/coaches/{coach_id}")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_students"], body["total_lessons"]) == (1, 3)
+    assert (body["avg_rating"], body["review_count"]) == (4.5, 2)
+
+
+@pytest.mark.asyncio
+async def test_coach_without_stats_row_falls_back_to_live_aggregate(db_session, test_users):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+
+    stats = await CoachStatsService(db_session).get(coach.id)
+
+    assert _counters(stats) == (0, 0, 0, 0, 0, 0)
+    assert stats.avg_rating == 0.0
+    assert await db_session.get(CoachStats, coach.id) is None
@@ -0,0 +1,115 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import MembershipCard, Transaction, TransactionType
+from app.models.user import Coach, Student
+from app.schemas.booking import BookingCreate, BookingRescheduleRequest, MembershipRechargeRequest
+from app.services.booking_service import BookingService
+from app.services.dashboard_metrics import (
+    DashboardMetricsService,
+    SnapshotCache,
+    dashboard_snapshot_cache,
+)
+
+
+@pytest.mark.asyncio
+async def test_metrics_follow_write_paths_and_match_rebuild(
+    client, db_session, test_users, admin_token
+):
+    coach = (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+    student = (
+        await db_session.execute(select(Student).where(Student.user_id == test_users["student"].id))
+    ).scalar_one()
+    coach_id, student_id = coach.id, student.id
+    card = MembershipCard(name="次卡", card_type="times", total_times=10, price=800)
+    db_session.add(card)
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    await service.recharge_membership(
+        MembershipRechargeRequest(student_id=student_id, card_id=card.id, times=5), operator_id=1
+    )
+    # 购买交易直接写表，无需重建即计入营收
+    db_session.add(
+        Transaction(
+            student_id=student_id,
+            type=TransactionType.PURCHASE.value,
+            amount=800,
+            times_change=10,
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+    await db_session.commit()
+
+    today = date.today()
+    later = today + timedelta(days=3)
+    booked = []
+    for day, hour in [(today, 20), (later, 9), (later, 10)]:
+        booking = await service.create_booking(
+            BookingCreate(
+                coach_id=coach_id,
+                booking_date=day,
+                start_time=time(hour, 0),
+                end_time=time(hour, 45),
+            ),
+            student_id,
+        )
+        booked.append(booking.id)
+    await service.complete_booking(booked[0])
+    await service.reschedule_booking(
+        booked[2],
+        BookingRescheduleRequest(
+            new_date=later + timedelta(days=1), new_start_time=time(9), new_end_time=time(10)
+        ),
+    )
+
+    metrics = DashboardMetricsService(db_session)
+    assert await metrics.get_daily(today, later + timedelta(days=7)) == {
+        today: (1, 1),
+        later: (1, 0),
+        later + timedelta(days=1): (1, 0),
+    }
+
+    month = today.strftime("%Y-%m")
+    incremental = await metrics.get_monthly([month])
+    assert incremental == {month: (800, 1, 1)}
+    assert await metrics.rebuild() == 1
+    assert await metrics.get_monthly([month]) == incremental
+
+    dashboard_snapshot_cache.clear()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get("/api/v1/dashboard/overview", headers=headers)
+    assert response.status_code == 200, response.text
+    overview = response.json()
+    assert overview["bookings"]["today"] == 1
+    assert overview["revenue"]["this_month"] == 800.0
+    assert overview["memberships"]["active"] == 1
+
+    response = await client.get(
+        "/api/v1/dashboard/booking-stats", params={"days": 1}, headers=headers
+    )
+    assert response.json() == [{"date": today.isoformat(), "total": 1, "completed": 1}]
+    dashboard_snapshot_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_loads_once_within_ttl():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    cache = SnapshotCache(ttl_seconds=60)
+    assert await cache.get_or_load("k", loader) == 1
+    assert await cache.get_or_load("k", loader) == 1
+    cache.clear()
+    assert await cache.get_or_load("k", loader) == 2
+
+    uncached = SnapshotCache(ttl_seconds=0)
+    assert await uncached.get_or_load("k", loader) == 3
+    assert await uncached.get_or_load("k", loader) == 4
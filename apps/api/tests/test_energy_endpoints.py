@@ -23,3 +23,38 @@ async def test_coach_energy_summary_returns_400_not_500(client: AsyncClient, coa
     )
     assert response.status_code == 400
     assert response.json()["detail"] == "未找到关联的学员账户"
+
+
+@pytest.mark.asyncio
+async def test_coach_can_award_energy_to_a_whole_class(
+    client: AsyncClient, db_session, test_users, coach_token: str
+):
+    from sqlalchemy import select
+
+    from app.models.energy import EnergyRule
+    from app.models.user import Student
+
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.user_id == test_users["student"].id)
+    )
+    db_session.add(
+        EnergyRule(name="课堂签到", code="class_checkin", source_type="checkin", points=5)
+    )
+    await db_session.commit()
+
+    response = await client.post(
+        "/api/v1/energy/earn/batch",
+        json={"rule_code": "class_checkin", "student_ids": [student_id, 999999]},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["success_count"] == 1
+    assert body["items"][0] == {
+        "student_id": student_id,
+        "success": True,
+        "amount": 5,
+        "balance": 5,
+        "message": "获得 5 能量",
+    }
@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models.energy import EnergyAccount, EnergyDailyStats, EnergyTransaction
+from app.models.job import JobCheckpoint
+from app.models.user import Student, User
+from app.services.energy_expiry import EXPIRY_JOB, EnergyExpiryService, expiry_cutoff
+
+
+def test_expiry_cutoff_clamps_to_month_end():
+    assert expiry_cutoff(date(2026, 10, 18), 6) == date(2026, 4, 18)
+    assert expiry_cutoff(date(2026, 8, 31), 6) == date(2026, 2, 28)
+    assert expiry_cutoff(date(2026, 1, 5), 1) == date(2025, 12, 5)
+
+
+async def _account(db_session, suffix: str, balance: int, spent: int, earned: dict) -> int:
+    user = User(email=f"expiry-{suffix}@test.com", role="student", status="active")
+    db_session.add(user)
+    await db_session.flush()
+    student = Student(user_id=user.id, student_no=f"S-EXP-{suffix}", name=f"Expiry {suffix}")
+    db_session.add(student)
+    await db_session.flush()
+    account = EnergyAccount(
+        student_id=student.id,
+        balance=balance,
+        total_earned=sum(earned.values()),
+        total_spent=spent,
+    )
+    db_session.add(account)
+    db_session.add_all(
+        EnergyDailyStats(student_id=student.id, stat_date=day, earned=amount)
+        for day, amount in earned.items()
+    )
+    await db_session.flush()
+    return account.id
+
+
+@pytest.mark.asyncio
+async def test_expiry_applies_fifo_policy_and_resumes_from_checkpoint(db_session):
+    old, recent = date(2026, 1, 10), date(2026, 10, 1)
+    # 早期获取 100、已消费 30：70 过期，近期获取的 20 保留
+    partly = await _account(db_session, "a", 90, 30, {old: 100, recent: 20})
+    # 消费已超过早期获取：不过期
+    spent = await _account(db_session, "b", 10, 80, {old: 50, recent: 40})
+    await _account(db_session, "c", 0, 50, {old: 50})
+    await db_session.commit()
+
+    service = EnergyExpiryService(db_session, batch_size=1, months=6)
+    report = await service.run(date(2026, 10, 18))
+
+    assert report["cutoff"] == date(2026, 4, 18)
+    assert (report["expired_accounts"], report["expired_amount"], report["skipped"]) == (1, 70, 0)
+    assert report["batches"] == 2
+    balances = dict(
+        (
+            await db_session.execute(
+                select(EnergyAccount.id, EnergyAccount.balance).execution_options(
+                    populate_existing=True
+                )
+            )
+        ).all()
+    )
+    assert (balances[partly], balances[spent]) == (20, 10)
+    tx = (await db_session.execute(select(EnergyTransaction))).scalar_one()
+    assert (tx.type, tx.amount, tx.balance_after) == ("expire", -70, 20)
+    expired_today = await db_session.scalar(
+        select(EnergyDailyStats.expired).where(
+            EnergyDailyStats.student_id == tx.student_id, EnergyDailyStats.expired > 0
+        )
+    )
+    assert expired_today == 70
+
+    # 同一截止日已完成：不再处理
+    again = await service.run(date(2026, 10, 18))
+    assert (again["batches"], again["expired_amount"]) == (0, 0)
+
+    # 次日截止点：已过期部分不会重复过期；中断的进度从检查点继续
+    checkpoint = await db_session.get(JobCheckpoint, EXPIRY_JOB)
+    checkpoint.run_key, checkpoint.last_id, checkpoint.completed = "2026-04-19", partly, False
+    await db_session.commit()
+    resumed = await service.run(date(2026, 10, 19))
+    assert (resumed["resumed_from"], resumed["batches"], resumed["expired_amount"]) == (
+        partly,
+        1,
+        0,
+    )
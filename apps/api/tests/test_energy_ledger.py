@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.energy import (
+    EnergyAccount,
+    EnergyArchiveCount,
+    EnergyTransaction,
+    EnergyTransactionArchive,
+)
+from app.models.user import Student, User
+from app.services.energy_ledger import EnergyLedgerArchiver, hot_window_start
+from app.services.energy_service import EnergyService
+
+
+def test_hot_window_keeps_at_least_two_months():
+    assert hot_window_start(date(2026, 10, 18), 6) == date(2026, 5, 1)
+    assert hot_window_start(date(2026, 2, 3), 3) == date(2025, 12, 1)
+    assert hot_window_start(date(2026, 10, 18), 1) == date(2026, 9, 1)
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_cold_months_and_reads_page_across_tables(db_session):
+    user = User(email="ledger@test.com", role="student", status="active")
+    db_session.add(user)
+    await db_session.flush()
+    student = Student(user_id=user.id, student_no="S-LEDGER", name="Ledger")
+    db_session.add(student)
+    await db_session.flush()
+    account = EnergyAccount(student_id=student.id, balance=0)
+    db_session.add(account)
+    await db_session.flush()
+    student_id = student.id
+
+    # 每月 1 条获取、4 月另有 1 条消费：3-5 月为冷数据，8-10 月为热数据
+    rows = [(datetime(2026, month, 10), "earn", 10) for month in (3, 4, 5, 8, 9, 10)]
+    rows.append((datetime(2026, 4, 20), "spend", -5))
+    db_session.add_all(
+        EnergyTransaction(
+            account_id=account.id,
+            student_id=student_id,
+            type=tx_type,
+            amount=amount,
+            balance_after=0,
+            created_at=created_at,
+        )
+        for created_at, tx_type, amount in rows
+    )
+    await db_session.commit()
+    await EnergyService.rebuild_daily_stats(db_session)
+
+    report = await EnergyLedgerArchiver(db_session, batch_size=2, hot_months=3).archive_cold_months(
+        date(2026, 10, 18)
+    )
+
+    assert (report["cutoff"], report["batches"], report["moved"]) == (date(2026, 8, 1), 2, 4)
+    assert await db_session.scalar(select(func.count()).select_from(EnergyTransaction)) == 3
+    counts = (
+        await db_session.execute(select(EnergyArchiveCount.type, EnergyArchiveCount.count))
+    ).all()
+    assert sorted(counts) == [("earn", 3), ("spend", 1)]
+
+    page, total = await EnergyService.get_transactions(db_session, student_id, page=2, page_size=2)
+    assert total == 7
+    assert [(type(tx), tx.created_at.month) for tx in page] == [
+        (EnergyTransaction, 8),
+        (EnergyTransactionArchive, 5),
+    ]
+    page, total = await EnergyService.get_transactions(db_session, student_id, 3, 2)
+    assert [tx.created_at.date() for tx in page] == [date(2026, 4, 20), date(2026, 4, 10)]
+
+    earned, total = await EnergyService.get_transactions(db_session, student_id, 1, 10, "earn")
+    assert (total, len(earned)) == (6, 6)
+
+    # 全量重建日汇总时包含归档记录
+    assert await EnergyService.rebuild_daily_stats(db_session) == 7
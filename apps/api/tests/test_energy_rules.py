@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event, update
+
+from app.models.energy import EnergyRule
+from app.services.energy_rules import EnergyRuleRegistry
+
+
+async def _add_rule(db_session, code: str, points: int) -> EnergyRule:
+    rule = EnergyRule(name="签到", code=code, source_type="checkin", points=points)
+    db_session.add(rule)
+    await db_session.commit()
+    return rule
+
+
+@pytest.mark.asyncio
+async def test_registry_serves_rules_without_queries_between_polls(db_session):
+    await _add_rule(db_session, "rules_cached", 10)
+    registry = EnergyRuleRegistry(poll_seconds=3600)
+    await registry.refresh(db_session)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        rule = await registry.get(db_session, "rules_cached")
+        active = await registry.list_active(db_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements == []
+    assert (rule.points, rule.multiplier) == (10, 1.0)
+    assert [r.code for r in active] == ["rules_cached"]
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_after_version_bump(db_session):
+    rule = await _add_rule(db_session, "rules_versioned", 10)
+    registry = EnergyRuleRegistry(poll_seconds=0)
+    assert (await registry.get(db_session, "rules_versioned")).points == 10
+
+    await db_session.execute(update(EnergyRule).where(EnergyRule.id == rule.id).values(points=20))
+    await db_session.commit()
+    assert (await registry.get(db_session, "rules_versioned")).points == 10
+
+    await EnergyRuleRegistry.bump_version(db_session)
+    await db_session.commit()
+    assert (await registry.get(db_session, "rules_versioned")).points == 20
+
+    await db_session.execute(
+        update(EnergyRule).where(EnergyRule.id == rule.id).values(is_active=False)
+    )
+    await EnergyRuleRegistry.bump_version(db_session)
+    await db_session.commit()
+    assert await registry.get(db_session, "rules_versioned") is None
+    assert await registry.list_active(db_session) == []
@@ -1,7 +1,13 @@
 import pytest
 from sqlalchemy import select
 
-from app.models.energy import EnergyAccount, EnergyRule, EnergyTransaction
+from app.models.energy import (
+    EnergyAccount,
+    EnergyDailyStats,
+    EnergyRule,
+    EnergyRuleCounter,
+    EnergyTransaction,
+)
 from app.models.user import Student, User
 from app.services.energy_service import EnergyService
 
@@ -173,3 +179,124 @@ async def test_refund_updates_balance_with_versioned_write(db_session):
     tx = tx_result.scalar_one()
     assert tx.balance_after == refreshed.balance
     assert tx.amount == 3
+
+
+@pytest.mark.asyncio
+async def test_earn_batch_applies_limits_per_student_in_one_pass(db_session):
+    capped = await _create_student(db_session, "105")
+    existing = await _create_student(db_session, "106")
+    fresh = await _create_student(db_session, "107")
+    rule = EnergyRule(
+        name="整班签到",
+        code="test_energy_batch",
+        source_type="checkin",
+        points=50,
+        multiplier=2,
+        daily_limit=100,
+        is_active=True,
+    )
+    db_session.add_all(
+        [rule, EnergyAccount(student_id=existing.id, balance=10, total_earned=60, level=1)]
+    )
+    await db_session.flush()
+    await EnergyService.earn(db_session, capped.id, rule.code)
+
+    outcomes = await EnergyService.earn_batch(
+        db_session,
+        rule.code,
+        [capped.id, existing.id, fresh.id, existing.id],
+        reference_type="schedule",
+        reference_id=9,
+    )
+
+    assert [(o["student_id"], o["success"], o["balance"]) for o in outcomes] == [
+        (capped.id, False, 0),
+        (existing.id, True, 110),
+        (fresh.id, True, 100),
+    ]
+    assert outcomes[0]["message"] == "今日已达上限 100 能量"
+
+    accounts = (
+        await db_session.execute(
+            select(EnergyAccount)
+            .where(EnergyAccount.student_id.in_([existing.id, fresh.id]))
+            .execution_options(populate_existing=True)
+        )
+    ).scalars()
+    levels = {a.student_id: (a.total_earned, a.level, a.version) for a in accounts}
+    assert levels == {existing.id: (160, 2, 1), fresh.id: (100, 2, 1)}
+
+    txs = (
+        await db_session.execute(
+            select(EnergyTransaction).where(EnergyTransaction.reference_id == 9)
+        )
+    ).scalars().all()
+    assert sorted((tx.student_id, tx.amount, tx.balance_after) for tx in txs) == sorted(
+        [(existing.id, 100, 110), (fresh.id, 100, 100)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_period_counters_enforce_limits_and_feed_summaries(db_session):
+    student = await _create_student(db_session, "108")
+    rule = EnergyRule(
+        name="每日训练",
+        code="test_energy_counter",
+        source_type="training",
+        points=30,
+        multiplier=1,
+        daily_limit=60,
+        weekly_limit=200,
+        is_active=True,
+    )
+    db_session.add(rule)
+    await db_session.flush()
+
+    results = [await EnergyService.earn(db_session, student.id, rule.code) for _ in range(3)]
+
+    assert [success for success, *_ in results] == [True, True, False]
+    assert results[2][3] == "今日已达上限 60 能量"
+    assert await EnergyService.get_today_earned(db_session, student.id) == 60
+    assert await EnergyService.get_week_earned(db_session, student.id) == 60
+
+    counters = (
+        await db_session.execute(
+            select(EnergyRuleCounter.period, EnergyRuleCounter.amount).where(
+                EnergyRuleCounter.student_id == student.id
+            )
+        )
+    ).all()
+    assert sorted(counters) == [("day", 60), ("month", 60), ("week", 60)]
+
+    await db_session.commit()
+    assert await EnergyService.rebuild_period_counters(db_session) == 3
+    assert await EnergyService.get_today_earned(db_session, student.id) == 60
+
+
+@pytest.mark.asyncio
+async def test_daily_stats_follow_writes_and_match_rebuild(db_session):
+    student = await _create_student(db_session, "109")
+    db_session.add(
+        EnergyRule(name="训练", code="test_energy_daily", source_type="training", points=20)
+    )
+    await db_session.flush()
+
+    await EnergyService.earn(db_session, student.id, "test_energy_daily")
+    await EnergyService.earn(db_session, student.id, "test_energy_daily")
+    await EnergyService.spend(db_session, student.id, 15, "redeem_order", 1)
+    await EnergyService.refund(db_session, student.id, 5, "redeem_order", 1)
+    await db_session.commit()
+
+    async def daily_rows():
+        result = await db_session.execute(
+            select(
+                EnergyDailyStats.earned, EnergyDailyStats.spent, EnergyDailyStats.refunded
+            ).where(EnergyDailyStats.student_id == student.id)
+        )
+        return result.all()
+
+    assert await daily_rows() == [(40, 15, 5)]
+    assert await EnergyService.get_week_earned(db_session, student.id) == 40
+
+    assert await EnergyService.rebuild_daily_stats(db_session) == 1
+    assert await daily_rows() == [(40, 15, 5)]
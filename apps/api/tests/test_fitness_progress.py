@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models.growth import FitnessImprovement, FitnessMetric, FitnessTest
+from app.models.user import Student, User
+from app.services.fitness_progress import FitnessProgressService
+
+
+def _metric(name: str, value: float, score=None) -> dict:
+    return {"metric_type": "endurance", "metric_name": name, "value": value, "score": score}
+
+
+@pytest.mark.asyncio
+async def test_fitness_leaderboard_ranks_latest_two_test_deltas(
+    client, db_session, test_users, student_token, admin_token
+):
+    me = await db_session.scalar(
+        select(Student.id).where(Student.user_id == test_users["student"].id)
+    )
+    user = User(email="fitness-rival@test.com", role="student", status="active")
+    db_session.add(user)
+    await db_session.flush()
+    rival = Student(user_id=user.id, student_no="S-FIT-1", name="Rival")
+    db_session.add(rival)
+    await db_session.commit()
+    rival_id = rival.id
+
+    async def create_test(student_id: int, test_date: date, metrics: list) -> None:
+        response = await client.post(
+            "/api/v1/growth/fitness-test",
+            json={
+                "student_id": student_id,
+                "test_date": test_date.isoformat(),
+                "metrics": metrics,
+            },
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        assert response.status_code == 200, response.text
+        assert len(response.json()["metrics"]) == len(metrics)
+
+    await create_test(me, date(2026, 3, 1), [_metric("jump_rope", 80), _metric("sit_up", 20)])
+    await create_test(me, date(2026, 9, 1), [_metric("jump_rope", 95)])
+    # 补录的更早体测不改变"最近两次"
+    await create_test(me, date(2025, 9, 1), [_metric("jump_rope", 10)])
+    # 两次都有得分时按得分计算
+    await create_test(rival_id, date(2026, 3, 1), [_metric("jump_rope", 100, score=60)])
+    await create_test(rival_id, date(2026, 9, 1), [_metric("jump_rope", 140, score=80)])
+
+    headers = {"Authorization": f"Bearer {student_token}"}
+    response = await client.get(
+        "/api/v1/leaderboard/fitness", params={"metric": "jump_rope"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(item["student_id"], item["value"]) for item in body["items"]] == [
+        (rival_id, 20),
+        (me, 15),
+    ]
+    assert (body["my_rank"], body["my_value"]) == (2, 15)
+
+    # sit_up 只出现在较早的一次体测中，没有可比较的差值
+    response = await client.get(
+        "/api/v1/leaderboard/fitness", params={"metric": "sit_up"}, headers=headers
+    )
+    assert (response.json()["items"], response.json()["my_rank"]) == ([], None)
+
+    improvements = select(FitnessImprovement.student_id, FitnessImprovement.improvement)
+    incremental = sorted((await db_session.execute(improvements)).all())
+    assert await FitnessProgressService(db_session).rebuild() == 2
+    assert sorted((await db_session.execute(improvements)).all()) == incremental
+
+
+@pytest.mark.asyncio
+async def test_fitness_improvement_for_timed_metric_rewards_lower_values(db_session, test_users):
+    student_id = await db_session.scalar(
+        select(Student.id).where(Student.user_id == test_users["student"].id)
+    )
+    for test_date, seconds in [(date(2026, 3, 1), 9.8), (date(2026, 9, 1), 8.9)]:
+        test = FitnessTest(student_id=student_id, test_date=test_date)
+        db_session.add(test)
+        await db_session.flush()
+        db_session.add(
+            FitnessMetric(
+                test_id=test.id, metric_type="speed", metric_name="sprint_50m", value=seconds
+            )
+        )
+        await db_session.flush()
+        await FitnessProgressService(db_session).on_test_created(student_id)
+    await db_session.commit()
+
+    # 50 米跑用时缩短 0.9 秒计为进步 0.9
+    assert await FitnessProgressService(db_session).rank_of("sprint_50m", student_id) == (1, 0.9)
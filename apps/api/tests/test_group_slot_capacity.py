@@ -0,0 +1,234 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.booking import (
+    Booking,
+    BookingStatus,
+    CoachAvailableSlot,
+    CoachSlotOccupancy,
+    MembershipCard,
+    StudentMembership,
+)
+from app.models.user import Coach, Student, User
+from app.schemas.booking import BookingCancelRequest, BookingCreate, BookingRescheduleRequest
+from app.services.booking_service import BookingService
+
+
+def _weekday_after(days: int, weekday: int) -> date:
+    """First date at least ``days`` ahead whose Sunday-first weekday equals ``weekday``."""
+    day = date.today() + timedelta(days=days)
+    while (day.weekday() + 1) % 7 != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+async def _create_students(db_session, count: int) -> list[Student]:
+    card = MembershipCard(name="次卡", card_type="times", total_times=10, price=100)
+    db_session.add(card)
+    await db_session.flush()
+
+    students = []
+    for i in range(count):
+        user = User(
+            email=f"group{i}@test.com",
+            phone=f"1370000000{i}",
+            password_hash="x",
+            role="student",
+            nickname=f"Group {i}",
+            status="active",
+        )
+        db_session.add(user)
+        await db_session.flush()
+        student = Student(user_id=user.id, student_no=f"G{user.id:06d}", name=f"Group {i}")
+        db_session.add(student)
+        await db_session.flush()
+        db_session.add(
+            StudentMembership(student_id=student.id, card_id=card.id, remaining_times=5)
+        )
+        students.append(student)
+    await db_session.commit()
+    return students
+
+
+async def _get_coach(db_session, test_users) -> Coach:
+    return (
+        await db_session.execute(select(Coach).where(Coach.user_id == test_users["coach"].id))
+    ).scalar_one()
+
+
+def _booking(coach_id: int, day: date, start: time, end: time) -> BookingCreate:
+    return BookingCreate(
+        coach_id=coach_id, booking_date=day, start_time=start, end_time=end, course_type="group"
+    )
+
+
+@pytest.mark.asyncio
+async def test_group_slot_accepts_bookings_up_to_capacity(db_session, test_users):
+    coach = await _get_coach(db_session, test_users)
+    day = _weekday_after(3, 3)
+    slot = CoachAvailableSlot(
+        coach_id=coach.id,
+        day_of_week=3,
+        start_time=time(16, 0),
+        end_time=time(17, 0),
+        max_students=2,
+    )
+    db_session.add(slot)
+    await db_session.commit()
+    first, second, third = await _create_students(db_session, 3)
+
+    service = BookingService(db_session)
+    booking = await service.create_booking(
+        _booking(coach.id, day, time(16, 0), time(17, 0)), first.id
+    )
+    await service.create_booking(_booking(coach.id, day, time(16, 0), time(17, 0)), second.id)
+    assert booking.slot_id == slot.id
+
+    times = await service.get_coach_available_times(coach.id, day, day)
+    assert [(t.is_available, t.remaining_slots) for t in times] == [(False, 0)]
+
+    await service.cancel_booking(booking.id, test_users["student"].id, BookingCancelRequest())
+    times = await service.get_coach_available_times(coach.id, day, day)
+    assert [(t.is_available, t.remaining_slots) for t in times] == [(True, 1)]
+
+    await service.create_booking(_booking(coach.id, day, time(16, 0), time(17, 0)), third.id)
+    occupancy = (
+        await db_session.execute(
+            select(CoachSlotOccupancy.booked_count).where(CoachSlotOccupancy.slot_id == slot.id)
+        )
+    ).scalar_one()
+    assert occupancy == 2
+
+    with pytest.raises(ValueError, match="名额已满"):
+        await service.create_booking(_booking(coach.id, day, time(16, 0), time(17, 0)), first.id)
+
+
+@pytest.mark.asyncio
+async def test_reschedule_moves_seat_between_group_slots(db_session, test_users):
+    coach = await _get_coach(db_session, test_users)
+    day = _weekday_after(3, 4)
+    early = CoachAvailableSlot(
+        coach_id=coach.id,
+        day_of_week=4,
+        start_time=time(9, 0),
+        end_time=time(10, 0),
+        max_students=3,
+    )
+    late = CoachAvailableSlot(
+        coach_id=coach.id,
+        day_of_week=4,
+        start_time=time(10, 0),
+        end_time=time(11, 0),
+        max_students=3,
+    )
+    db_session.add_all([early, late])
+    await db_session.commit()
+    (student,) = await _create_students(db_session, 1)
+
+    service = BookingService(db_session)
+    booking = await service.create_booking(
+        _booking(coach.id, day, time(9, 0), time(10, 0)), student.id
+    )
+    await service.reschedule_booking(
+        booking.id,
+        BookingRescheduleRequest(
+            new_date=day, new_start_time=time(10, 0), new_end_time=time(11, 0)
+        ),
+    )
+
+    times = await service.get_coach_available_times(coach.id, day, day)
+    assert [(t.start_time, t.remaining_slots) for t in times] == [
+        (time(9, 0), 3),
+        (time(10, 0), 2),
+    ]
+    assert booking.slot_id == late.id
+
+
+@pytest.mark.asyncio
+async def test_delete_slot_with_bookings(db_session, test_users):
+    coach_id = (await _get_coach(db_session, test_users)).id
+    day = _weekday_after(3, 5)
+    slot = CoachAvailableSlot(
+        coach_id=coach_id,
+        day_of_week=5,
+        start_time=time(14, 0),
+        end_time=time(15, 0),
+        max_students=3,
+    )
+    empty = CoachAvailableSlot(
+        coach_id=coach_id,
+        day_of_week=5,
+        start_time=time(18, 0),
+        end_time=time(19, 0),
+        max_students=3,
+    )
+    db_session.add_all([slot, empty])
+    await db_session.commit()
+    slot_id, empty_id = slot.id, empty.id
+    (student,) = await _create_students(db_session, 1)
+
+    service = BookingService(db_session)
+    booking = await service.create_booking(
+        _booking(coach_id, day, time(14, 0), time(15, 0)), student.id
+    )
+
+    # 有效预约仍引用该时段
+    with pytest.raises(ValueError, match="未完成的预约"):
+        await service.delete_coach_slot(slot_id)
+
+    # 只剩历史预约时停用，保留预约对时段的引用
+    await service.cancel_booking(booking.id, test_users["student"].id, BookingCancelRequest())
+    assert await service.delete_coach_slot(slot_id) is True
+    db_session.expire_all()
+    assert (await db_session.get(CoachAvailableSlot, slot_id)).is_active is False
+    assert [s.id for s in await service.get_coach_slots(coach_id)] == [empty_id]
+
+    # 没有任何预约时连同名额计数一起删除
+    assert await service.claim_slot_seat(empty, day)
+    assert await service.delete_coach_slot(empty_id) is True
+    assert await db_session.get(CoachAvailableSlot, empty_id) is None
+    remaining = await db_session.execute(
+        select(CoachSlotOccupancy.id).where(CoachSlotOccupancy.slot_id == empty_id)
+    )
+    assert remaining.first() is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_group_booking_releases_its_seat(db_session, test_users):
+    coach_id = (await _get_coach(db_session, test_users)).id
+    day = _weekday_after(3, 6)
+    slot = CoachAvailableSlot(
+        coach_id=coach_id,
+        day_of_week=6,
+        start_time=time(9, 0),
+        end_time=time(10, 0),
+        max_students=2,
+    )
+    db_session.add(slot)
+    await db_session.commit()
+    slot_id = slot.id
+    legacy_student, student = await _create_students(db_session, 2)
+
+    # 名额计数上线前的小班预约：没有 slot_id，也没有计数行
+    legacy = Booking(
+        student_id=legacy_student.id,
+        coach_id=coach_id,
+        booking_date=day,
+        start_time=time(9, 0),
+        end_time=time(10, 0),
+        status=BookingStatus.CONFIRMED.value,
+    )
+    db_session.add(legacy)
+    await db_session.commit()
+
+    service = BookingService(db_session)
+    await service.create_booking(_booking(coach_id, day, time(9, 0), time(10, 0)), student.id)
+    times = await service.get_coach_available_times(coach_id, day, day)
+    assert [t.remaining_slots for t in times] == [0]
+
+    await service.cancel_booking(legacy.id, test_users["student"].id, BookingCancelRequest())
+    assert legacy.slot_id == slot_id
+    times = await service.get_coach_available_times(coach_id, day, day)
+    assert [t.remaining_slots for t in times] == [1]
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.energy import EnergyRule
+from app.models.user import Student, User
+from app.services.energy_service import EnergyService
+from app.services.leaderboard_index import RankedBoard, leaderboard_index
+
+
+def test_ranked_board_orders_ties_by_student_and_moves_on_add():
+    board = RankedBoard({1: 30, 2: 50, 3: 30, 4: 0, 5: 10})
+
+    assert board.top(3) == [(1, 2, 50), (2, 1, 30), (3, 3, 30)]
+    assert (board.rank_of(3), board.value_of(3)) == (3, 30)
+    assert board.rank_of(4) is None
+    assert board.around(3, 1) == [(2, 1, 30), (3, 3, 30), (4, 5, 10)]
+
+    board.add(5, 45)
+    board.add(4, 5)
+    board.add(2, -50)
+    assert board.top(10) == [(1, 5, 55), (2, 1, 30), (3, 3, 30), (4, 4, 5)]
+    assert board.rank_of(2) is None
+    assert board.around(5, 2) == [(1, 5, 55), (2, 1, 30), (3, 3, 30)]
+
+
+@pytest.mark.asyncio
+async def test_energy_leaderboard_ranks_everyone_and_follows_commits(
+    client, db_session, test_users, student_token
+):
+    me = await db_session.scalar(
+        select(Student.id).where(Student.user_id == test_users["student"].id)
+    )
+    others = []
+    for index in range(3):
+        user = User(email=f"rank-{index}@test.com", role="student", status="active")
+        db_session.add(user)
+        await db_session.flush()
+        student = Student(user_id=user.id, student_no=f"S-RANK-{index}", name=f"Rank {index}")
+        db_session.add(student)
+        await db_session.flush()
+        others.append(student.id)
+    db_session.add(EnergyRule(name="训练", code="rank_training", source_type="training", points=10))
+    await db_session.commit()
+
+    # others: 40 / 30 / 20，我：10
+    for student_id, times in [(others[0], 4), (others[1], 3), (others[2], 2), (me, 1)]:
+        for _ in range(times):
+            await EnergyService.earn(db_session, student_id, "rank_training")
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {student_token}"}
+    params = {"period": "week", "limit": 2, "around": 1}
+    response = await client.get("/api/v1/leaderboard/energy", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(item["rank"], item["value"]) for item in body["items"]] == [(1, 40), (2, 30)]
+    assert (body["my_rank"], body["my_value"]) == (4, 10)
+    assert [item["student_id"] for item in body["around_me"]] == [others[2], me]
+
+    # 已加载的索引在提交后增量更新，回滚的获取不计入
+    await EnergyService.earn(db_session, me, "rank_training")
+    await db_session.rollback()
+    for _ in range(3):
+        await EnergyService.earn(db_session, me, "rank_training")
+    await db_session.commit()
+
+    # 同分按学员ID升序，我的学员先于 others 创建
+    board = await leaderboard_index.get(db_session, "week")
+    assert board.top(2) == [(1, me, 40), (2, others[0], 40)]
+
+    response = await client.get("/api/v1/leaderboard/energy", params=params, headers=headers)
+    assert (response.json()["my_rank"], response.json()["my_value"]) == (1, 40)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.growth import TrainingDailyStats, TrainingSession, TrainingStats
+from app.models.user import Student, User
+from app.services.training_stats import TrainingStatsService
+
+
+@pytest.mark.asyncio
+async def test_training_leaderboard_served_from_session_counters(
+    client, db_session, test_users, student_token, admin_token
+):
+    me = await db_session.scalar(
+        select(Student.id).where(Student.user_id == test_users["student"].id)
+    )
+    user = User(email="train-rival@test.com", role="student", status="active")
+    db_session.add(user)
+    await db_session.flush()
+    rival = Student(user_id=user.id, student_no="S-TRAIN-1", name="Rival")
+    db_session.add(rival)
+    await db_session.flush()
+    rival_id = rival.id
+    # 上月的训练只计入全部时间排行
+    db_session.add(
+        TrainingSession(
+            student_id=rival_id,
+            exercise_type="squat",
+            duration=60,
+            created_at=datetime.now(timezone.utc) - timedelta(days=40),
+        )
+    )
+    await db_session.commit()
+    await TrainingStatsService(db_session).rebuild()
+
+    async def complete(student_id: int) -> None:
+        response = await client.post(
+            "/api/v1/training/complete",
+            json={"student_id": student_id, "exercise_type": "squat", "duration": 60},
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        assert response.status_code == 200, response.text
+
+    headers = {"Authorization": f"Bearer {student_token}"}
+    # 首次读取加载索引，此后的训练在提交后增量计入
+    response = await client.get(
+        "/api/v1/leaderboard/training", params={"period": "week"}, headers=headers
+    )
+    assert response.json()["items"] == []
+
+    for student_id in [me, me, rival_id]:
+        await complete(student_id)
+
+    response = await client.get(
+        "/api/v1/leaderboard/training", params={"period": "week", "around": 1}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(item["student_id"], item["value"]) for item in body["items"]] == [
+        (me, 2),
+        (rival_id, 1),
+    ]
+    assert (body["my_rank"], body["my_value"]) == (1, 2)
+    assert [item["rank"] for item in body["around_me"]] == [1, 2]
+
+    # 同分按学员ID升序
+    response = await client.get(
+        "/api/v1/leaderboard/training", params={"period": "all"}, headers=headers
+    )
+    body = response.json()
+    assert [(item["student_id"], item["value"]) for item in body["items"]] == [
+        (me, 2),
+        (rival_id, 2),
+    ]
+
+    # 增量计数与全量重建一致
+    daily_rows = select(
+        TrainingDailyStats.student_id, TrainingDailyStats.stat_date, TrainingDailyStats.sessions
+    )
+    incremental = sorted((await db_session.execute(daily_rows)).all())
+    totals = await db_session.execute(
+        select(TrainingStats.student_id, TrainingStats.total_sessions)
+    )
+    assert dict(totals.all()) == {me: 2, rival_id: 2}
+
+    await TrainingStatsService(db_session).rebuild()
+    assert sorted((await db_session.execute(daily_rows)).all()) == incremental
@@ -529,14 +529,17 @@ export const chatApi = {
   createConversation: (data: { participant_id: number; student_id?: number; type?: string }) =>
     api.post('/chat/conversations', data),
 
-  getMessages: (conversationId: number, params?: { skip?: number; limit?: number }) =>
+  getMessages: (conversationId: number, params?: { before_id?: number; after_id?: number; limit?: number }) =>
     api.get(`/chat/conversations/${conversationId}/messages`, params),
 
   sendMessage: (conversationId: number, data: { type?: string; content: string; reply_to_id?: number }) =>
     api.post(`/chat/conversations/${conversationId}/messages`, data),
 
   markMessageRead: (messageId: number) =>
-    api.put(`/chat/messages/${messageId}/read`)
+    api.put(`/chat/messages/${messageId}/read`),
+
+  markConversationRead: (conversationId: number, upToId?: number) =>
+    api.put(`/chat/conversations/${conversationId}/read${upToId ? `?up_to_id=${upToId}` : ''}`)
 }
 
 // ============ 教练端 API ============